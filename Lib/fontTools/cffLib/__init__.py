@@ -9,9 +9,11 @@ from fontTools.ttLib import TTFont
 from fontTools.ttLib.tables.otBase import OTTableWriter
 from fontTools.ttLib.tables.otBase import OTTableReader
 from fontTools.ttLib.tables import otTables as ot
+from array import array
 import struct
 import logging
 import re
+import sys
 
 # mute cffLib debug messages when running ttx in verbose mode
 DEBUG = logging.DEBUG - 1
@@ -88,7 +90,13 @@ class CFFFontSet(object):
 			raise TypeError(nameOrIndex)
 		return self.topDictIndex[index]
 
-	def compile(self, file, otFont, isCFF2=None):
+	def compile(self, file, otFont, isCFF2=None, workers=None):
+		"""Write the CFF table to 'file'.
+
+		If 'workers' is greater than 1, charstrings that are not compiled yet
+		are compiled in that many worker processes.  The output is the same
+		either way.
+		"""
 		self.otFont = otFont
 		if isCFF2 is not None:
 			# called from ttLib: assert 'major' value matches expected version
@@ -106,6 +114,9 @@ class CFFFontSet(object):
 			for topDict in self.topDictIndex:
 				topDict.recalcFontBBox()
 
+		if workers is not None and workers > 1:
+			self._compileCharStringsParallel(isCFF2, workers)
+
 		if not isCFF2:
 			strings = IndexedStrings()
 		else:
@@ -143,6 +154,45 @@ class CFFFontSet(object):
 
 		writer.toFile(file)
 
+	def _compileCharStringsParallel(self, isCFF2, workers, chunkSize=256):
+		from concurrent.futures import ProcessPoolExecutor
+
+		# Collect all charstrings and subroutines that are still in program
+		# form.  Only plain T2CharStrings are sent to the workers; the rest
+		# get compiled as usual by the CharStrings/Subrs compilers.
+		charStrings = []
+		seen = set()
+		def collect(items):
+			for cs in items:
+				if (type(cs) is psCharStrings.T2CharString and
+						cs.bytecode is None and id(cs) not in seen):
+					seen.add(id(cs))
+					charStrings.append(cs)
+		collect(self.GlobalSubrs)
+		for topDict in self.topDictIndex:
+			collect(topDict.CharStrings.values())
+			if hasattr(topDict, "FDArray"):
+				fontDicts = list(topDict.FDArray)
+			else:
+				fontDicts = [topDict]
+			for fontDict in fontDicts:
+				private = getattr(fontDict, "Private", None)
+				if private is not None and hasattr(private, "Subrs"):
+					collect(private.Subrs)
+		if not charStrings:
+			return
+
+		chunks = [[cs.program for cs in charStrings[i:i+chunkSize]]
+			  for i in range(0, len(charStrings), chunkSize)]
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			results = executor.map(_compileT2Programs, chunks,
+					       [isCFF2] * len(chunks))
+			i = 0
+			for bytecodes in results:
+				for bytecode in bytecodes:
+					charStrings[i].setBytecode(bytecode)
+					i += 1
+
 	def toXML(self, xmlWriter):
 		xmlWriter.simpletag("major", value=self.major)
 		xmlWriter.newline()
@@ -306,6 +356,16 @@ class CFFFontSet(object):
 		self.decompile(file, otFont, isCFF2=True)
 
 
+def _compileT2Programs(programs, isCFF2):
+	# Runs in a worker process; see CFFFontSet._compileCharStringsParallel
+	bytecodes = []
+	for program in programs:
+		cs = psCharStrings.T2CharString(program=program)
+		cs.compile(isCFF2)
+		bytecodes.append(cs.bytecode)
+	return bytecodes
+
+
 class CFFWriter(object):
 
 	def __init__(self, isCFF2):
@@ -811,42 +871,15 @@ class FDSelect(object):
 			# read data in from file
 			self.format = readCard8(file)
 			if self.format == 0:
-				from array import array
 				self.gidArray = array("B", file.read(numGlyphs)).tolist()
 			elif self.format == 3:
-				gidArray = [None] * numGlyphs
 				nRanges = readCard16(file)
-				fd = None
-				prev = None
-				for i in range(nRanges):
-					first = readCard16(file)
-					if prev is not None:
-						for glyphID in range(prev, first):
-							gidArray[glyphID] = fd
-					prev = first
-					fd = readCard8(file)
-				if prev is not None:
-					first = readCard16(file)
-					for glyphID in range(prev, first):
-						gidArray[glyphID] = fd
-				self.gidArray = gidArray
+				self.gidArray = _parseFDSelectRanges(
+					file, numGlyphs, nRanges, "HB", "H")
 			elif self.format == 4:
-				gidArray = [None] * numGlyphs
 				nRanges = readCard32(file)
-				fd = None
-				prev = None
-				for i in range(nRanges):
-					first = readCard32(file)
-					if prev is not None:
-						for glyphID in range(prev, first):
-							gidArray[glyphID] = fd
-					prev = first
-					fd = readCard16(file)
-				if prev is not None:
-					first = readCard32(file)
-					for glyphID in range(prev, first):
-						gidArray[glyphID] = fd
-				self.gidArray = gidArray
+				self.gidArray = _parseFDSelectRanges(
+					file, numGlyphs, nRanges, "LH", "L")
 			else:
 				assert False, "unsupported FDSelect format: %s" % format
 		else:
@@ -868,6 +901,19 @@ class FDSelect(object):
 		self.gidArray.append(fdSelectValue)
 
 
+def _parseFDSelectRanges(file, numGlyphs, nRanges, rangeFormat, sentinelFormat):
+	# Read all the Range3/Range4 records, plus the sentinel, in one go.
+	fmt = ">" + rangeFormat * nRanges + sentinelFormat
+	values = struct.unpack(fmt, file.read(struct.calcsize(fmt)))
+	gidArray = [None] * values[0] if nRanges else []
+	for i in range(0, 2 * nRanges, 2):
+		first, fd, end = values[i:i+3]
+		gidArray.extend([fd] * (end - first))
+	# Glyphs not covered by any range (broken fonts) are left as None
+	gidArray.extend([None] * (numGlyphs - len(gidArray)))
+	return gidArray[:numGlyphs]
+
+
 class CharStrings(object):
 
 	def __init__(self, file, charset, globalSubrs, private, fdSelect, fdArray,
@@ -1417,15 +1463,14 @@ def getSIDfromName(name, strings):
 
 def packCharset0(charset, isCID, strings):
 	fmt = 0
-	data = [packCard8(fmt)]
 	if isCID:
 		getNameID = getCIDfromName
 	else:
 		getNameID = getSIDfromName
 
-	for name in charset[1:]:
-		data.append(packCard16(getNameID(name, strings)))
-	return bytesjoin(data)
+	nameIDs = array("H", [getNameID(name, strings) for name in charset[1:]])
+	if sys.byteorder != "big": nameIDs.byteswap()
+	return packCard8(fmt) + nameIDs.tobytes()
 
 
 def packCharset(charset, isCID, strings):
@@ -1455,26 +1500,19 @@ def packCharset(charset, isCID, strings):
 			fmt = 2
 		ranges.append((first, nLeft))
 
-	data = [packCard8(fmt)]
-	if fmt == 1:
-		nLeftFunc = packCard8
-	else:
-		nLeftFunc = packCard16
-	for first, nLeft in ranges:
-		data.append(packCard16(first) + nLeftFunc(nLeft))
-	return bytesjoin(data)
+	rangeFormat = "HB" if fmt == 1 else "HH"
+	values = [v for r in ranges for v in r]
+	return struct.pack(">B" + rangeFormat * len(ranges), fmt, *values)
 
 
 def parseCharset0(numGlyphs, file, strings, isCID):
 	charset = [".notdef"]
+	nameIDs = array("H", file.read(2 * (numGlyphs - 1)))
+	if sys.byteorder != "big": nameIDs.byteswap()
 	if isCID:
-		for i in range(numGlyphs - 1):
-			CID = readCard16(file)
-			charset.append("cid" + str(CID).zfill(5))
+		charset.extend("cid%05d" % CID for CID in nameIDs)
 	else:
-		for i in range(numGlyphs - 1):
-			SID = readCard16(file)
-			charset.append(strings[SID])
+		charset.extend(strings[SID] for SID in nameIDs)
 	return charset
 
 
@@ -1482,19 +1520,24 @@ def parseCharset(numGlyphs, file, strings, isCID, fmt):
 	charset = ['.notdef']
 	count = 1
 	if fmt == 1:
-		nLeftFunc = readCard8
+		rangeFormat = ">HB"
 	else:
-		nLeftFunc = readCard16
+		rangeFormat = ">HH"
+	rangeSize = struct.calcsize(rangeFormat)
+	# We don't know the number of ranges up front, but there can't be more
+	# than one per glyph; read that much and seek back to where they end.
+	start = file.tell()
+	data = file.read(rangeSize * (numGlyphs - 1))
+	pos = 0
 	while count < numGlyphs:
-		first = readCard16(file)
-		nLeft = nLeftFunc(file)
+		first, nLeft = struct.unpack_from(rangeFormat, data, pos)
+		pos += rangeSize
 		if isCID:
-			for CID in range(first, first + nLeft + 1):
-				charset.append("cid" + str(CID).zfill(5))
+			charset.extend("cid%05d" % CID for CID in range(first, first + nLeft + 1))
 		else:
-			for SID in range(first, first + nLeft + 1):
-				charset.append(strings[SID])
+			charset.extend(strings[SID] for SID in range(first, first + nLeft + 1))
 		count = count + nLeft + 1
+	file.seek(start + pos)
 	return charset
 
 
@@ -1584,8 +1627,8 @@ class EncodingConverter(SimpleConverter):
 def parseEncoding0(charset, file, haveSupplement, strings):
 	nCodes = readCard8(file)
 	encoding = [".notdef"] * 256
-	for glyphID in range(1, nCodes + 1):
-		code = readCard8(file)
+	codes = array("B", file.read(nCodes))
+	for glyphID, code in enumerate(codes, 1):
 		if code != 0:
 			encoding[code] = charset[glyphID]
 	return encoding
@@ -1595,9 +1638,9 @@ def parseEncoding1(charset, file, haveSupplement, strings):
 	nRanges = readCard8(file)
 	encoding = [".notdef"] * 256
 	glyphID = 1
-	for i in range(nRanges):
-		code = readCard8(file)
-		nLeft = readCard8(file)
+	ranges = array("B", file.read(2 * nRanges))
+	for i in range(0, 2 * nRanges, 2):
+		code, nLeft = ranges[i], ranges[i+1]
 		for glyphID in range(glyphID, glyphID + nLeft + 1):
 			encoding[code] = charset[glyphID]
 			code = code + 1
@@ -1739,10 +1782,7 @@ class VarStoreConverter(SimpleConverter):
 
 def packFDSelect0(fdSelectArray):
 	fmt = 0
-	data = [packCard8(fmt)]
-	for index in fdSelectArray:
-		data.append(packCard8(index))
-	return bytesjoin(data)
+	return packCard8(fmt) + array("B", fdSelectArray).tobytes()
 
 
 def packFDSelect3(fdSelectArray):
@@ -1757,13 +1797,9 @@ def packFDSelect3(fdSelectArray):
 			lastFDIndex = fdIndex
 	sentinelGID = i + 1
 
-	data = [packCard8(fmt)]
-	data.append(packCard16(len(fdRanges)))
-	for fdRange in fdRanges:
-		data.append(packCard16(fdRange[0]))
-		data.append(packCard8(fdRange[1]))
-	data.append(packCard16(sentinelGID))
-	return bytesjoin(data)
+	values = [v for fdRange in fdRanges for v in fdRange]
+	return struct.pack(">BH" + "HB" * len(fdRanges) + "H",
+		fmt, len(fdRanges), *values, sentinelGID)
 
 
 def packFDSelect4(fdSelectArray):
@@ -1778,13 +1814,9 @@ def packFDSelect4(fdSelectArray):
 			lastFDIndex = fdIndex
 	sentinelGID = i + 1
 
-	data = [packCard8(fmt)]
-	data.append(packCard32(len(fdRanges)))
-	for fdRange in fdRanges:
-		data.append(packCard32(fdRange[0]))
-		data.append(packCard16(fdRange[1]))
-	data.append(packCard32(sentinelGID))
-	return bytesjoin(data)
+	values = [v for fdRange in fdRanges for v in fdRange]
+	return struct.pack(">BL" + "LH" * len(fdRanges) + "L",
+		fmt, len(fdRanges), *values, sentinelGID)
 
 
 class FDSelectCompiler(object):
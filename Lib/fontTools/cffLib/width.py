@@ -4,40 +4,11 @@
 
 from fontTools.misc.py23 import *
 from fontTools.ttLib import TTFont, getTableClass
+from fontTools.misc.psCharStrings import encodeIntCFF
 from collections import defaultdict
-from operator import add
-from functools import partial, reduce
+from itertools import accumulate
 
 
-class missingdict(dict):
-	def __init__(self, missing_func):
-		self.missing_func = missing_func
-	def __missing__(self, v):
-		return self.missing_func(v)
-
-def cumSum(f, op=add, start=0, decreasing=False):
-	
-	keys = sorted(f.keys())
-	minx, maxx = keys[0], keys[-1]
-
-	total = reduce(op, f.values(), start)
-
-	if decreasing:
-		missing = lambda x: start if x > maxx else total
-		domain = range(maxx, minx - 1, -1)
-	else:
-		missing = lambda x: start if x < minx else total
-		domain = range(minx, maxx + 1)
-
-	out = missingdict(missing)
-
-	v = start
-	for x in domain:
-		v = op(v, f[x])
-		out[x] = v
-
-	return out
-
 def byteCost(widths, default, nominal):
 
 	if not hasattr(widths, 'items'):
@@ -99,54 +70,159 @@ def optimizeWidths(widths):
 		for w in widths:
 			d[w] += 1
 		widths = d
-	
-	keys = sorted(widths.keys())
-	minw, maxw = keys[0], keys[-1]
-	domain = list(range(minw, maxw+1))
+
+	minw, maxw = min(widths), max(widths)
+
+	# Frequencies over the width range, padded on both sides such that
+	# lookups up to 1132 units away from any width stay in bounds.
+	pad = 1132
+	freq = [0] * (maxw - minw + 1 + 2 * pad)
+	for w, f in widths.items():
+		freq[w - minw + pad] = f
 
 	# Cumulative sum/max forward/backward.
-	cumFrqU = cumSum(widths, op=add)
-	cumMaxU = cumSum(widths, op=max)
-	cumFrqD = cumSum(widths, op=add, decreasing=True)
-	cumMaxD = cumSum(widths, op=max, decreasing=True)
-
-	# Cost per nominal choice, without default consideration.
-	nomnCostU = missingdict(lambda x: cumFrqU[x] + cumFrqU[x-108] + cumFrqU[x-1132]*3)
-	nomnCostD = missingdict(lambda x: cumFrqD[x] + cumFrqD[x+108] + cumFrqD[x+1132]*3)
-	nomnCost  = missingdict(lambda x: nomnCostU[x] + nomnCostD[x] - widths[x])
-
-	# Cost-saving per nominal choice, by best default choice.
-	dfltCostU = missingdict(lambda x: max(cumMaxU[x], cumMaxU[x-108]*2, cumMaxU[x-1132]*5))
-	dfltCostD = missingdict(lambda x: max(cumMaxD[x], cumMaxD[x+108]*2, cumMaxD[x+1132]*5))
-	dfltCost  = missingdict(lambda x: max(dfltCostU[x], dfltCostD[x]))
-
-	# Combined cost per nominal choice.
-	bestCost  = missingdict(lambda x: nomnCost[x] - dfltCost[x])
-
-	# Best nominal.
-	nominal = min(domain, key=lambda x: bestCost[x])
-
-	# Work back the best default.
-	bestC = bestCost[nominal]
-	dfltC = nomnCost[nominal] - bestCost[nominal]
-	ends = []
-	if dfltC == dfltCostU[nominal]:
-		starts = [nominal, nominal-108, nominal-1131]
-		for start in starts:
-			while cumMaxU[start] and cumMaxU[start] == cumMaxU[start-1]:
-				start -= 1
-			ends.append(start)
-	else:
-		starts = [nominal, nominal+108, nominal+1131]
-		for start in starts:
-			while cumMaxD[start] and cumMaxD[start] == cumMaxD[start+1]:
-				start += 1
-			ends.append(start)
-	default = min(ends, key=lambda default: byteCost(widths, default, nominal))
+	cumFrqU = list(accumulate(freq))
+	cumMaxU = list(accumulate(freq, max))
+	cumFrqD = list(accumulate(reversed(freq)))[::-1]
+	cumMaxD = list(accumulate(reversed(freq), max))[::-1]
+
+	bestCost = None
+	for i in range(pad, pad + maxw - minw + 1):
+		# Cost of this nominal choice, without default consideration.
+		nomnCost = (cumFrqU[i] + cumFrqU[i-108] + cumFrqU[i-1132]*3 +
+			    cumFrqD[i] + cumFrqD[i+108] + cumFrqD[i+1132]*3 -
+			    freq[i])
+		# Cost-saving of this nominal choice, by best default choice.
+		dfltCost = max(cumMaxU[i], cumMaxU[i-108]*2, cumMaxU[i-1132]*5,
+			       cumMaxD[i], cumMaxD[i+108]*2, cumMaxD[i+1132]*5)
+		cost = nomnCost - dfltCost
+		# On ties, prefer values closer to zero; they are cheaper to
+		# store in the Private dict.
+		x = i - pad + minw
+		if bestCost is None or cost < bestCost or (cost == bestCost and abs(x) < abs(nominal)):
+			bestCost = cost
+			nominal = x
+
+	# Work back the best default: the width whose glyphs would cost
+	# the most to encode against the chosen nominal.
+	default = max(widths, key=lambda w: (widths[w] * _widthCost(w - nominal), -abs(w), w))
 
 	return default, nominal
 
 
+def _widthCost(value):
+	# Same per-width costs as byteCost().
+	value = abs(value)
+	if value <= 107:
+		return 1
+	elif value <= 1131:
+		return 2
+	return 5
+
+
+# Operators that may carry the glyph width as an extra first argument, mapped
+# to the parity of their argument count without it.
+_widthOps = {
+	'hstem': 0, 'vstem': 0, 'hstemhm': 0, 'vstemhm': 0,
+	'hintmask': 0, 'cntrmask': 0, 'rmoveto': 0, 'endchar': 0,
+	'hmoveto': 1, 'vmoveto': 1,
+}
+
+def _getCharStringWidth(charString):
+	"""Returns a (hasWidth, width) tuple for a T2CharString in program form,
+	or None if the width is not encoded in the charstring itself (eg. it is
+	pushed by a subroutine)."""
+	program = charString.program
+	for i, token in enumerate(program):
+		if isinstance(token, basestring):
+			break
+	else:
+		return None
+	evenOdd = _widthOps.get(token)
+	if evenOdd is None:
+		return None
+	private = charString.private
+	if evenOdd ^ (i % 2):
+		return True, private.nominalWidthX + program[0]
+	return False, private.defaultWidthX
+
+
+def optimizeCharStringWidths(topDict, ignoreWidths=()):
+	"""Recompute defaultWidthX and nominalWidthX of each Private dict of a CFF
+	TopDict, and re-encode the glyph widths in the charstrings accordingly.
+
+	Private dicts are only modified if that makes the font smaller.  The ones
+	with non-integer widths, or whose charstrings get their width from a
+	subroutine, are left alone.  CFF2 fonts have no widths in their charstrings
+	and are not touched.
+
+	Glyphs named in ignoreWidths don't contribute to the choice, and end up
+	with whatever the new default width is."""
+
+	charStrings = topDict.CharStrings
+	groups = {}
+	for glyphName in topDict.charset:
+		charString = charStrings[glyphName]
+		private = charString.private
+		if private is None or private.defaultWidthX is None:
+			# CFF2
+			return
+		glyphs = groups.setdefault(id(private), (private, []))[1]
+		glyphs.append((charString, glyphName in ignoreWidths))
+
+	for private, glyphs in groups.values():
+		widths = []
+		currentCost = 0
+		for charString, ignore in glyphs:
+			charString.decompile()
+			result = _getCharStringWidth(charString)
+			if result is None:
+				break
+			hasWidth, width = result
+			if hasWidth:
+				currentCost += _widthCost(width - private.nominalWidthX)
+			if ignore:
+				widths.append(None)
+				continue
+			if width != int(width):
+				break
+			widths.append(int(width))
+		else:
+			known = [w for w in widths if w is not None]
+			if not known:
+				continue
+			default, nominal = optimizeWidths(known)
+			newCost = byteCost(known, default, nominal)
+			newCost += _dictEntryCost(default) + _dictEntryCost(nominal)
+			if nominal:
+				# A zero nominal width is free to store; on small fonts
+				# that may outweigh the charstring bytes it costs.
+				cost = byteCost(known, default, 0) + _dictEntryCost(default)
+				if cost <= newCost:
+					nominal, newCost = 0, cost
+			currentCost += _dictEntryCost(private.defaultWidthX)
+			currentCost += _dictEntryCost(private.nominalWidthX)
+			if newCost >= currentCost:
+				continue
+
+			for (charString, _), width in zip(glyphs, widths):
+				program = charString.program
+				if _getCharStringWidth(charString)[0]:
+					program = program[1:]
+				if width is not None and width != default:
+					program = [width - nominal] + program
+				charString.setProgram(program)
+			private.defaultWidthX = default
+			private.nominalWidthX = nominal
+
+
+def _dictEntryCost(value):
+	# defaultWidthX and nominalWidthX both default to 0, and are then omitted.
+	if not value:
+		return 0
+	return len(encodeIntCFF(int(value))) + 1
+
+
 if __name__ == '__main__':
 	import sys
 	if len(sys.argv) == 1:
@@ -0,0 +1 @@
+from .cu2qu import *
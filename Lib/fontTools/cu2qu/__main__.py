@@ -0,0 +1,5 @@
+import sys
+from fontTools.cu2qu.convert import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,375 @@
+# Copyright 2015 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Based on cu2qu/ufo.py and cu2qu/cli.py from
+# https://github.com/googlefonts/cu2qu, modified to convert the
+# outlines of binary fonts.
+
+"""Convert the outlines of whole fonts between CFF and TrueType.
+
+otf_to_ttf() replaces the 'CFF ' table with 'glyf' and 'loca', approximating
+every cubic curve with quadratic splines; fonts_otf_to_ttf() does the same for
+a list of interpolatable masters, keeping their outlines compatible.
+ttf_to_otf() goes the other way.
+
+The glyph outlines are first recorded from the font's glyph set, so that the
+curve conversion of chunks of glyphs can run in worker processes.  The tables
+are then assembled in the calling process.
+"""
+
+import logging
+
+from fontTools.misc.cliTools import makeOutputFileName
+from fontTools.pens.basePen import decomposeSuperBezierSegment
+from fontTools.pens.recordingPen import (
+    RecordingPen, DecomposingRecordingPen, replayRecording)
+from fontTools.pens.reverseContourPen import ReverseContourPen
+from fontTools.pens.t2CharStringPen import T2CharStringPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont, newTable
+from .cu2qu import curves_to_quadratic
+from .errors import Error, IncompatibleGlyphsError
+
+
+__all__ = ["otf_to_ttf", "fonts_otf_to_ttf", "ttf_to_otf"]
+
+
+log = logging.getLogger(__name__)
+
+# default approximation error, measured in UPEM
+MAX_ERR = 1.0
+
+# default 'post' table format
+POST_FORMAT = 2.0
+
+# assuming the input contours' direction is correctly set (counter-clockwise
+# for CFF, clockwise for TrueType), we just flip it
+REVERSE_DIRECTION = True
+
+# number of glyphs sent to a worker process at a time
+CHUNK_SIZE = 64
+
+
+def _map_chunks(func, items, args, workers=None, chunk_size=CHUNK_SIZE):
+    """Call func(chunk, *args) on consecutive chunks of items, possibly in
+    worker processes, and return the concatenated results in order."""
+    chunks = [items[i:i+chunk_size] for i in range(0, len(items), chunk_size)]
+    if workers is not None and workers > 1 and len(chunks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                func, chunks, *[[arg] * len(chunks) for arg in args]))
+    else:
+        results = [func(chunk, *args) for chunk in chunks]
+    return [result for chunkResults in results for result in chunkResults]
+
+
+def _record_glyphs(font, decompose=False):
+    glyphSet = font.getGlyphSet()
+    recordings = []
+    for glyphName in font.getGlyphOrder():
+        pen = DecomposingRecordingPen(glyphSet) if decompose else RecordingPen()
+        glyphSet[glyphName].draw(pen)
+        recordings.append(pen.value)
+    return recordings
+
+
+def _glyph_to_quadratic(glyphName, recordings, max_errors):
+    """Convert the curveTo segments of the same glyph from several masters
+    to compatible qCurveTo segments."""
+    for recording in recordings[1:]:
+        if len(recording) != len(recordings[0]):
+            raise IncompatibleGlyphsError(
+                glyphName, "different number of segments")
+
+    results = [[] for _ in recordings]
+    currentPoints = [None] * len(recordings)
+    for segments in zip(*recordings):
+        operator = segments[0][0]
+        if any(op != operator or len(args) != len(segments[0][1])
+               for op, args in segments[1:]):
+            raise IncompatibleGlyphsError(
+                glyphName, "incompatible segment types")
+        if operator == "curveTo":
+            if len(segments[0][1]) == 3:
+                curves = [[args] for _, args in segments]
+            else:
+                curves = [decomposeSuperBezierSegment(args)
+                          for _, args in segments]
+            for pieces in zip(*curves):
+                splines = curves_to_quadratic(
+                    [(start,) + tuple(piece)
+                     for start, piece in zip(currentPoints, pieces)],
+                    max_errors)
+                for result, spline in zip(results, splines):
+                    result.append(("qCurveTo", tuple(spline[1:])))
+                currentPoints = [piece[-1] for piece in pieces]
+            continue
+        for result, segment in zip(results, segments):
+            result.append(segment)
+        if operator in ("moveTo", "lineTo", "qCurveTo"):
+            currentPoints = [args[-1] for _, args in segments]
+    return results
+
+
+def _glyphs_to_quadratic(items, max_errors):
+    # Runs in a worker process; see fonts_otf_to_ttf
+    return [_glyph_to_quadratic(glyphName, recordings, max_errors)
+            for glyphName, recordings in items]
+
+
+def _draw_charstrings(items, reverse_direction):
+    # Runs in a worker process; see ttf_to_otf
+    programs = []
+    for width, recording in items:
+        pen = T2CharStringPen(width, None)
+        replayRecording(
+            recording, ReverseContourPen(pen) if reverse_direction else pen)
+        programs.append(pen.getCharString().program)
+    return programs
+
+
+def _set_glyf(font, recordings, reverse_direction):
+    glyphOrder = font.getGlyphOrder()
+    glyphs = {}
+    for glyphName, recording in zip(glyphOrder, recordings):
+        pen = TTGlyphPen(None)
+        replayRecording(
+            recording, ReverseContourPen(pen) if reverse_direction else pen)
+        glyphs[glyphName] = pen.glyph()
+
+    font["loca"] = newTable("loca")
+    font["glyf"] = glyf = newTable("glyf")
+    glyf.glyphOrder = glyphOrder
+    glyf.glyphs = glyphs
+
+    # the left side bearings of TrueType glyphs must match their xMin
+    hmtx = font["hmtx"].metrics
+    for glyphName in glyphOrder:
+        glyph = glyphs[glyphName]
+        glyph.recalcBounds(glyf)
+        advance, _ = hmtx[glyphName]
+        hmtx[glyphName] = (advance, glyph.xMin if glyph.numberOfContours else 0)
+
+
+def _set_maxp_ttf(font):
+    maxp = font["maxp"]
+    maxp.tableVersion = 0x00010000
+    maxp.maxZones = 1
+    maxp.maxTwilightPoints = 0
+    maxp.maxStorage = 0
+    maxp.maxFunctionDefs = 0
+    maxp.maxInstructionDefs = 0
+    maxp.maxStackElements = 0
+    maxp.maxSizeOfInstructions = 0
+    maxp.recalc(font)
+
+
+def _set_post_format(font, post_format):
+    post = font["post"]
+    post.formatType = post_format
+    if post_format == 2.0:
+        post.extraNames = []
+        post.mapping = {}
+        post.glyphOrder = font.getGlyphOrder()
+        try:
+            post.compile(font)
+        except OverflowError:
+            post.formatType = 3.0
+            log.warning(
+                "Dropping glyph names, they do not fit in 'post' table.")
+
+
+def fonts_otf_to_ttf(fonts, max_err=MAX_ERR, reverse_direction=REVERSE_DIRECTION,
+                     post_format=POST_FORMAT, workers=None):
+    """Convert the CFF outlines of interpolatable masters to TrueType.
+
+    The quadratic splines are the same for all fonts, so the converted
+    fonts stay interpolatable.  'max_err' is the maximum approximation error
+    in font units, either a number or a list with one value per font.
+
+    If 'workers' is greater than 1, the curves are converted in that many
+    worker processes.
+
+    Raises IncompatibleGlyphsError if the masters are not compatible.
+    """
+    for font in fonts:
+        if "CFF " not in font:
+            raise Error("font has no 'CFF ' table")
+    glyphOrder = fonts[0].getGlyphOrder()
+    for font in fonts[1:]:
+        if font.getGlyphOrder() != glyphOrder:
+            raise Error("fonts have different glyph orders")
+    if isinstance(max_err, (int, float)):
+        max_errors = [max_err] * len(fonts)
+    else:
+        max_errors = list(max_err)
+        assert len(max_errors) == len(fonts)
+
+    recordings = [_record_glyphs(font) for font in fonts]
+    items = list(zip(glyphOrder, zip(*recordings)))
+    converted = _map_chunks(
+        _glyphs_to_quadratic, items, (max_errors,), workers=workers)
+
+    for i, font in enumerate(fonts):
+        _set_glyf(font, [glyph[i] for glyph in converted], reverse_direction)
+        del font["CFF "]
+        if "VORG" in font:
+            del font["VORG"]
+        font["head"].glyphDataFormat = 0
+        _set_maxp_ttf(font)
+        _set_post_format(font, post_format)
+        font.sfntVersion = "\000\001\000\000"
+
+
+def otf_to_ttf(font, max_err=MAX_ERR, reverse_direction=REVERSE_DIRECTION,
+               post_format=POST_FORMAT, workers=None):
+    """Convert the CFF outlines of a font to TrueType, in place.
+
+    See fonts_otf_to_ttf() for the arguments.
+    """
+    fonts_otf_to_ttf([font], max_err=max_err,
+                     reverse_direction=reverse_direction,
+                     post_format=post_format, workers=workers)
+
+
+def ttf_to_otf(font, reverse_direction=REVERSE_DIRECTION, post_format=3.0,
+               workers=None):
+    """Convert the TrueType outlines of a font to CFF, in place.
+
+    Composite glyphs are decomposed and instructions are dropped.
+    Variable fonts are not supported.
+
+    If 'workers' is greater than 1, the charstrings are drawn in that many
+    worker processes.
+    """
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.misc.psCharStrings import T2CharString
+
+    if "glyf" not in font:
+        raise Error("font has no 'glyf' table")
+    if "gvar" in font:
+        raise Error("converting variable TrueType fonts is not supported")
+
+    glyphOrder = font.getGlyphOrder()
+    hmtx = font["hmtx"].metrics
+    items = [(hmtx[glyphName][0], recording) for glyphName, recording in
+             zip(glyphOrder, _record_glyphs(font, decompose=True))]
+    programs = _map_chunks(
+        _draw_charstrings, items, (reverse_direction,), workers=workers)
+    charStrings = {glyphName: T2CharString(program=program)
+                   for glyphName, program in zip(glyphOrder, programs)}
+
+    for tag in ("glyf", "loca", "fpgm", "prep", "cvt ", "hdmx", "LTSH"):
+        if tag in font:
+            del font[tag]
+
+    name = font["name"]
+    psName = name.getDebugName(6) or "Untitled"
+    fontInfo = {}
+    for key, nameID in (("FullName", 4), ("FamilyName", 1), ("Weight", 2)):
+        value = name.getDebugName(nameID)
+        if value is not None:
+            fontInfo[key] = value
+    FontBuilder(font=font).setupCFF(psName, fontInfo, charStrings, {})
+
+    maxp = font["maxp"]
+    maxp.tableVersion = 0x00005000
+    for attr in list(vars(maxp)):
+        if attr.startswith("max"):
+            delattr(maxp, attr)
+    font["post"].formatType = post_format
+
+
+def main(args=None):
+    """Convert the outlines of OpenType fonts between CFF and TrueType"""
+    import argparse
+    import os
+    from fontTools import configLogger
+
+    parser = argparse.ArgumentParser(
+        "fonttools cu2qu", description=main.__doc__)
+    parser.add_argument("input", nargs='+', metavar="INPUT")
+    parser.add_argument(
+        "-o", "--output",
+        help="output file, or output directory when converting several fonts")
+    parser.add_argument(
+        "-e", "--max-error", type=float, default=MAX_ERR,
+        help="maximum approximation error in font units "
+             "(default: %(default)s)")
+    parser.add_argument(
+        "--post-format", type=float, default=None,
+        help="'post' table format of the output (default: 2 for TrueType, "
+             "3 for CFF)")
+    parser.add_argument(
+        "--keep-direction", dest="reverse_direction", action="store_false",
+        help="do not reverse the contours' direction")
+    parser.add_argument(
+        "--interpolatable", action="store_true",
+        help="convert CFF fonts as compatible masters of a variable font")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None,
+        help="number of worker processes")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    options = parser.parse_args(args)
+
+    if options.output and len(options.input) > 1:
+        if not os.path.isdir(options.output):
+            parser.error("-o/--output option must be a directory when "
+                         "processing multiple fonts")
+
+    configLogger(level="INFO" if options.verbose else "WARNING")
+
+    fonts = [TTFont(path) for path in options.input]
+    outputs = []
+    for path, font in zip(options.input, fonts):
+        toTrueType = "CFF " in font
+        if not toTrueType and "glyf" not in font:
+            parser.error("%s has neither 'CFF ' nor 'glyf' table" % path)
+        if options.output and not os.path.isdir(options.output):
+            output = options.output
+        else:
+            output = makeOutputFileName(
+                path, outputDir=options.output,
+                extension=".ttf" if toTrueType else ".otf")
+        outputs.append((output, toTrueType))
+
+    if options.interpolatable:
+        if not all(toTrueType for _, toTrueType in outputs):
+            parser.error("--interpolatable requires CFF input fonts")
+        log.info("Converting %d masters to TrueType", len(fonts))
+        fonts_otf_to_ttf(
+            fonts, max_err=options.max_error,
+            reverse_direction=options.reverse_direction,
+            post_format=options.post_format or POST_FORMAT,
+            workers=options.jobs)
+    else:
+        for path, font, (_, toTrueType) in zip(options.input, fonts, outputs):
+            log.info("Converting %s", path)
+            if toTrueType:
+                otf_to_ttf(
+                    font, max_err=options.max_error,
+                    reverse_direction=options.reverse_direction,
+                    post_format=options.post_format or POST_FORMAT,
+                    workers=options.jobs)
+            else:
+                ttf_to_otf(
+                    font, reverse_direction=options.reverse_direction,
+                    post_format=options.post_format or 3.0,
+                    workers=options.jobs)
+
+    for font, (output, _) in zip(fonts, outputs):
+        log.info("Saving %s", output)
+        font.save(output)
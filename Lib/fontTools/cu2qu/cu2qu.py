@@ -0,0 +1,297 @@
+# Copyright 2015 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Based on cu2qu/cu2qu.py from https://github.com/googlefonts/cu2qu,
+# modified for fontTools.
+
+"""Approximate cubic Bezier curves with splines of quadratic curves.
+
+The approximation works on complex numbers, one cubic at a time: a cubic is
+split into n equal-parameter pieces, each piece is replaced by the quadratic
+whose control point lies at the intersection of the piece's tangents, and n
+is increased until all quadratics stay within the requested maximum error of
+the original curve.
+"""
+
+import math
+
+from .errors import ApproxNotFoundError
+
+
+__all__ = ['curve_to_quadratic', 'curves_to_quadratic']
+
+MAX_N = 100
+
+NAN = float("NaN")
+
+
+def dot(v1, v2):
+    """Return the dot product of two vectors."""
+    return (v1 * v2.conjugate()).real
+
+
+def calc_cubic_points(a, b, c, d):
+    _1 = d
+    _2 = (c / 3.0) + d
+    _3 = (b + c) / 3.0 + _2
+    _4 = a + d + c + b
+    return _1, _2, _3, _4
+
+
+def calc_cubic_parameters(p0, p1, p2, p3):
+    c = (p1 - p0) * 3.0
+    b = (p2 - p1) * 3.0 - c
+    d = p0
+    a = p3 - d - c - b
+    return a, b, c, d
+
+
+def split_cubic_into_n_iter(p0, p1, p2, p3, n):
+    """Split a cubic Bezier into n equal parts.
+
+    Returns an iterator over the parts, each one a tuple of four points.
+    """
+    # Hand-coded special-cases
+    if n == 2:
+        return iter(split_cubic_into_two(p0, p1, p2, p3))
+    if n == 3:
+        return iter(split_cubic_into_three(p0, p1, p2, p3))
+    if n == 4:
+        a, b = split_cubic_into_two(p0, p1, p2, p3)
+        return iter(split_cubic_into_two(*a) + split_cubic_into_two(*b))
+    if n == 6:
+        a, b = split_cubic_into_two(p0, p1, p2, p3)
+        return iter(split_cubic_into_three(*a) + split_cubic_into_three(*b))
+
+    return _split_cubic_into_n_gen(p0, p1, p2, p3, n)
+
+
+def _split_cubic_into_n_gen(p0, p1, p2, p3, n):
+    a, b, c, d = calc_cubic_parameters(p0, p1, p2, p3)
+    dt = 1 / n
+    delta_2 = dt * dt
+    delta_3 = dt * delta_2
+    for i in range(n):
+        t1 = i * dt
+        t1_2 = t1 * t1
+        # calc new a, b, c and d
+        a1 = a * delta_3
+        b1 = (3 * a * t1 + b) * delta_2
+        c1 = (2 * b * t1 + c + 3 * a * t1_2) * dt
+        d1 = a * t1 * t1_2 + b * t1_2 + c * t1 + d
+        yield calc_cubic_points(a1, b1, c1, d1)
+
+
+def split_cubic_into_two(p0, p1, p2, p3):
+    """Split a cubic Bezier into two equal parts, at t = 0.5."""
+    mid = (p0 + 3 * (p1 + p2) + p3) * .125
+    deriv3 = (p3 + p2 - p1 - p0) * .125
+    return ((p0, (p0 + p1) * .5, mid - deriv3, mid),
+            (mid, mid + deriv3, (p2 + p3) * .5, p3))
+
+
+def split_cubic_into_three(p0, p1, p2, p3, _27=1 / 27):
+    """Split a cubic Bezier into three equal parts, at t = 1/3 and 2/3."""
+    mid1 = (8 * p0 + 12 * p1 + 6 * p2 + p3) * _27
+    deriv1 = (p3 + 3 * p2 - 4 * p0) * _27
+    mid2 = (p0 + 6 * p1 + 12 * p2 + 8 * p3) * _27
+    deriv2 = (4 * p3 - 3 * p1 - p0) * _27
+    return ((p0, (2 * p0 + p1) / 3.0, mid1 - deriv1, mid1),
+            (mid1, mid1 + deriv1, mid2 - deriv2, mid2),
+            (mid2, mid2 + deriv2, (p2 + 2 * p3) / 3.0, p3))
+
+
+def cubic_approx_control(t, p0, p1, p2, p3):
+    """Approximate a cubic Bezier using a quadratic one.
+
+    Returns the control point of the quadratic, as found by interpolating
+    between the two quadratic control points implied by the cubic's tangents
+    at its end points.
+    """
+    _p1 = p0 + (p1 - p0) * 1.5
+    _p2 = p3 + (p2 - p3) * 1.5
+    return _p1 + (_p2 - _p1) * t
+
+
+def calc_intersect(a, b, c, d):
+    """Return the intersection of the lines (a, b) and (c, d), or complex
+    NaN if they are parallel."""
+    ab = b - a
+    cd = d - c
+    p = ab * 1j
+    try:
+        h = dot(p, a - c) / dot(p, cd)
+    except ZeroDivisionError:
+        return complex(NAN, NAN)
+    return c + cd * h
+
+
+def cubic_farthest_fit_inside(p0, p1, p2, p3, tolerance):
+    """Check if a cubic Bezier lies within a given distance of the origin.
+
+    "Origin" means *the* origin (0,0), not the start of the curve.  The curve
+    is the difference of two curves (original minus approximation), so this
+    checks the distance between them.
+    """
+    # First check p2 then p1, as p2 has higher error early on.
+    if abs(p2) <= tolerance and abs(p1) <= tolerance:
+        return True
+
+    # Split.
+    mid = (p0 + 3 * (p1 + p2) + p3) * .125
+    if abs(mid) > tolerance:
+        return False
+    deriv3 = (p3 + p2 - p1 - p0) * .125
+    return (cubic_farthest_fit_inside(p0, (p0 + p1) * .5, mid - deriv3, mid, tolerance) and
+            cubic_farthest_fit_inside(mid, mid + deriv3, (p2 + p3) * .5, p3, tolerance))
+
+
+def cubic_approx_quadratic(cubic, tolerance):
+    """Approximate a cubic Bezier with a single quadratic within tolerance.
+
+    Returns the three points of the quadratic, or None if no approximation
+    was found.
+    """
+    q1 = calc_intersect(*cubic)
+    if math.isnan(q1.imag):
+        return None
+    c0 = cubic[0]
+    c3 = cubic[3]
+    c1 = c0 + (q1 - c0) * (2 / 3)
+    c2 = c3 + (q1 - c3) * (2 / 3)
+    if not cubic_farthest_fit_inside(0, c1 - cubic[1], c2 - cubic[2], 0, tolerance):
+        return None
+    return c0, q1, c3
+
+
+def cubic_approx_spline(cubic, n, tolerance):
+    """Approximate a cubic Bezier with a spline of n quadratics.
+
+    Returns the points of the spline (on-curve end points and n off-curve
+    points in between), or None if no approximation was found within
+    tolerance.
+    """
+    if n == 1:
+        return cubic_approx_quadratic(cubic, tolerance)
+
+    cubics = split_cubic_into_n_iter(cubic[0], cubic[1], cubic[2], cubic[3], n)
+
+    # calculate the spline of quadratics and check errors at the same time.
+    next_cubic = next(cubics)
+    next_q1 = cubic_approx_control(0, *next_cubic)
+    q2 = cubic[0]
+    d1 = 0j
+    spline = [cubic[0], next_q1]
+    for i in range(1, n + 1):
+        # Current cubic to convert
+        c0, c1, c2, c3 = next_cubic
+
+        # Current quadratic approximation of current cubic
+        q0 = q2
+        q1 = next_q1
+        if i < n:
+            next_cubic = next(cubics)
+            next_q1 = cubic_approx_control(i / (n - 1), *next_cubic)
+            spline.append(next_q1)
+            q2 = (q1 + next_q1) * .5
+        else:
+            q2 = c3
+
+        # End-point deltas
+        d0 = d1
+        d1 = q2 - c3
+
+        if (abs(d1) > tolerance or
+                not cubic_farthest_fit_inside(d0,
+                                              q0 + (q1 - q0) * (2 / 3) - c1,
+                                              q2 + (q1 - q2) * (2 / 3) - c2,
+                                              d1,
+                                              tolerance)):
+            return None
+    spline.append(cubic[3])
+
+    return spline
+
+
+def curve_to_quadratic(curve, max_err):
+    """Approximate a cubic Bezier curve with a spline of n quadratics.
+
+    Args:
+        curve: A sequence of four (x, y) points, the cubic Bezier curve.
+        max_err: The maximum distance allowed between the curve and its
+            approximation.
+
+    Returns:
+        A list of (x, y) points: the start point, the off-curve points of
+        the spline, and the end point.
+
+    Raises:
+        ApproxNotFoundError: if no approximation is found with up to MAX_N
+            quadratic segments.
+
+    >>> curve_to_quadratic([(0, 0), (0, 30), (30, 50), (90, 60)], 1)
+    [(0.0, 0.0), (0.0, 45.0), (90.0, 60.0)]
+    """
+    curve = [complex(*p) for p in curve]
+
+    for n in range(1, MAX_N + 1):
+        spline = cubic_approx_spline(curve, n, max_err)
+        if spline is not None:
+            return [(s.real, s.imag) for s in spline]
+
+    raise ApproxNotFoundError(curve)
+
+
+def curves_to_quadratic(curves, max_errors):
+    """Approximate several cubic Bezier curves with compatible splines.
+
+    All the returned splines have the same number of points, so this can be
+    used to convert the same segment of several masters of an interpolatable
+    font.
+
+    Args:
+        curves: A sequence of cubic Bezier curves, each a sequence of four
+            (x, y) points.
+        max_errors: A sequence of maximum errors, one for each curve.
+
+    Returns:
+        A list of splines, in the same format as returned by
+        curve_to_quadratic().
+
+    Raises:
+        ApproxNotFoundError: if no set of compatible approximations is found
+            with up to MAX_N quadratic segments.
+    """
+    curves = [[complex(*p) for p in curve] for curve in curves]
+    assert len(max_errors) == len(curves)
+
+    l = len(curves)
+    splines = [None] * l
+    last_i = i = 0
+    n = 1
+    while True:
+        spline = cubic_approx_spline(curves[i], n, max_errors[i])
+        if spline is None:
+            if n == MAX_N:
+                break
+            n += 1
+            last_i = i
+            continue
+        splines[i] = spline
+        i = (i + 1) % l
+        if i == last_i:
+            # done. go home
+            return [[(s.real, s.imag) for s in spline] for spline in splines]
+
+    raise ApproxNotFoundError(curves)
@@ -500,6 +500,7 @@ class FontBuilder(object):
     def setupCFF(self, psName, fontInfo, charStringsDict, privateDict):
         from .cffLib import CFFFontSet, TopDictIndex, TopDict, CharStrings, \
                 GlobalSubrsIndex, PrivateDict
+        from .cffLib.width import optimizeCharStringWidths
 
         assert not self.isTTF
         self.font.sfntVersion = "OTTO"
@@ -534,6 +535,7 @@ class FontBuilder(object):
             charString.globalSubrs = globalSubrs
             charStrings[glyphName] = charString
         topDict.CharStrings = charStrings
+        optimizeCharStringWidths(topDict)
 
         fontSet.topDictIndex.append(topDict)
 
@@ -0,0 +1,91 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Based on cu2qu/pens.py from https://github.com/googlefonts/cu2qu,
+# modified for fontTools.
+
+from fontTools.misc.py23 import *
+from fontTools.cu2qu import curve_to_quadratic
+from fontTools.pens.basePen import decomposeSuperBezierSegment
+from fontTools.pens.filterPen import FilterPen
+from fontTools.pens.reverseContourPen import ReverseContourPen
+
+
+__all__ = ["Cu2QuPen"]
+
+
+class Cu2QuPen(FilterPen):
+    """ A filter pen to convert cubic bezier curves to quadratic b-splines
+    using the FontTools SegmentPen protocol.
+
+    other_pen: another SegmentPen used to draw the transformed outline.
+    max_err: maximum approximation error in font units.
+    reverse_direction: flip the contours' direction but keep starting point.
+    stats: a dictionary counting the point numbers of quadratic segments.
+
+    >>> from fontTools.pens.recordingPen import RecordingPen
+    >>> rec = RecordingPen()
+    >>> pen = Cu2QuPen(rec, max_err=1.0)
+    >>> pen.moveTo((0, 0))
+    >>> pen.curveTo((0, 100), (100, 100), (100, 0))
+    >>> pen.closePath()
+    >>> rec.value[1]
+    ('qCurveTo', ((0.0, 37.5), (30.208333333333332, 75.0), (69.79166666666667, 75.0), (100.0, 37.5), (100.0, 0.0)))
+    """
+
+    def __init__(self, other_pen, max_err, reverse_direction=False,
+                 stats=None):
+        if reverse_direction:
+            other_pen = ReverseContourPen(other_pen)
+        super(Cu2QuPen, self).__init__(other_pen)
+        self.max_err = max_err
+        self.stats = stats
+        self.current_pt = None
+
+    def moveTo(self, pt):
+        self.current_pt = pt
+        self._outPen.moveTo(pt)
+
+    def lineTo(self, pt):
+        self.current_pt = pt
+        self._outPen.lineTo(pt)
+
+    def qCurveTo(self, *points):
+        self.current_pt = points[-1]
+        self._outPen.qCurveTo(*points)
+
+    def curveTo(self, *points):
+        n = len(points)
+        if n == 3:
+            self._curve_to_quadratic(self.current_pt, *points)
+        elif n > 3:
+            for segment in decomposeSuperBezierSegment(points):
+                self._curve_to_quadratic(self.current_pt, *segment)
+        else:
+            self.qCurveTo(*points)
+
+    def _curve_to_quadratic(self, pt0, pt1, pt2, pt3):
+        quadratic = curve_to_quadratic((pt0, pt1, pt2, pt3), self.max_err)
+        if self.stats is not None:
+            n = str(len(quadratic) - 2)
+            self.stats[n] = self.stats.get(n, 0) + 1
+        self.qCurveTo(*quadratic[1:])
+
+    def closePath(self):
+        self.current_pt = None
+        self._outPen.closePath()
+
+    def endPath(self):
+        self.current_pt = None
+        self._outPen.endPath()
@@ -2092,14 +2092,13 @@ def remapComponentsFast(self, glyphidmap):
 
 @_add_method(ttLib.getTableClass('glyf'))
 def closure_glyphs(self, s):
-	glyphSet = self.glyphs
 	decompose = s.glyphs
 	while decompose:
 		components = set()
 		for g in decompose:
-			if g not in glyphSet:
+			if g not in self:
 				continue
-			gl = glyphSet[g]
+			gl = self._getGlyph(g)
 			for c in gl.getComponentNames(self):
 				components.add(c)
 		components -= s.glyphs
@@ -2117,7 +2116,8 @@ def prune_pre_subset(self, font, options):
 
 @_add_method(ttLib.getTableClass('glyf'))
 def subset_glyphs(self, s):
-	self.glyphs = _dict_subset(self.glyphs, s.glyphs)
+	# don't make Glyph objects for the glyphs that are dropped
+	self.glyphs = {g:self._getGlyph(g) for g in s.glyphs}
 	if not s.options.retain_gids:
 		indices = [i for i,g in enumerate(self.glyphOrder) if g in s.glyphs]
 		glyphmap = {o:n for n,o in enumerate(indices)}
@@ -1,5 +1,6 @@
 from fontTools.misc import psCharStrings
 from fontTools import ttLib
+from fontTools.cffLib.width import optimizeCharStringWidths
 from fontTools.pens.basePen import NullPen
 from fontTools.misc.fixedTools import otRound
 from fontTools.varLib.varStore import VarStoreInstancer
@@ -153,6 +154,9 @@ def subset_glyphs(self, s):
 			for g in s.glyphs_emptied:
 				_empty_charstring(font, g, isCFF2=isCFF2, ignoreWidth=True)
 
+		# Re-encode glyph widths against the best default/nominal widths
+		if cff.major == 1:
+			optimizeCharStringWidths(font, ignoreWidths=s.glyphs_emptied)
 
 	return True # any(cff[fontname].numGlyphs for fontname in cff.keys())
 
@@ -249,8 +253,14 @@ class _DehintingT2Decompiler(psCharStrings.T2WidthExtractor):
 			self.deletions = []
 		pass
 
-	def __init__(self, css, localSubrs, globalSubrs, nominalWidthX, defaultWidthX, private=None):
+	def __init__(self, css, localSubrs, globalSubrs, nominalWidthX, defaultWidthX, private=None, subrStates=None):
 		self._css = css
+		# Maps (subr, hint state on entry) to the hint state on return, for
+		# the calls that neither take arguments from nor leave results on
+		# the operand stack, made once the glyph width is known.  The hint
+		# facts of a subroutine don't depend on the caller, so such a call
+		# doesn't need running again with the same hint state.
+		self._subrStates = subrStates
 		psCharStrings.T2WidthExtractor.__init__(
 			self, localSubrs, globalSubrs, nominalWidthX, defaultWidthX)
 		self.private = private
@@ -281,14 +291,30 @@ class _DehintingT2Decompiler(psCharStrings.T2WidthExtractor):
 
 	def op_callsubr(self, index):
 		subr = self.localSubrs[self.operandStack[-1]+self.localBias]
-		psCharStrings.T2WidthExtractor.op_callsubr(self, index)
+		self.executeSubr(subr, psCharStrings.T2WidthExtractor.op_callsubr, index)
 		self.processSubr(index, subr)
 
 	def op_callgsubr(self, index):
 		subr = self.globalSubrs[self.operandStack[-1]+self.globalBias]
-		psCharStrings.T2WidthExtractor.op_callgsubr(self, index)
+		self.executeSubr(subr, psCharStrings.T2WidthExtractor.op_callgsubr, index)
 		self.processSubr(index, subr)
 
+	def executeSubr(self, subr, callSubr, index):
+		subrStates = self._subrStates
+		if subrStates is None or not self.gotWidth or len(self.operandStack) != 1:
+			callSubr(self, index)
+			return
+		# global subroutines may call local ones
+		key = (subr, id(self.localSubrs), self.hintCount, self.hintMaskBytes)
+		state = subrStates.get(key)
+		if state is not None:
+			self.pop()
+			self.hintCount, self.hintMaskBytes = state
+			return
+		callSubr(self, index)
+		if not self.operandStack:
+			subrStates[key] = (self.hintCount, self.hintMaskBytes)
+
 	def op_hstem(self, index):
 		psCharStrings.T2WidthExtractor.op_hstem(self, index)
 		self.processHint(index)
@@ -367,6 +393,48 @@ class StopHintCountEvent(Exception):
 	pass
 
 
+def _static_subr_usage(font):
+	"""Walks the subroutine call graph of all glyphs of a CFF font, visiting
+	each subroutine once per local Subrs index it is called with.
+
+	Returns a dictionary mapping id() of each SubrsIndex to the set of its
+	used (biased) subroutine indices.  Returns None if some subroutine index
+	is not a literal in the calling charstring, or if some subroutine wasn't
+	decompiled along with the glyphs calling it; in that case the glyphs need
+	to be executed to find out."""
+	cs = font.CharStrings
+	globalSubrs = font.GlobalSubrs
+	biases = {}
+	used = {}
+	seen = set()
+	stack = []
+	for g in font.charset:
+		c, _ = cs.getItemAndSelector(g)
+		c.decompile()
+		stack.append((c, getattr(c.private, "Subrs", [])))
+	while stack:
+		c, localSubrs = stack.pop()
+		if c.needsDecompilation():
+			# a subroutine no glyph decompilation has run
+			return None
+		program = c.program
+		for i, token in enumerate(program):
+			if token != 'callsubr' and token != 'callgsubr':
+				continue
+			if not i or type(program[i-1]) != int:
+				return None
+			subrs = globalSubrs if token == 'callgsubr' else localSubrs
+			if id(subrs) not in biases:
+				biases[id(subrs)] = psCharStrings.calcSubrBias(subrs)
+			index = program[i-1] + biases[id(subrs)]
+			used.setdefault(id(subrs), set()).add(index)
+			key = (id(subrs), index, id(localSubrs) if localSubrs else None)
+			if key not in seen:
+				seen.add(key)
+				stack.append((subrs[index], localSubrs))
+	return used
+
+
 
 
 class _DesubroutinizingT2Decompiler(psCharStrings.SimpleT2Decompiler):
@@ -531,7 +599,11 @@ def remove_hints(self):
 		#    will act as an implicit vstemhm. As such, we track whether
 		#    we have seen any non-hint operators so far and do the right
 		#    thing, recursively... Good luck understanding that :(
+		# - The hint facts of a subroutine don't depend on the caller, so
+		#   a subroutine called without arguments is only run once for
+		#   each hint count it is called with.
 		css = set()
+		subrStates = {}
 		for g in font.charset:
 			c, _ = cs.getItemAndSelector(g)
 			c.decompile()
@@ -539,12 +611,13 @@ def remove_hints(self):
 			decompiler = _DehintingT2Decompiler(css, subrs, c.globalSubrs,
 								c.private.nominalWidthX,
 								c.private.defaultWidthX,
-								c.private)
+								c.private,
+								subrStates=subrStates)
 			decompiler.execute(c)
 			c.width = decompiler.width
 		for charstring in css:
 			charstring.drop_hints()
-		del css
+		del css, subrStates
 
 		# Drop font-wide hinting values
 		all_privs = []
@@ -571,20 +644,23 @@ def remove_unused_subroutines(self):
 		cs = font.CharStrings
 		# Renumber subroutines to remove unused ones
 
-		# Mark all used subroutines
-		for g in font.charset:
-			c, _ = cs.getItemAndSelector(g)
-			subrs = getattr(c.private, "Subrs", [])
-			decompiler = _MarkingT2Decompiler(subrs, c.globalSubrs, c.private)
-			decompiler.execute(c)
-
 		all_subrs = [font.GlobalSubrs]
 		if hasattr(font, 'FDArray'):
 			all_subrs.extend(fd.Private.Subrs for fd in font.FDArray if hasattr(fd.Private, 'Subrs') and fd.Private.Subrs)
 		elif hasattr(font.Private, 'Subrs') and font.Private.Subrs:
 			all_subrs.append(font.Private.Subrs)
 
-		subrs = set(subrs) # Remove duplicates
+		# Mark all used subroutines
+		used = _static_subr_usage(font)
+		if used is not None:
+			for subrs in all_subrs:
+				subrs._used = used.get(id(subrs), set())
+		else:
+			for g in font.charset:
+				c, _ = cs.getItemAndSelector(g)
+				subrs = getattr(c.private, "Subrs", [])
+				decompiler = _MarkingT2Decompiler(subrs, c.globalSubrs, c.private)
+				decompiler.execute(c)
 
 		# Prepare
 		for subrs in all_subrs:
@@ -0,0 +1,193 @@
+"""ttLib/fontCache.py -- on-disk cache of data derived from font files.
+
+Defines the FontCache class. Opening a font through a FontCache sets its
+glyph order and 'loca' offsets from the cache, so that the 'post', 'cmap'
+and 'loca' tables aren't decompiled to build them, which is most of the time
+spent opening a font by tools that only need a few tables. The fonts save
+the same data as fonts opened with TTFont():
+
+	cache = FontCache(os.path.expanduser("~/.cache/fonttools"))
+	font = cache.openFont(path)
+
+Entries are keyed by the real path, modification time, size and font number
+of the file, and checked against a hash of the font's table directory. They
+are stored in a compact fixed-layout binary format, one file per font, and
+the least recently used entries are removed when the cache grows larger than
+'maxSize' bytes.
+"""
+
+from fontTools.misc.py23 import *
+from fontTools.misc import sstruct
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.fontSeed import (
+	getLocaOffsets, packSeed, seedFont, unpackSeed)
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+
+
+log = logging.getLogger(__name__)
+
+
+fontCacheHeaderFormat = """
+		> # big endian
+		magic:             4s   # "ftFC"
+		version:           H    # 1
+		reserved:          H    # 0
+		fingerprint:       32s  # sha256 of the table directory
+"""
+
+fontCacheHeaderSize = sstruct.calcsize(fontCacheHeaderFormat)
+
+# the glyph order and 'loca' offsets, packed by fontTools.ttLib.fontSeed,
+# follow the header
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+_entryExtension = ".fontcache"
+
+
+class FontCache(object):
+
+	def __init__(self, directory, maxSize=DEFAULT_MAX_SIZE):
+		"""'directory' is created if it doesn't exist."""
+		self.directory = directory
+		self.maxSize = maxSize
+		if not os.path.isdir(directory):
+			os.makedirs(directory)
+
+	def openFont(self, path, fontNumber=-1, **kwargs):
+		"""Return TTFont(path, fontNumber=fontNumber, **kwargs), with the glyph
+		order and 'loca' offsets read from the cache, or stored in the cache
+		if they weren't in it yet."""
+		path = os.path.realpath(path)
+		font = TTFont(path, fontNumber=fontNumber, **kwargs)
+		entryPath = self._getEntryPath(path, fontNumber)
+		fingerprint = _directoryFingerprint(font.reader)
+		entry = self._readEntry(entryPath, fingerprint)
+		if entry is not None:
+			seedFont(font, *entry)
+			return font
+
+		glyphOrder = font.getGlyphOrder()
+		locations = None
+		reader = font.reader
+		if "loca" in reader and "glyf" in reader and "head" in reader:
+			# from the raw data, without loading 'loca' in the font
+			locations = getLocaOffsets(reader["loca"], reader["head"])
+		self._writeEntry(entryPath, fingerprint, glyphOrder, locations)
+		self._prune()
+		seedFont(font, glyphOrder, locations)
+		return font
+
+	def clear(self):
+		"""Remove all the entries of the cache."""
+		for entryPath, _, _ in self._getEntries():
+			_removeFile(entryPath)
+
+	def _getEntryPath(self, path, fontNumber):
+		stat = os.stat(path)
+		key = "%s\0%d\0%d\0%d" % (
+			path, stat.st_mtime_ns, stat.st_size, fontNumber)
+		digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+		return os.path.join(self.directory, digest + _entryExtension)
+
+	def _readEntry(self, entryPath, fingerprint):
+		"""Return (glyphOrder, locations) from the entry at 'entryPath', or
+		None if there isn't a valid one. 'locations' is None for fonts
+		without 'loca' table."""
+		try:
+			with open(entryPath, "rb") as f:
+				data = f.read()
+		except (IOError, OSError):
+			return None
+		try:
+			header = sstruct.unpack(fontCacheHeaderFormat,
+				data[:fontCacheHeaderSize])
+			if Tag(header["magic"]) != "ftFC" or header["version"] != 1:
+				raise ValueError("bad header")
+			if tobytes(header["fingerprint"]) != fingerprint:
+				raise ValueError("stale entry")
+			glyphOrder, locations = unpackSeed(data[fontCacheHeaderSize:])
+		except (struct.error, UnicodeDecodeError, ValueError) as e:
+			log.debug("Ignoring font cache entry %s: %s", entryPath, e)
+			_removeFile(entryPath)
+			return None
+		# the entries' modification times are their last use, for _prune()
+		try:
+			os.utime(entryPath, None)
+		except OSError:
+			pass
+		log.debug("Read glyph order from font cache entry %s", entryPath)
+		return glyphOrder, locations
+
+	def _writeEntry(self, entryPath, fingerprint, glyphOrder, locations):
+		header = {
+			"magic": b"ftFC",
+			"version": 1,
+			"reserved": 0,
+			"fingerprint": fingerprint,
+		}
+		data = [
+			sstruct.pack(fontCacheHeaderFormat, header),
+			packSeed(glyphOrder, locations),
+		]
+		# write to a temporary file first, so that other processes never see
+		# a partial entry
+		fd, tmpPath = tempfile.mkstemp(
+			suffix=".tmp", dir=self.directory)
+		try:
+			with os.fdopen(fd, "wb") as f:
+				f.write(b"".join(data))
+			os.replace(tmpPath, entryPath)
+		except OSError as e:
+			log.debug("Could not write font cache entry %s: %s", entryPath, e)
+			_removeFile(tmpPath)
+
+	def _getEntries(self):
+		"""Return a list of (path, size, mtime) tuples for all the entries."""
+		entries = []
+		for fileName in os.listdir(self.directory):
+			if not fileName.endswith(_entryExtension):
+				continue
+			entryPath = os.path.join(self.directory, fileName)
+			try:
+				stat = os.stat(entryPath)
+			except OSError:
+				continue
+			entries.append((entryPath, stat.st_size, stat.st_mtime))
+		return entries
+
+	def _prune(self):
+		"""Remove the least recently used entries until the cache is no larger
+		than self.maxSize."""
+		entries = self._getEntries()
+		totalSize = sum(size for _, size, _ in entries)
+		if totalSize <= self.maxSize:
+			return
+		entries.sort(key=lambda entry: entry[2])
+		for entryPath, size, _ in entries:
+			if totalSize <= self.maxSize:
+				break
+			_removeFile(entryPath)
+			totalSize -= size
+
+
+def _directoryFingerprint(reader):
+	"""Return the sha256 digest of the table directory of 'reader'."""
+	h = hashlib.sha256(tobytes(reader.sfntVersion))
+	for tag, entry in sorted(reader.tables.items()):
+		h.update(tobytes(tag))
+		# WOFF2 directory entries have no checksum
+		h.update(struct.pack(">LLL", getattr(entry, "checkSum", 0),
+			entry.offset, entry.length))
+	return h.digest()
+
+
+def _removeFile(path):
+	try:
+		os.remove(path)
+	except OSError:
+		pass
@@ -0,0 +1,123 @@
+"""ttLib/fontSeed.py -- pack the glyph order and 'loca' offsets of a font.
+
+Helpers for the modules which keep the glyph order and the 'loca' offsets of
+a font elsewhere, so that opening the font again doesn't need to decompile
+the 'post', 'cmap' and 'loca' tables to rebuild them: fontTools.ttLib.sharedFont
+and fontTools.ttLib.fontCache.
+
+packSeed() returns the glyph order and 'loca' offsets in a compact fixed-layout
+binary format, unpackSeed() reads them back, and seedFont() sets them on a
+TTFont reading the same font data.
+"""
+
+from fontTools.misc.py23 import *
+from fontTools.misc import sstruct
+from fontTools.ttLib import getTableClass
+import array
+import struct
+import sys
+
+
+fontSeedHeaderFormat = """
+		> # big endian
+		numGlyphs:         L    # number of glyph names
+		glyphNamesLength:  L    # length in bytes of the glyph names
+		locaLength:        L    # number of 'loca' offsets, or 0
+"""
+
+fontSeedHeaderSize = sstruct.calcsize(fontSeedHeaderFormat)
+
+# the glyph names, joined by "\0", follow the header, padded to 4 bytes, then
+# the 'loca' offsets, as uint32 in native byte order
+
+
+def packSeed(glyphOrder, locations=None):
+	"""Return the glyph order and the 'loca' offsets, or None for fonts
+	without 'loca' table, packed in the font seed format."""
+	glyphNames = "\0".join(glyphOrder).encode("utf-8")
+	header = {
+		"numGlyphs": len(glyphOrder),
+		"glyphNamesLength": len(glyphNames),
+		"locaLength": 0 if locations is None else len(locations),
+	}
+	data = [sstruct.pack(fontSeedHeaderFormat, header), glyphNames]
+	if locations is not None:
+		size = fontSeedHeaderSize + len(glyphNames)
+		data.append(b"\0" * (align(size) - size))
+		data.append(array.array("I", locations).tobytes())
+	return b"".join(data)
+
+
+def unpackSeed(data):
+	"""Return (glyphOrder, locations) from data packed by packSeed().
+	'locations' is None for fonts without 'loca' table. Raises ValueError,
+	struct.error or UnicodeDecodeError if the data is invalid."""
+	header = sstruct.unpack(fontSeedHeaderFormat, data[:fontSeedHeaderSize])
+	offset = fontSeedHeaderSize
+	end = offset + header["glyphNamesLength"]
+	if end > len(data):
+		raise ValueError("truncated glyph names")
+	glyphNames = bytes(data[offset:end])
+	if header["numGlyphs"]:
+		glyphOrder = glyphNames.decode("utf-8").split("\0")
+	else:
+		glyphOrder = []
+	if len(glyphOrder) != header["numGlyphs"]:
+		raise ValueError("bad glyph names")
+	locations = None
+	if header["locaLength"]:
+		offset = align(end)
+		locations = array.array("I")
+		end = offset + header["locaLength"] * locations.itemsize
+		if end > len(data):
+			raise ValueError("truncated 'loca' offsets")
+		locations.frombytes(data[offset:end])
+	return glyphOrder, locations
+
+
+def getLocaOffsets(locaData, headData):
+	"""Return the offsets of the raw 'loca' table data 'locaData', in the
+	format given by the raw 'head' table data 'headData', without decompiling
+	either table."""
+	# head.indexToLocFormat
+	longFormat = struct.unpack(">h", headData[50:52])[0]
+	locations = array.array("I" if longFormat else "H")
+	locations.frombytes(
+		locaData[:len(locaData) - len(locaData) % locations.itemsize])
+	if sys.byteorder != "big": locations.byteswap()
+	if not longFormat:
+		locations = array.array("I", [l * 2 for l in locations])
+	return locations
+
+
+def seedFont(font, glyphOrder, locations=None):
+	"""Set the glyph order of 'font', and its 'loca' table from the 'loca'
+	offsets, if its reader has a 'loca' table that isn't loaded yet."""
+	font.setGlyphOrder(glyphOrder)
+	if (locations is not None and font.reader is not None
+			and "loca" in font.reader and not font.isLoaded("loca")):
+		font["loca"] = SeededLocaTable(locations)
+
+
+class SeededLocaTable(getTableClass("loca")):
+	"""'loca' table set by seedFont(). As long as its offsets are the ones
+	it was seeded with, it compiles to the 'loca' data of the font's reader,
+	like a 'loca' table that wasn't loaded, so that saving the font doesn't
+	change its 'loca' format. Setting new offsets, as glyf.compile() does,
+	compiles it as usual.
+	"""
+
+	def __init__(self, locations):
+		self.tableTag = Tag("loca")
+		self.locations = self._seedLocations = locations
+
+	def compile(self, ttFont):
+		if (self.locations is self._seedLocations and ttFont.reader is not None
+				and "loca" in ttFont.reader):
+			return ttFont.reader["loca"]
+		return super(SeededLocaTable, self).compile(ttFont)
+
+
+def align(offset):
+	"""Round 'offset' up to a multiple of 4."""
+	return (offset + 3) & ~3
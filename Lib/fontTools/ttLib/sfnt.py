@@ -14,8 +14,11 @@ a table's length chages you need to rewrite the whole file anyway.
 
 from fontTools.misc.py23 import *
 from fontTools.misc import sstruct
+from fontTools.misc.textTools import pad
 from fontTools.ttLib import TTLibError
+import array
 import struct
+import sys
 from collections import OrderedDict
 import logging
 
@@ -564,31 +567,36 @@ class WOFFFlavorData():
 				self.privData = data
 
 
-def calcChecksum(data):
+def calcChecksum(data, start=0):
 	"""Calculate the checksum for an arbitrary block of data.
 	Optionally takes a 'start' argument, which allows you to
 	calculate a checksum in chunks by feeding it a previous
-	result.
+	result; all the chunks but the last must then have a length
+	that is a multiple of four.
 
 	If the data length is not a multiple of four, it assumes
 	it is to be padded with null byte.
 
+	The data can be any bytes-like object, eg. a memoryview of
+	a part of a larger buffer; it is not copied to be padded.
+
 		>>> print(calcChecksum(b"abcd"))
 		1633837924
 		>>> print(calcChecksum(b"abcdxyz"))
 		3655064932
+		>>> print(calcChecksum(b"xyz", calcChecksum(b"abcd")))
+		3655064932
 	"""
-	remainder = len(data) % 4
-	if remainder:
-		data += b"\0" * (4 - remainder)
-	value = 0
-	blockSize = 4096
-	assert blockSize % 4 == 0
-	for i in range(0, len(data), blockSize):
-		block = data[i:i+blockSize]
-		longs = struct.unpack(">%dL" % (len(block) // 4), block)
-		value = (value + sum(longs)) & 0xffffffff
-	return value
+	data = memoryview(data)
+	size = len(data) & ~3
+	longs = array.array("I")
+	longs.frombytes(data[:size])
+	if sys.byteorder != "big":
+		longs.byteswap()
+	value = start + sum(longs)
+	if size < len(data):
+		value += struct.unpack(">L", pad(data[size:].tobytes(), 4))[0]
+	return value & 0xffffffff
 
 def readTTCHeader(file):
 	file.seek(0)
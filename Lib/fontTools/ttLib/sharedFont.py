@@ -0,0 +1,216 @@
+"""ttLib/sharedFont.py -- share a loaded font between processes.
+
+Defines two public classes:
+	SharedFontSnapshot
+	SharedFontReader
+
+and the attachFont() function.
+
+A SharedFontSnapshot copies the raw table data of a TTFont into a
+multiprocessing.shared_memory block, together with the glyph order and the
+'loca' offsets, so that they don't need to be rebuilt. Worker processes only
+get the name of the block, and call attachFont(name) to get a TTFont which
+reads its tables from the shared memory, decompiling them on demand:
+
+	with SharedFontSnapshot(font) as snapshot:
+		with ProcessPoolExecutor() as executor:
+			executor.map(work, [snapshot.name] * n)
+
+	def work(name):
+		with attachFont(name) as font:
+			...
+
+The shared memory block is freed when the snapshot is closed; the fonts
+attached to it must be closed before that.
+"""
+
+from fontTools.misc.py23 import *
+from fontTools.misc import sstruct
+from fontTools.ttLib import TTFont, TTLibError, getTableClass
+from fontTools.ttLib.fontSeed import (
+	align, getLocaOffsets, packSeed, seedFont, unpackSeed)
+from collections import OrderedDict
+import struct
+
+
+sharedFontHeaderFormat = """
+		> # big endian
+		magic:             4s   # "ftSF"
+		version:           H    # 1
+		numTables:         H    # number of table records
+		sfntVersion:       4s
+		seedOffset:        L    # offset to the glyph order and 'loca' offsets
+		seedLength:        L    # packed by fontTools.ttLib.fontSeed
+"""
+
+sharedFontHeaderSize = sstruct.calcsize(sharedFontHeaderFormat)
+
+# tag, offset, length
+sharedFontTableRecordFormat = ">4sLL"
+
+sharedFontTableRecordSize = struct.calcsize(sharedFontTableRecordFormat)
+
+
+class SharedFontSnapshot(object):
+
+	"""Snapshot of the tables of a TTFont in a shared memory block. Loaded
+	tables are compiled, as they would be when saving the font. The snapshot
+	doesn't change when the font is modified afterwards.
+	"""
+
+	def __init__(self, font):
+		from multiprocessing import shared_memory
+
+		glyphOrder = font.getGlyphOrder()
+		tablesData = _compileTables(font)
+		locations = None
+		if "loca" in tablesData and "head" in tablesData:
+			# from the compiled data, which glyf.compile() updates if 'glyf'
+			# is loaded, without loading the font's 'loca' table
+			locations = getLocaOffsets(tablesData["loca"], tablesData["head"])
+		seed = packSeed(glyphOrder, locations)
+
+		header = {
+			"magic": b"ftSF",
+			"version": 1,
+			"numTables": len(tablesData),
+			"sfntVersion": font.sfntVersion,
+			"seedLength": len(seed),
+		}
+		offset = (sharedFontHeaderSize +
+			len(tablesData) * sharedFontTableRecordSize)
+		header["seedOffset"] = offset
+		offset = align(offset + len(seed))
+		records = []
+		for tag, data in tablesData.items():
+			records.append((tag, offset, len(data)))
+			offset = align(offset + len(data))
+
+		self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+		buf = self._shm.buf
+		buf[:sharedFontHeaderSize] = sstruct.pack(sharedFontHeaderFormat, header)
+		pos = sharedFontHeaderSize
+		for tag, offset, length in records:
+			struct.pack_into(sharedFontTableRecordFormat, buf, pos,
+				tobytes(tag), offset, length)
+			pos += sharedFontTableRecordSize
+			buf[offset:offset + length] = tablesData[tag]
+		offset = header["seedOffset"]
+		buf[offset:offset + len(seed)] = seed
+		del buf
+
+	@property
+	def name(self):
+		"""The name of the shared memory block, to pass to attachFont()."""
+		return self._shm.name
+
+	@property
+	def size(self):
+		return self._shm.size
+
+	def close(self):
+		"""Free the shared memory block."""
+		if self._shm is not None:
+			self._shm.close()
+			self._shm.unlink()
+			self._shm = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, type, value, traceback):
+		self.close()
+
+
+class SharedFontReader(object):
+
+	"""Reader of the table data of a SharedFontSnapshot, with the interface
+	of SFNTReader.
+	"""
+
+	flavor = None
+	flavorData = None
+	file = None
+
+	def __init__(self, name):
+		from multiprocessing import shared_memory
+
+		self._shm = shared_memory.SharedMemory(name=name)
+		buf = self._shm.buf
+		header = sstruct.unpack(sharedFontHeaderFormat,
+			bytes(buf[:sharedFontHeaderSize]))
+		if Tag(header["magic"]) != "ftSF" or header["version"] != 1:
+			self.close()
+			raise TTLibError("Not a shared font snapshot")
+		self.sfntVersion = Tag(header["sfntVersion"])
+		self.tables = OrderedDict()
+		pos = sharedFontHeaderSize
+		for i in range(header["numTables"]):
+			tag, offset, length = struct.unpack_from(
+				sharedFontTableRecordFormat, buf, pos)
+			self.tables[Tag(tag)] = (offset, length)
+			pos += sharedFontTableRecordSize
+
+		offset = header["seedOffset"]
+		self.glyphOrder, self.locations = unpackSeed(
+			bytes(buf[offset:offset + header["seedLength"]]))
+
+	def has_key(self, tag):
+		return tag in self.tables
+
+	__contains__ = has_key
+
+	def keys(self):
+		return self.tables.keys()
+
+	def __getitem__(self, tag):
+		"""Fetch the raw table data."""
+		offset, length = self.tables[Tag(tag)]
+		return bytes(self._shm.buf[offset:offset + length])
+
+	def __delitem__(self, tag):
+		del self.tables[Tag(tag)]
+
+	def close(self):
+		if self._shm is not None:
+			self._shm.close()
+			self._shm = None
+
+
+def attachFont(name, **kwargs):
+	"""Return a TTFont reading its tables from the SharedFontSnapshot named
+	'name'. The glyph order and the 'loca' offsets are taken from the
+	snapshot, so the 'post', 'cmap' and 'loca' tables aren't decompiled to
+	build them; saving the font without changing its glyphs writes the
+	snapshot's 'loca' data unchanged. Keyword arguments are passed to the
+	TTFont constructor. Close the font to detach it from the shared memory
+	block.
+	"""
+	reader = SharedFontReader(name)
+	font = TTFont(**kwargs)
+	font.reader = reader
+	font._tableCache = None
+	font.sfntVersion = reader.sfntVersion
+	font.flavor = reader.flavor
+	font.flavorData = reader.flavorData
+	seedFont(font, reader.glyphOrder, reader.locations)
+	return font
+
+
+def _compileTables(font):
+	"""Return an OrderedDict mapping the tags of 'font' to their data, in the
+	order of font.keys(), compiling the loaded tables after the tables they
+	depend on, as TTFont._writeTable() does."""
+	tags = [tag for tag in font.keys() if tag != "GlyphOrder"]
+	tablesData = {}
+
+	def compileTable(tag):
+		for masterTable in getTableClass(tag).dependencies:
+			if masterTable not in tablesData and masterTable in font:
+				compileTable(masterTable)
+		tablesData[tag] = font.getTableData(tag)
+
+	for tag in tags:
+		if tag not in tablesData:
+			compileTable(tag)
+	return OrderedDict((tag, tablesData[tag]) for tag in tags)
@@ -7,9 +7,10 @@ from fontTools.misc.fixedTools import (
     otRound,
 )
 from fontTools.misc.textTools import safeEval
+from itertools import accumulate
 import array
-import io
 import logging
+import re
 import struct
 import sys
 
@@ -33,6 +34,30 @@ TUPLE_INDEX_MASK = 0x0fff
 
 log = logging.getLogger(__name__)
 
+# Runs of packed deltas, matched against a string with one character per
+# delta: "z" for zeroes, "b" for other deltas that fit in a byte, "w" for
+# the others; see TupleVariation.compileDeltaValues_().  The groups are,
+# in order, runs of zeroes, of bytes and of words, of at most 64 deltas.
+#
+# Within a byte-encoded run of deltas, a single zero is best stored
+# literally as 0x00 value. However, if are two or more zeroes in a
+# sequence, it is better to start a new run. For example, the sequence
+# of deltas [15, 15, 0, 15, 15] becomes 6 bytes (04 0F 0F 00 0F 0F)
+# when storing the zero value literally, but 7 bytes
+# (01 0F 0F 80 01 0F 0F) when starting a new run.
+#
+# Within a word-encoded run of deltas, it is easiest to start a new run
+# (with a different encoding) whenever we encounter a zero value. For
+# example, the sequence [0x6666, 0, 0x7777] needs 7 bytes when storing
+# the zero literally (42 66 66 00 00 77 77), and equally 7 bytes when
+# starting a new run (40 66 66 80 40 77 77).
+# A single value in the range (-128..127) should however be encoded
+# literally because it is more compact. For example, the sequence
+# [0x6666, 2, 0x7777] becomes 7 bytes when storing the value literally
+# (42 66 66 00 02 77 77), but 8 bytes when starting a new run
+# (40 66 66 00 02 40 77 77).
+_DELTA_RUN = re.compile(r"(z{1,64})|((?:b|z(?!z)){1,64})|((?:w|b(?![bz])){1,64})")
+
 
 class TupleVariation(object):
 
@@ -216,37 +241,32 @@ class TupleVariation(object):
 		else:
 			result = [bytechr((numPoints >> 8) | 0x80) + bytechr(numPoints & 0xff)]
 
-		MAX_RUN_LENGTH = 127
+		MAX_RUN_LENGTH = 128
+		# Points are stored as differences to the previous point, in runs of
+		# bytes or words.  A run using byte encoding ends at the first delta
+		# that does not fit in a byte.
+		# TODO This never switches back to a byte-encoding from a short-encoding.
+		# That's suboptimal.
+		deltas = points[:1]
+		deltas.extend(b - a for a, b in zip(points, points[1:]))
+		wordPositions = [i for i, delta in enumerate(deltas) if delta > 0xff]
+		wordPositions.append(numPoints)
+		nextWord = 0
 		pos = 0
-		lastValue = 0
 		while pos < numPoints:
-			run = io.BytesIO()
-			runLength = 0
-			useByteEncoding = None
-			while pos < numPoints and runLength <= MAX_RUN_LENGTH:
-				curValue = points[pos]
-				delta = curValue - lastValue
-				if useByteEncoding is None:
-					useByteEncoding = 0 <= delta <= 0xff
-				if useByteEncoding and (delta > 0xff or delta < 0):
-					# we need to start a new run (which will not use byte encoding)
-					break
-				# TODO This never switches back to a byte-encoding from a short-encoding.
-				# That's suboptimal.
-				if useByteEncoding:
-					run.write(bytechr(delta))
-				else:
-					run.write(bytechr(delta >> 8))
-					run.write(bytechr(delta & 0xff))
-				lastValue = curValue
-				pos += 1
-				runLength += 1
-			if useByteEncoding:
-				runHeader = bytechr(runLength - 1)
+			while wordPositions[nextWord] < pos:
+				nextWord += 1
+			if wordPositions[nextWord] == pos:
+				end = min(pos + MAX_RUN_LENGTH, numPoints)
+				run = array.array("H", deltas[pos:end])
+				if sys.byteorder != "big": run.byteswap()
+				result.append(bytechr((end - pos - 1) | POINTS_ARE_WORDS))
+				result.append(run.tobytes())
 			else:
-				runHeader = bytechr((runLength - 1) | POINTS_ARE_WORDS)
-			result.append(runHeader)
-			result.append(run.getvalue())
+				end = min(pos + MAX_RUN_LENGTH, wordPositions[nextWord])
+				result.append(bytechr(end - pos - 1))
+				result.append(bytes(deltas[pos:end]))
+			pos = end
 
 		return bytesjoin(result)
 
@@ -284,16 +304,10 @@ class TupleVariation(object):
 			result.extend(points)
 
 		# Convert relative to absolute
-		absolute = []
-		current = 0
-		for delta in result:
-			current += delta
-			absolute.append(current)
-		result = absolute
-		del absolute
-
-		badPoints = {str(p) for p in result if p < 0 or p >= numPoints}
-		if badPoints:
+		result = list(accumulate(result))
+
+		if result and result[-1] >= numPoints:
+			badPoints = {str(p) for p in result if p < 0 or p >= numPoints}
 			log.warning("point %s out of range in '%s' table" %
 			            (",".join(sorted(badPoints)), tableTag))
 		return (result, pos)
@@ -329,90 +343,27 @@ class TupleVariation(object):
 		bytes; if (header & 0x40) is set, the delta values are
 		signed 16-bit integers.
 		"""  # Explaining the format because the 'gvar' spec is hard to understand.
-		stream = io.BytesIO()
-		pos = 0
-		while pos < len(deltas):
-			value = deltas[pos]
-			if value == 0:
-				pos = TupleVariation.encodeDeltaRunAsZeroes_(deltas, pos, stream)
-			elif value >= -128 and value <= 127:
-				pos = TupleVariation.encodeDeltaRunAsBytes_(deltas, pos, stream)
+		kinds = "".join(["z" if v == 0 else "b" if -128 <= v <= 127 else "w"
+				 for v in deltas])
+		# All deltas packed as bytes and as words; the runs are sliced from these.
+		deltas = [v if type(v) is int else otRound(v) for v in deltas]
+		byteValues = bytes([v & 0xff for v in deltas])
+		wordValues = array.array("h", deltas)
+		if sys.byteorder != "big": wordValues.byteswap()
+		wordValues = wordValues.tobytes()
+		result = bytearray()
+		for run in _DELTA_RUN.finditer(kinds):
+			start, end = run.span()
+			kind = run.lastindex
+			if kind == 1:
+				result.append(DELTAS_ARE_ZERO | (end - start - 1))
+			elif kind == 2:
+				result.append(end - start - 1)
+				result += byteValues[start:end]
 			else:
-				pos = TupleVariation.encodeDeltaRunAsWords_(deltas, pos, stream)
-		return stream.getvalue()
-
-	@staticmethod
-	def encodeDeltaRunAsZeroes_(deltas, offset, stream):
-		runLength = 0
-		pos = offset
-		numDeltas = len(deltas)
-		while pos < numDeltas and runLength < 64 and deltas[pos] == 0:
-			pos += 1
-			runLength += 1
-		assert runLength >= 1 and runLength <= 64
-		stream.write(bytechr(DELTAS_ARE_ZERO | (runLength - 1)))
-		return pos
-
-	@staticmethod
-	def encodeDeltaRunAsBytes_(deltas, offset, stream):
-		runLength = 0
-		pos = offset
-		numDeltas = len(deltas)
-		while pos < numDeltas and runLength < 64:
-			value = deltas[pos]
-			if value < -128 or value > 127:
-				break
-			# Within a byte-encoded run of deltas, a single zero
-			# is best stored literally as 0x00 value. However,
-			# if are two or more zeroes in a sequence, it is
-			# better to start a new run. For example, the sequence
-			# of deltas [15, 15, 0, 15, 15] becomes 6 bytes
-			# (04 0F 0F 00 0F 0F) when storing the zero value
-			# literally, but 7 bytes (01 0F 0F 80 01 0F 0F)
-			# when starting a new run.
-			if value == 0 and pos+1 < numDeltas and deltas[pos+1] == 0:
-				break
-			pos += 1
-			runLength += 1
-		assert runLength >= 1 and runLength <= 64
-		stream.write(bytechr(runLength - 1))
-		for i in range(offset, pos):
-			stream.write(struct.pack('b', otRound(deltas[i])))
-		return pos
-
-	@staticmethod
-	def encodeDeltaRunAsWords_(deltas, offset, stream):
-		runLength = 0
-		pos = offset
-		numDeltas = len(deltas)
-		while pos < numDeltas and runLength < 64:
-			value = deltas[pos]
-			# Within a word-encoded run of deltas, it is easiest
-			# to start a new run (with a different encoding)
-			# whenever we encounter a zero value. For example,
-			# the sequence [0x6666, 0, 0x7777] needs 7 bytes when
-			# storing the zero literally (42 66 66 00 00 77 77),
-			# and equally 7 bytes when starting a new run
-			# (40 66 66 80 40 77 77).
-			if value == 0:
-				break
-
-			# Within a word-encoded run of deltas, a single value
-			# in the range (-128..127) should be encoded literally
-			# because it is more compact. For example, the sequence
-			# [0x6666, 2, 0x7777] becomes 7 bytes when storing
-			# the value literally (42 66 66 00 02 77 77), but 8 bytes
-			# when starting a new run (40 66 66 00 02 40 77 77).
-			isByteEncodable = lambda value: value >= -128 and value <= 127
-			if isByteEncodable(value) and pos+1 < numDeltas and isByteEncodable(deltas[pos+1]):
-				break
-			pos += 1
-			runLength += 1
-		assert runLength >= 1 and runLength <= 64
-		stream.write(bytechr(DELTAS_ARE_WORDS | (runLength - 1)))
-		for i in range(offset, pos):
-			stream.write(struct.pack('>h', otRound(deltas[i])))
-		return pos
+				result.append(DELTAS_ARE_WORDS | (end - start - 1))
+				result += wordValues[2*start:2*end]
+		return bytes(result)
 
 	@staticmethod
 	def decompileDeltas_(numDeltas, data, offset):
@@ -425,18 +376,12 @@ class TupleVariation(object):
 			numDeltasInRun = (runHeader & DELTA_RUN_COUNT_MASK) + 1
 			if (runHeader & DELTAS_ARE_ZERO) != 0:
 				result.extend([0] * numDeltasInRun)
+			elif (runHeader & DELTAS_ARE_WORDS) != 0:
+				result.extend(struct.unpack_from(">%dh" % numDeltasInRun, data, pos))
+				pos += numDeltasInRun * 2
 			else:
-				if (runHeader & DELTAS_ARE_WORDS) != 0:
-					deltas = array.array("h")
-					deltasSize = numDeltasInRun * 2
-				else:
-					deltas = array.array("b")
-					deltasSize = numDeltasInRun
-				deltas.frombytes(data[pos:pos+deltasSize])
-				if sys.byteorder != "big": deltas.byteswap()
-				assert len(deltas) == numDeltasInRun
-				pos += deltasSize
-				result.extend(deltas)
+				result.extend(struct.unpack_from("%db" % numDeltasInRun, data, pos))
+				pos += numDeltasInRun
 		assert len(result) == numDeltas
 		return (result, pos)
 
@@ -710,23 +655,33 @@ def decompileTupleVariation_(pointCount, sharedTuples, sharedPoints,
 	else:
 		points = sharedPoints
 
-	deltas = [None] * pointCount
+	numPoints = len(points)
+	allPoints = points == range(pointCount)
 
 	if tableTag == "cvar":
 		deltas_cvt, pos = TupleVariation.decompileDeltas_(
-			len(points), tupleData, pos)
-		for p, delta in zip(points, deltas_cvt):
-			if 0 <= p < pointCount:
-				deltas[p] = delta
+			numPoints, tupleData, pos)
+		if allPoints:
+			deltas = deltas_cvt
+		else:
+			deltas = [None] * pointCount
+			for p, delta in zip(points, deltas_cvt):
+				if 0 <= p < pointCount:
+					deltas[p] = delta
 
 	elif tableTag == "gvar":
-		deltas_x, pos = TupleVariation.decompileDeltas_(
-			len(points), tupleData, pos)
-		deltas_y, pos = TupleVariation.decompileDeltas_(
-			len(points), tupleData, pos)
-		for p, x, y in zip(points, deltas_x, deltas_y):
-			if 0 <= p < pointCount:
-				deltas[p] = (x, y)
+		# The runs of the x deltas end where those of the y deltas start
+		deltas_xy, pos = TupleVariation.decompileDeltas_(
+			2 * numPoints, tupleData, pos)
+		deltas_x = deltas_xy[:numPoints]
+		deltas_y = deltas_xy[numPoints:]
+		if allPoints:
+			deltas = list(zip(deltas_x, deltas_y))
+		else:
+			deltas = [None] * pointCount
+			for p, x, y in zip(points, deltas_x, deltas_y):
+				if 0 <= p < pointCount:
+					deltas[p] = (x, y)
 
 	return TupleVariation(axes, deltas)
 
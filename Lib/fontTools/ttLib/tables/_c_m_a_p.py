@@ -66,6 +66,48 @@ class table__c_m_a_p(DefaultTable.DefaultTable):
 					result.setdefault(name, set()).add(codepoint)
 		return result
 
+	@staticmethod
+	def buildReversedGlyphIDs(data):
+		"""Returns a dict mapping the glyph IDs of the Unicode subtables to
+		the smallest codepoint mapped to them, such as {36: 0x41}, from the
+		raw table data. Unlike buildReversed(), this doesn't decompile the
+		table nor need the glyph order, so it can be used to build glyph
+		names. Returns None if a Unicode subtable has a format other than 4,
+		12, 13 or 14, or is corrupt.
+		"""
+		pairs = []
+		try:
+			tableVersion, numSubTables = struct.unpack(">HH", data[:4])
+			seenOffsets = set()
+			for i in range(numSubTables):
+				platformID, platEncID, offset = struct.unpack(
+						">HHl", data[4+i*8:4+(i+1)*8])
+				if not (platformID == 0 or
+						(platformID == 3 and platEncID in [0, 1, 10])):
+					continue
+				if offset in seenOffsets:
+					continue
+				seenOffsets.add(offset)
+				format, length = struct.unpack(">HH", data[offset:offset+4])
+				if format == 14:
+					continue  # has no cmap
+				elif format in [12, 13]:
+					format, reserved, length = struct.unpack(">HHL", data[offset:offset+8])
+				elif format != 4:
+					return None
+				if not length:
+					continue
+				subtable = CmapSubtable.newSubtable(format)
+				subtable.decompileHeader(data[offset:offset+int(length)], None)
+				charCodes, gids = subtable._decompileCodes(subtable.data)
+				pairs.extend(zip(charCodes, gids))
+		except (AssertionError, struct.error):
+			return None
+		# with the pairs in decreasing order, the smallest codepoint is the
+		# last one assigned to each glyph ID
+		pairs.sort(reverse=True)
+		return {gid: charCode for charCode, gid in pairs if gid != 0}
+
 	def decompile(self, data, ttFont):
 		tableVersion, numSubTables = struct.unpack(">HH", data[:4])
 		self.tableVersion = int(tableVersion)
@@ -687,7 +729,13 @@ class cmap_format_4(CmapSubtable):
 		else:
 			assert (data is None and ttFont is None), "Need both data and ttFont arguments"
 
-		data = self.data # decompileHeader assigns the data after the header to self.data
+		charCodes, gids = self._decompileCodes(self.data) # decompileHeader assigns the data after the header to self.data
+		self.data = None
+		self.cmap = _make_map(self.ttFont, charCodes, gids)
+
+	def _decompileCodes(self, data):
+		"""Return the lists of character codes and glyph IDs of the subtable
+		data following the header."""
 		(segCountX2, searchRange, entrySelector, rangeShift) = \
 					struct.unpack(">4H", data[:8])
 		data = data[8:]
@@ -695,7 +743,6 @@ class cmap_format_4(CmapSubtable):
 
 		allCodes = array.array("H")
 		allCodes.frombytes(data)
-		self.data = data = None
 
 		if sys.byteorder != "big": allCodes.byteswap()
 
@@ -734,7 +781,7 @@ class cmap_format_4(CmapSubtable):
 						glyphID = 0  # missing glyph
 					gids.append(glyphID & 0xFFFF)
 
-		self.cmap = _make_map(self.ttFont, charCodes, gids)
+		return charCodes, gids
 
 	def compile(self, ttFont):
 		if self.data:
@@ -935,18 +982,23 @@ class cmap_format_12_or_13(CmapSubtable):
 		else:
 			assert (data is None and ttFont is None), "Need both data and ttFont arguments"
 
-		data = self.data # decompileHeader assigns the data after the header to self.data
+		charCodes, gids = self._decompileCodes(self.data) # decompileHeader assigns the data after the header to self.data
+		self.data = None
+		self.cmap = _make_map(self.ttFont, charCodes, gids)
+
+	def _decompileCodes(self, data):
+		"""Return the lists of character codes and glyph IDs of the subtable
+		data following the header."""
+		groups = array.array("I")
+		groups.frombytes(data[:self.nGroups*12])
+		if sys.byteorder != "big": groups.byteswap()
 		charCodes = []
 		gids = []
-		pos = 0
-		for i in range(self.nGroups):
-			startCharCode, endCharCode, glyphID = struct.unpack(">LLL",data[pos:pos+12] )
-			pos += 12
+		for startCharCode, endCharCode, glyphID in zip(groups[0::3], groups[1::3], groups[2::3]):
 			lenGroup = 1 + endCharCode - startCharCode
-			charCodes.extend(list(range(startCharCode, endCharCode +1)))
+			charCodes.extend(range(startCharCode, endCharCode +1))
 			gids.extend(self._computeGIDs(glyphID, lenGroup))
-		self.data = data = None
-		self.cmap = _make_map(self.ttFont, charCodes, gids)
+		return charCodes, gids
 
 	def compile(self, ttFont):
 		if self.data:
@@ -56,11 +56,17 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 
 	def decompile(self, data, ttFont):
 		loca = ttFont['loca']
+		self.glyphOrder = glyphOrder = ttFont.getGlyphOrder()
+		numGlyphs = len(loca) - 1
+		if ttFont.lazy is not False and numGlyphs == len(glyphOrder):
+			glyphIndices = {glyphName: i for i, glyphName in enumerate(glyphOrder)}
+			if len(glyphIndices) == numGlyphs:
+				self._decompileLazily(data, loca, glyphIndices)
+				return
 		pos = int(loca[0])
 		nextPos = 0
 		noname = 0
 		self.glyphs = {}
-		self.glyphOrder = glyphOrder = ttFont.getGlyphOrder()
 		for i in range(0, len(loca)-1):
 			try:
 				glyphName = glyphOrder[i]
@@ -84,6 +90,80 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 			for glyph in self.glyphs.values():
 				glyph.expand(self)
 
+	def _decompileLazily(self, data, loca, glyphIndices):
+		"""Keep the table data and the 'loca' offsets, and only make Glyph
+		objects for the glyphs that are accessed. See the 'glyphs' property.
+		"""
+		offsets = loca.locations
+		if any(offsets[i] > offsets[i+1] for i in range(len(offsets) - 1)) or \
+				offsets[-1] > len(data):
+			raise ttLib.TTLibError("not enough 'glyf' table data")
+		if len(data) - offsets[-1] >= 4:
+			log.warning(
+				"too much 'glyf' table data: expected %d, received %d bytes",
+				offsets[-1], len(data))
+		self.__dict__.pop("_glyphs", None)
+		self._glyphData = data
+		self._glyphOffsets = offsets
+		self._glyphIndices = glyphIndices
+		self._glyphCache = {}
+
+	@property
+	def glyphs(self):
+		"""Dict mapping glyph names to Glyph objects. If the table was
+		decompiled lazily, getting it makes the Glyph objects of all the
+		glyphs that weren't accessed yet."""
+		try:
+			return self.__dict__["_glyphs"]
+		except KeyError:
+			pass
+		if "_glyphData" not in self.__dict__:
+			raise AttributeError("glyphs")
+		data = self.__dict__.pop("_glyphData")
+		offsets = self.__dict__.pop("_glyphOffsets")
+		glyphCache = self.__dict__.pop("_glyphCache")
+		glyphs = self._glyphs = {}
+		for glyphName, i in self.__dict__.pop("_glyphIndices").items():
+			glyph = glyphCache.get(glyphName)
+			if glyph is None:
+				glyph = Glyph(data[offsets[i]:offsets[i+1]])
+			glyphs[glyphName] = glyph
+		return glyphs
+
+	@glyphs.setter
+	def glyphs(self, glyphs):
+		for attr in ("_glyphData", "_glyphOffsets", "_glyphIndices", "_glyphCache"):
+			self.__dict__.pop(attr, None)
+		self._glyphs = glyphs
+
+	def _isLazy(self):
+		return "_glyphData" in self.__dict__
+
+	def _getGlyph(self, glyphName):
+		"""Return the glyph, without expanding it, and without making the
+		Glyph objects of the other glyphs if the table was decompiled lazily.
+		"""
+		if not self._isLazy():
+			return self.glyphs[glyphName]
+		glyph = self._glyphCache.get(glyphName)
+		if glyph is None:
+			glyph = self._glyphCache[glyphName] = Glyph(
+				self._getGlyphData(glyphName))
+		return glyph
+
+	def _getGlyphData(self, glyphName):
+		"""Return the source data of a glyph of a lazily decompiled table."""
+		i = self._glyphIndices[glyphName]
+		return self._glyphData[self._glyphOffsets[i]:self._glyphOffsets[i+1]]
+
+	def _getCompactGlyphData(self, glyphName):
+		"""Return the compiled data of a glyph that wasn't expanded, or None,
+		without making its Glyph object if the table was decompiled lazily.
+		"""
+		if self._isLazy() and glyphName not in self._glyphCache:
+			return self._getGlyphData(glyphName) or None
+		return getattr(self._getGlyph(glyphName), "data", None)
+
 	def compile(self, ttFont):
 		if not hasattr(self, "glyphOrder"):
 			self.glyphOrder = ttFont.getGlyphOrder()
@@ -93,9 +173,22 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 		currentLocation = 0
 		dataList = []
 		recalcBBoxes = ttFont.recalcBBoxes
+		# if the table was decompiled lazily, the glyphs that weren't accessed
+		# are copied from the source data, as compact glyphs would be
+		if self._isLazy() and not recalcBBoxes:
+			sourceData = self._glyphData
+			offsets = self._glyphOffsets
+			glyphIndices = self._glyphIndices
+			glyphCache = self._glyphCache
+		else:
+			glyphCache = None
 		for glyphName in self.glyphOrder:
-			glyph = self.glyphs[glyphName]
-			glyphData = glyph.compile(self, recalcBBoxes)
+			if glyphCache is not None and glyphName not in glyphCache:
+				i = glyphIndices[glyphName]
+				glyphData = sourceData[offsets[i]:offsets[i+1]]
+			else:
+				glyph = self._getGlyph(glyphName)
+				glyphData = glyph.compile(self, recalcBBoxes)
 			if padding > 1:
 				glyphData = pad(glyphData, size=padding)
 			locations.append(currentLocation)
@@ -121,7 +214,7 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 		if 'loca' in ttFont:
 			ttFont['loca'].set(locations)
 		if 'maxp' in ttFont:
-			ttFont['maxp'].numGlyphs = len(self.glyphs)
+			ttFont['maxp'].numGlyphs = len(self.keys())
 		if not data:
 		# As a special case when all glyph in the font are empty, add a zero byte
 		# to the table, so that OTS doesn’t reject it, and to make the table work
@@ -229,20 +322,27 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 			glyph.removeHinting()
 
 	def keys(self):
+		if self._isLazy():
+			return self._glyphIndices.keys()
 		return self.glyphs.keys()
 
 	def has_key(self, glyphName):
+		if self._isLazy():
+			return glyphName in self._glyphIndices
 		return glyphName in self.glyphs
 
 	__contains__ = has_key
 
 	def __getitem__(self, glyphName):
-		glyph = self.glyphs[glyphName]
+		glyph = self._getGlyph(glyphName)
 		glyph.expand(self)
 		return glyph
 
 	def __setitem__(self, glyphName, glyph):
-		self.glyphs[glyphName] = glyph
+		if self._isLazy() and glyphName in self._glyphIndices:
+			self._glyphCache[glyphName] = glyph
+		else:
+			self.glyphs[glyphName] = glyph
 		if glyphName not in self.glyphOrder:
 			self.glyphOrder.append(glyphName)
 
@@ -251,8 +351,29 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 		self.glyphOrder.remove(glyphName)
 
 	def __len__(self):
-		assert len(self.glyphOrder) == len(self.glyphs)
-		return len(self.glyphs)
+		numGlyphs = len(self.keys())
+		assert len(self.glyphOrder) == numGlyphs
+		return numGlyphs
+
+	def __eq__(self, other):
+		if type(self) != type(other):
+			return NotImplemented
+		# compare the Glyph objects, not the way they are stored, and without
+		# making all of them if the table was decompiled lazily
+		hasGlyphs = self._isLazy() or "_glyphs" in self.__dict__
+		if hasGlyphs != (other._isLazy() or "_glyphs" in other.__dict__):
+			return False
+		if hasGlyphs:
+			if self.keys() != other.keys():
+				return False
+			for glyphName in self.keys():
+				if self._getGlyph(glyphName) != other._getGlyph(glyphName):
+					return False
+		selfAttrs = {
+			k: v for k, v in self.__dict__.items() if not k.startswith("_glyph")}
+		otherAttrs = {
+			k: v for k, v in other.__dict__.items() if not k.startswith("_glyph")}
+		return selfAttrs == otherAttrs
 
 	def getPhantomPoints(self, glyphName, ttFont, defaultVerticalOrigin=None):
 		"""Compute the four "phantom points" for the given glyph from its bounding box
@@ -325,7 +446,7 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 
 		Return None if the requested glyphName is not present.
 		"""
-		if glyphName not in self.glyphs:
+		if glyphName not in self:
 			return None
 		glyph = self[glyphName]
 		if glyph.isComposite():
@@ -365,7 +486,7 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 		the glyph's bounding boxes.
 		"""
 		# TODO: Create new glyph if not already present
-		assert glyphName in self.glyphs
+		assert glyphName in self
 		glyph = self[glyphName]
 
 		# Handle phantom points for (left, right, top, bottom) positions.
@@ -1,4 +1,5 @@
 from fontTools.misc.py23 import *
+from fontTools.ttLib import TTLibError
 from fontTools.ttLib.ttFont import TTFont
 from fontTools.ttLib.sfnt import readTTCHeader, writeTTCHeader
 import struct
@@ -31,8 +32,20 @@ class TTCollection(object):
 
 		tableCache = {} if shareTables else None
 
-		header = readTTCHeader(file)
-		for i in range(header.numFonts):
+		file.seek(0)
+		if file.read(4) == b"wOF2":
+			# WOFF2 collections have no TTC header; the number of fonts is
+			# read from the collection directory of the first one
+			font = TTFont(file, fontNumber=0, _tableCache=tableCache, **kwargs)
+			fonts.append(font)
+			numFonts = getattr(font.reader, "numFonts", None)
+			if numFonts is None:
+				raise TTLibError("Not a Font Collection")
+			first = 1
+		else:
+			numFonts = readTTCHeader(file).numFonts
+			first = 0
+		for i in range(first, numFonts):
 			font = TTFont(file, fontNumber=i, _tableCache=tableCache, **kwargs)
 			fonts.append(font)
 			
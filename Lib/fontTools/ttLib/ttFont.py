@@ -3,6 +3,7 @@ from fontTools.misc.py23 import *
 from fontTools.misc.loggingTools import deprecateArgument
 from fontTools.ttLib import TTLibError
 from fontTools.ttLib.sfnt import SFNTReader, SFNTWriter
+import hashlib
 import os
 import logging
 import itertools
@@ -17,6 +18,9 @@ class TTFont(object):
 	accessed. This means that simple operations can be extremely fast.
 	"""
 
+	# tags looked up while compiling a table, see _compileSharedTable()
+	_compileReads = None
+
 	def __init__(self, file=None, res_name_or_index=None,
 			sfntVersion="\000\001\000\000", flavor=None, checkChecksums=False,
 			verbose=None, recalcBBoxes=True, allowVID=False, ignoreDecompileErrors=False,
@@ -158,7 +162,8 @@ class TTFont(object):
 		file object.
 		"""
 		if not hasattr(file, "write"):
-			if self.lazy and self.reader.file.name == file:
+			if (self.lazy and
+					getattr(self.reader.file, "name", None) == file):
 				raise TTLibError(
 					"Can't overwrite TTFont when 'lazy' attribute is True")
 			closeStream = True
@@ -167,34 +172,30 @@ class TTFont(object):
 			# assume "file" is a writable file object
 			closeStream = False
 
-		tmp = BytesIO()
-
-		writer_reordersTables = self._save(tmp)
-
-		if (reorderTables is None or writer_reordersTables or
-				(reorderTables is False and self.reader is None)):
+		if reorderTables is None or (reorderTables is False and self.reader is None):
 			# don't reorder tables and save as is
-			file.write(tmp.getvalue())
-			tmp.close()
+			tableOrder = False
+		elif reorderTables is False:
+			# sort tables using the original font's order
+			tableOrder = list(self.reader.keys())
 		else:
-			if reorderTables is False:
-				# sort tables using the original font's order
-				tableOrder = list(self.reader.keys())
-			else:
-				# use the recommended order from the OpenType specification
-				tableOrder = None
-			tmp.flush()
-			tmp2 = BytesIO()
-			reorderFontTables(tmp, tmp2, tableOrder)
-			file.write(tmp2.getvalue())
-			tmp.close()
-			tmp2.close()
+			# use the recommended order from the OpenType specification
+			tableOrder = None
+
+		# write to a temporary stream to allow saving to unseekable streams
+		tmp = BytesIO()
+		self._save(tmp, tableOrder=tableOrder)
+		file.write(tmp.getvalue())
+		tmp.close()
 
 		if closeStream:
 			file.close()
 
-	def _save(self, file, tableCache=None):
-		"""Internal function, to be shared by save() and TTCollection.save()"""
+	def _save(self, file, tableCache=None, tableOrder=False):
+		"""Internal function, to be shared by save() and TTCollection.save().
+		Unless 'tableOrder' is False, the tables are written in the order
+		returned by sortedTagList(tags, tableOrder), if the writer doesn't
+		reorder them itself."""
 
 		if self.recalcTimestamp and 'head' in self:
 			self['head']  # make sure 'head' is loaded so the recalculation is actually done
@@ -203,12 +204,27 @@ class TTFont(object):
 		if "GlyphOrder" in tags:
 			tags.remove("GlyphOrder")
 		numTables = len(tags)
-		# write to a temporary stream to allow saving to unseekable streams
 		writer = SFNTWriter(file, numTables, self.sfntVersion, self.flavor, self.flavorData)
 
 		done = []
-		for tag in tags:
-			self._writeTable(tag, writer, done, tableCache)
+		if tableOrder is False or tableCache is not None or writer.reordersTables():
+			sharing = None
+			if (
+				tableCache is not None
+				and hasattr(self, "glyphOrder")
+				and any(self.isLoaded(tag) for tag in tags)
+			):
+				sharing = self._tableSharingInfo(tags)
+			for tag in tags:
+				self._writeTable(tag, writer, done, tableCache, sharing)
+		else:
+			# compile the tables in dependency order first, so that they
+			# are written (and checksummed) once, in the right order
+			tables = {}
+			for tag in tags:
+				self._writeTable(tag, tables, done, tableCache)
+			for tag in sortedTagList(tags, tableOrder):
+				writer[tag] = tables[tag]
 
 		writer.close()
 
@@ -337,6 +353,8 @@ class TTFont(object):
 	def isLoaded(self, tag):
 		"""Return true if the table identified by 'tag' has been
 		decompiled and loaded into memory."""
+		if self._compileReads is not None:
+			self._compileReads.add(tag)
 		return tag in self.tables
 
 	def has_key(self, tag):
@@ -368,6 +386,8 @@ class TTFont(object):
 
 	def __getitem__(self, tag):
 		tag = Tag(tag)
+		if self._compileReads is not None:
+			self._compileReads.add(tag)
 		try:
 			return self.tables[tag]
 		except KeyError:
@@ -380,7 +400,8 @@ class TTFont(object):
 				log.debug("Reading '%s' table from disk", tag)
 				data = self.reader[tag]
 				if self._tableCache is not None:
-					table = self._tableCache.get((Tag(tag), data))
+					cacheKey = _tableCacheKey(tag, data)
+					table = self._tableCache.get(cacheKey)
 					if table is not None:
 						return table
 				tableClass = getTableClass(tag)
@@ -403,7 +424,7 @@ class TTFont(object):
 					self.tables[tag] = table
 					table.decompile(data, self)
 				if self._tableCache is not None:
-					self._tableCache[(Tag(tag), data)] = table
+					self._tableCache[cacheKey] = table
 				return table
 			else:
 				raise KeyError("'%s' table not found" % tag)
@@ -453,6 +474,54 @@ class TTFont(object):
 		return self.glyphOrder
 
 	def _getGlyphNamesFromCmap(self):
+		# Make up glyph names based on glyphID, which will be used for the
+		# glyphs we don't find a unicode value for.
+		numGlyphs = int(self['maxp'].numGlyphs)
+		glyphOrder = ["glyph%.5d" % i for i in range(numGlyphs)]
+		glyphOrder[0] = ".notdef"
+
+		# Make up glyph names based on the reversed cmap table. Because some
+		# glyphs (eg. ligatures or alternates) may not be reachable via cmap,
+		# this naming table will usually not cover all glyphs in the font.
+		# If the font has no Unicode cmap table, reversecmap will be empty.
+		# If possible, the reversed cmap is read from the raw cmap data,
+		# without decompiling the table with temporary glyph names.
+		reversecmap = None
+		if self.reader is not None and 'cmap' in self.reader:
+			from fontTools.ttLib.tables._c_m_a_p import table__c_m_a_p
+			reversecmap = table__c_m_a_p.buildReversedGlyphIDs(
+				self.reader['cmap'])
+		if reversecmap is None:
+			reversecmap = self._buildReversedCmapByGlyphID(glyphOrder)
+		else:
+			self.glyphOrder = glyphOrder
+
+		from fontTools import agl  # Adobe Glyph List
+		UV2AGL = agl.UV2AGL
+		useCount = {}
+		for glyphID in sorted(reversecmap):
+			if glyphID >= numGlyphs:
+				continue
+			# If a font maps both U+0041 LATIN CAPITAL LETTER A and
+			# U+0391 GREEK CAPITAL LETTER ALPHA to the same glyph,
+			# we prefer naming the glyph as "A".
+			# (same as self._makeGlyphName(), without importing agl each time)
+			codepoint = reversecmap[glyphID]
+			if codepoint in UV2AGL:
+				glyphName = UV2AGL[codepoint]
+			elif codepoint <= 0xFFFF:
+				glyphName = "uni%04X" % codepoint
+			else:
+				glyphName = "u%X" % codepoint
+			numUses = useCount[glyphName] = useCount.get(glyphName, 0) + 1
+			if numUses > 1:
+				glyphName = "%s.alt%d" % (glyphName, numUses - 1)
+			glyphOrder[glyphID] = glyphName
+
+	def _buildReversedCmapByGlyphID(self, glyphOrder):
+		"""Return a dict mapping glyph IDs to the smallest codepoint the
+		decompiled cmap table maps to them, using 'glyphOrder' as glyph order
+		while decompiling it."""
 		#
 		# This is rather convoluted, but then again, it's an interesting problem:
 		# - we need to use the unicode values found in the cmap table to
@@ -477,48 +546,25 @@ class TTFont(object):
 			del self.tables['cmap']
 		else:
 			cmapLoading = None
-		# Make up glyph names based on glyphID, which will be used by the
-		# temporary cmap and by the real cmap in case we don't find a unicode
-		# cmap.
-		numGlyphs = int(self['maxp'].numGlyphs)
-		glyphOrder = [None] * numGlyphs
-		glyphOrder[0] = ".notdef"
-		for i in range(1, numGlyphs):
-			glyphOrder[i] = "glyph%.5d" % i
 		# Set the glyph order, so the cmap parser has something
 		# to work with (so we don't get called recursively).
 		self.glyphOrder = glyphOrder
 
-		# Make up glyph names based on the reversed cmap table. Because some
-		# glyphs (eg. ligatures or alternates) may not be reachable via cmap,
-		# this naming table will usually not cover all glyphs in the font.
-		# If the font has no Unicode cmap table, reversecmap will be empty.
-		if 'cmap' in self:
-			reversecmap = self['cmap'].buildReversed()
-		else:
-			reversecmap = {}
-		useCount = {}
-		for i in range(numGlyphs):
-			tempName = glyphOrder[i]
-			if tempName in reversecmap:
-				# If a font maps both U+0041 LATIN CAPITAL LETTER A and
-				# U+0391 GREEK CAPITAL LETTER ALPHA to the same glyph,
-				# we prefer naming the glyph as "A".
-				glyphName = self._makeGlyphName(min(reversecmap[tempName]))
-				numUses = useCount[glyphName] = useCount.get(glyphName, 0) + 1
-				if numUses > 1:
-					glyphName = "%s.alt%d" % (glyphName, numUses - 1)
-				glyphOrder[i] = glyphName
-
+		reversecmap = {}
 		if 'cmap' in self:
+			nameToGlyphID = {glyphName: glyphID
+				for glyphID, glyphName in enumerate(glyphOrder)}
+			for tempName, codepoints in self['cmap'].buildReversed().items():
+				if tempName in nameToGlyphID:
+					reversecmap[nameToGlyphID[tempName]] = min(codepoints)
 			# Delete the temporary cmap table from the cache, so it can
 			# be parsed again with the right names.
 			del self.tables['cmap']
-			self.glyphOrder = glyphOrder
 			if cmapLoading:
 				# restore partially loaded cmap, so it can continue loading
 				# using the proper names.
 				self.tables['cmap'] = cmapLoading
+		return reversecmap
 
 	@staticmethod
 	def _makeGlyphName(codepoint):
@@ -615,7 +661,7 @@ class TTFont(object):
 		for glyphID in range(len(glyphOrder)):
 			d[glyphOrder[glyphID]] = glyphID
 
-	def _writeTable(self, tag, writer, done, tableCache=None):
+	def _writeTable(self, tag, writer, done, tableCache=None, sharing=None):
 		"""Internal helper function for self.save(). Keeps track of
 		inter-table dependencies.
 		"""
@@ -625,13 +671,17 @@ class TTFont(object):
 		for masterTable in tableClass.dependencies:
 			if masterTable not in done:
 				if masterTable in self:
-					self._writeTable(masterTable, writer, done, tableCache)
+					self._writeTable(masterTable, writer, done, tableCache, sharing)
 				else:
 					done.append(masterTable)
 		done.append(tag)
-		tabledata = self.getTableData(tag)
+		if sharing is not None and self.isLoaded(tag):
+			tabledata = self._compileSharedTable(tag, tableCache, sharing)
+		else:
+			tabledata = self.getTableData(tag)
 		if tableCache is not None:
-			entry = tableCache.get((Tag(tag), tabledata))
+			cacheKey = _tableCacheKey(tag, tabledata)
+			entry = tableCache.get(cacheKey)
 			if entry is not None:
 				log.debug("reusing '%s' table", tag)
 				writer.setEntry(tag, entry)
@@ -639,7 +689,67 @@ class TTFont(object):
 		log.debug("writing '%s' table to disk", tag)
 		writer[tag] = tabledata
 		if tableCache is not None:
-			tableCache[(Tag(tag), tabledata)] = writer[tag]
+			tableCache[cacheKey] = writer[tag]
+
+	def _tableSharingInfo(self, tags):
+		"""Return the fingerprint of the glyph order and compile options, and a
+		dict mapping each of 'tags' to the tags of the tables it depends on, or
+		which depend on it, for _compileSharedTable()."""
+		glyphOrderKey = (
+			hashlib.sha256("\0".join(self.glyphOrder).encode("utf-8")).digest(),
+			self.recalcBBoxes,
+			self.recalcTimestamp,
+		)
+		relatedTags = {tag: set(getTableClass(tag).dependencies) for tag in tags}
+		for tag in tags:
+			for masterTable in getTableClass(tag).dependencies:
+				if masterTable in relatedTags:
+					relatedTags[masterTable].add(tag)
+		return glyphOrderKey, {
+			tag: sorted(related) for tag, related in relatedTags.items()
+		}
+
+	def _compileSharedTable(self, tag, tableCache, sharing):
+		"""Compile the loaded table 'tag', unless the same table object was
+		compiled while saving a previous font with the same 'tableCache', with
+		the same glyph order and the same objects for the related tables, whose
+		compilation may update this table or be updated by it, and for all the
+		tables that compiling it looked up in the font."""
+		glyphOrderKey, relatedTags = sharing
+
+		def compileKey():
+			return (glyphOrderKey, id(self.tables[tag])) + tuple(
+				id(self.tables.get(t)) for t in relatedTags[tag])
+
+		def readState(readTags):
+			return tuple(
+				(id(self.tables.get(t)), self.reader is not None and t in self.reader)
+				for t in readTags)
+
+		key = compileKey()
+		entry = tableCache.get(key)
+		if entry is not None:
+			readTags, state, tabledata = entry
+			if readState(readTags) == state:
+				log.debug("reusing compiled '%s' table", tag)
+				return tabledata
+		log.debug("compiling '%s' table", tag)
+		# record the tables that compile() looks up, e.g. OS/2 reads cmap
+		# to update its first and last char indices
+		outerReads = self._compileReads
+		self._compileReads = set()
+		try:
+			tabledata = self.tables[tag].compile(self)
+		finally:
+			readTags = sorted(self._compileReads)
+			self._compileReads = outerReads
+		if outerReads is not None:
+			outerReads.update(readTags)
+		# only if compiling didn't load related tables, which the fonts
+		# reusing the data wouldn't have loaded
+		if compileKey() == key:
+			tableCache[key] = (readTags, readState(readTags), tabledata)
+		return tabledata
 
 	def getTableData(self, tag):
 		"""Returns raw table data, whether compiled or directly read from disk.
@@ -654,6 +764,87 @@ class TTFont(object):
 		else:
 			raise KeyError(tag)
 
+	def ensureDecompiled(self, workers=None):
+		"""Decompile all the tables of the font, and expand all the glyphs of
+		the 'glyf' table, so that reading the font doesn't decompile anything
+		any more.
+
+		If 'workers' is greater than 1, the 'glyf' glyphs and the big tables
+		listed in _parallelDecompileTags are decompiled in that many worker
+		processes, while the other tables are decompiled in this one.
+		"""
+		tags = [tag for tag in self.keys() if tag != "GlyphOrder"]
+		if self.reader is not None:
+			self.getGlyphOrder()
+			if (workers is not None and workers > 1 and not self.lazy
+					and self._tableCache is None):
+				self._decompileParallel(tags, workers)
+		for tag in tags:
+			self[tag]
+		if self.isLoaded("glyf"):
+			glyfTable = self["glyf"]
+			for glyph in glyfTable.glyphs.values():
+				glyph.expand(glyfTable)
+
+	def _decompileParallel(self, tags, workers):
+		"""Internal helper function for self.ensureDecompiled(). Tables that
+		fail to decompile in a worker are left for ensureDecompiled() to
+		decompile, or to report the error.
+		"""
+		from concurrent.futures import ProcessPoolExecutor
+
+		glyphOrder = self.getGlyphOrder()
+		remoteTags = [
+			tag for tag in _parallelDecompileTags
+			if tag in tags and not self.isLoaded(tag)
+		]
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			futures = []
+			for tag in remoteTags:
+				tableData = [
+					(t, self.reader[t])
+					for t in _getDecompileDependencies(tag) + [tag]
+				]
+				futures.append((tag, executor.submit(
+					_decompileTables, self.sfntVersion, glyphOrder, self.lazy,
+					tableData)))
+			glyphFutures = []
+			if "glyf" in tags:
+				glyfTable = self["glyf"]
+				glyphNames = []
+				glyphData = []
+				for glyphName in glyfTable.keys():
+					data = glyfTable._getCompactGlyphData(glyphName)
+					if data:
+						glyphNames.append(glyphName)
+						glyphData.append(data)
+				chunkSize = max(1, -(-len(glyphNames) // (workers * 4)))
+				for i in range(0, len(glyphNames), chunkSize):
+					chunk = glyphNames[i:i + chunkSize]
+					glyphFutures.append((chunk, executor.submit(
+						_expandGlyphs, glyfTable.glyphOrder,
+						glyphData[i:i + chunkSize])))
+
+			# meanwhile decompile the tables that don't need the remote ones
+			for tag in tags:
+				if tag in remoteTags:
+					continue
+				if any(t in remoteTags for t in _getDecompileDependencies(tag)):
+					continue
+				self[tag]
+
+			for chunk, future in glyphFutures:
+				for glyphName, glyph in zip(chunk, future.result()):
+					glyfTable[glyphName] = glyph
+			for tag, future in futures:
+				try:
+					table = future.result()
+				except Exception:
+					log.debug("Decompiling '%s' table in a worker failed", tag)
+					continue
+				if not self.isLoaded(tag):
+					self.tables[tag] = table
+
 	def getGlyphSet(self, preferCFF=True):
 		"""Return a generic GlyphSet, which is a dict-like object
 		mapping glyph names to glyph objects. The returned glyph objects
@@ -953,6 +1144,66 @@ TTFTableOrder = ["head", "hhea", "maxp", "OS/2", "hmtx", "LTSH", "VDMX",
 OTFTableOrder = ["head", "hhea", "maxp", "OS/2", "name", "cmap", "post",
 				"CFF "]
 
+# The tables read by the decompile() method of other tables, besides the ones
+# the glyph order comes from.
+_decompileDependencies = {
+	"loca": ["head", "maxp"],
+	"glyf": ["loca"],
+	"hmtx": ["hhea", "maxp"],
+	"vmtx": ["vhea", "maxp"],
+	"hdmx": ["maxp"],
+	"post": ["maxp"],
+	"gvar": ["fvar", "glyf"],
+	"cvar": ["fvar"],
+	"avar": ["fvar"],
+	"HVAR": ["fvar"],
+	"VVAR": ["fvar"],
+	"MVAR": ["fvar"],
+}
+
+# The tables that TTFont.ensureDecompiled() decompiles in worker processes.
+_parallelDecompileTags = ["gvar", "GDEF", "GSUB", "GPOS"]
+
+def _getDecompileDependencies(tag):
+	"""Return the tables that must be decompiled before 'tag', in the order
+	they must be decompiled."""
+	result = []
+	for masterTable in _decompileDependencies.get(tag, []):
+		for t in _getDecompileDependencies(masterTable) + [masterTable]:
+			if t not in result:
+				result.append(t)
+	return result
+
+def _decompileTables(sfntVersion, glyphOrder, lazy, tableData):
+	"""Decompile the (tag, data) pairs of 'tableData' in order, and return the
+	last table. Runs in the worker processes of TTFont.ensureDecompiled()."""
+	font = TTFont(sfntVersion=sfntVersion, lazy=lazy)
+	font.setGlyphOrder(glyphOrder)
+	for tag, data in tableData:
+		table = newTable(tag)
+		font[tag] = table
+		table.decompile(data, font)
+	return table
+
+def _expandGlyphs(glyphOrder, glyphData):
+	"""Return the expanded 'glyf' glyphs of 'glyphData'. Runs in the worker
+	processes of TTFont.ensureDecompiled()."""
+	from fontTools.ttLib.tables._g_l_y_f import Glyph
+	glyfTable = newTable("glyf")
+	glyfTable.glyphOrder = glyphOrder
+	glyphs = []
+	for data in glyphData:
+		glyph = Glyph(data)
+		glyph.expand(glyfTable)
+		glyphs.append(glyph)
+	return glyphs
+
+def _tableCacheKey(tag, data):
+	"""Key of the tables shared between the fonts of a collection, by content
+	hash rather than by data, so the cache doesn't hold on to the data."""
+	return Tag(tag), hashlib.sha256(data).digest()
+
+
 def sortedTagList(tagList, tableOrder=None):
 	"""Return a sorted copy of tagList, sorted according to the OpenType
 	specification, or according to a custom tableOrder. If given and not
@@ -991,6 +1242,29 @@ def reorderFontTables(inFile, outFile, tableOrder=None, checkChecksums=False):
 	writer.close()
 
 
+def transcodeFont(inFile, outFile, flavor=None, flavorData=None, tableOrder=None):
+	"""Rewrite a font file as a plain SFNT font (if 'flavor' is None), or as
+	a "woff" or "woff2" font, copying the raw table data without decompiling
+	the tables; only the WOFF2 transforms of the glyf, loca and hmtx tables
+	are applied or reverted where needed. 'flavorData' defaults to that of
+	the input font. The files can be in-memory buffers, eg. BytesIO.
+	"""
+	inFile.seek(0)
+	outFile.seek(0)
+	reader = SFNTReader(inFile, checkChecksums=False)
+	if flavorData is None:
+		flavorData = reader.flavorData
+	if flavor == "woff2" and reader.flavor == "woff2":
+		from fontTools.ttLib.woff2 import rewriteWOFF2
+		if rewriteWOFF2(reader, outFile, flavorData):
+			return
+	tags = sortedTagList(reader.keys(), tableOrder)
+	writer = SFNTWriter(outFile, len(tags), reader.sfntVersion, flavor, flavorData)
+	for tag in tags:
+		writer[tag] = reader[tag]
+	writer.close()
+
+
 def maxPowerOfTwo(x):
 	"""Return the highest exponent of two, so that
 	(2 ** exponent) <= x.  Return 0 if x is 0.
@@ -3,15 +3,17 @@ import sys
 import array
 import struct
 from collections import OrderedDict
+from itertools import accumulate, groupby
 from fontTools.misc import sstruct
 from fontTools.misc.arrayTools import calcIntBounds
 from fontTools.misc.textTools import pad
 from fontTools.ttLib import (TTFont, TTLibError, getTableModule, getTableClass,
-	getSearchRange)
+	getSearchRange, transcodeFont)
 from fontTools.ttLib.sfnt import (SFNTReader, SFNTWriter, DirectoryEntry,
 	WOFFFlavorData, sfntDirectoryFormat, sfntDirectorySize, SFNTDirectoryEntry,
-	sfntDirectoryEntrySize, calcChecksum)
-from fontTools.ttLib.tables import ttProgram
+	sfntDirectoryEntrySize, calcChecksum, ttcHeaderSize)
+from fontTools.ttLib.tables._g_l_y_f import (flagOnCurve, flagXShort,
+	flagYShort, flagRepeat, flagXsame, flagYsame, keepFlags)
 import logging
 
 
@@ -24,6 +26,11 @@ try:
 except ImportError:
 	pass
 
+# default Brotli compression quality (0 to 11), and base 2 logarithm of the
+# Brotli window size (10 to 24), for WOFF2 font data and metadata
+BROTLI_QUALITY = 11
+BROTLI_WINDOW = 22
+
 
 class WOFF2Reader(SFNTReader):
 
@@ -49,16 +56,30 @@ class WOFF2Reader(SFNTReader):
 			raise TTLibError('Not a WOFF2 font (not enough data)')
 		sstruct.unpack(woff2DirectoryFormat, data, self)
 
-		self.tables = OrderedDict()
+		entries = []
 		offset = 0
 		for i in range(self.numTables):
 			entry = self.DirectoryEntry()
 			entry.fromFile(self.file)
-			tag = Tag(entry.tag)
-			self.tables[tag] = entry
+			entries.append(entry)
 			entry.offset = offset
 			offset += entry.length
 
+		if self.sfntVersion == "ttcf":
+			# only the tables of the requested font of the collection are read
+			fonts = self._readCollectionDirectory()
+			numFonts = len(fonts)
+			if not 0 <= fontNumber < numFonts:
+				raise TTLibError("specify a font number between 0 and %d (inclusive)" % (numFonts - 1))
+			self.numFonts = numFonts
+			self.sfntVersion, indices = fonts[fontNumber]
+			try:
+				entries = [entries[i] for i in indices]
+			except IndexError:
+				raise TTLibError("bad table index in WOFF2 collection directory")
+			self.numTables = len(entries)
+		self.tables = OrderedDict((Tag(entry.tag), entry) for entry in entries)
+
 		totalUncompressedSize = offset
 		compressedData = self.file.read(self.totalCompressedSize)
 		decompressedData = brotli.decompress(compressedData)
@@ -77,6 +98,32 @@ class WOFF2Reader(SFNTReader):
 		# make empty TTFont to store data while reconstructing tables
 		self.ttFont = TTFont(recalcBBoxes=False, recalcTimestamp=False)
 
+	def _readCollectionDirectory(self):
+		"""Read the collection directory following the table directory, and
+		return the list of the sfntVersion and table indices of each font."""
+		pos = self.file.tell()
+		data = self.file.read()
+		if len(data) < 4:
+			raise TTLibError("not enough WOFF2 collection directory data")
+		version, = struct.unpack(">L", data[:4])
+		if version not in (0x00010000, 0x00020000):
+			raise TTLibError("unrecognized WOFF2 collection version 0x%08x" % version)
+		numFonts, offset = _unpack255UShortAt(data, 4)
+		fonts = []
+		for i in range(numFonts):
+			numTables, offset = _unpack255UShortAt(data, offset)
+			if offset + 4 > len(data):
+				raise TTLibError("not enough WOFF2 collection directory data")
+			sfntVersion = Tag(data[offset:offset + 4])
+			offset += 4
+			indices = []
+			for j in range(numTables):
+				index, offset = _unpack255UShortAt(data, offset)
+				indices.append(index)
+			fonts.append((sfntVersion, indices))
+		self.file.seek(pos + offset)
+		return fonts
+
 	def __getitem__(self, tag):
 		"""Fetch the raw table data. Reconstruct transformed tables."""
 		entry = self.tables[Tag(tag)]
@@ -185,6 +232,8 @@ class WOFF2Writer(SFNTWriter):
 		self.transformBuffer = BytesIO()
 
 		self.tables = OrderedDict()
+		# the collection directory follows the table directory in collections
+		self.collectionDirectory = b""
 
 		# make empty TTFont to store data while normalising and transforming tables
 		self.ttFont = TTFont(recalcBBoxes=False, recalcTimestamp=False)
@@ -213,6 +262,25 @@ class WOFF2Writer(SFNTWriter):
 		if len(self.tables) != self.numTables:
 			raise TTLibError("wrong number of tables; expected %d, found %d" % (self.numTables, len(self.tables)))
 
+		self._prepareTables()
+
+		# To pass the legacy OpenType Sanitiser currently included in browsers,
+		# we must sort the table directory and data alphabetically by tag.
+		# See:
+		# https://github.com/google/woff2/pull/3
+		# https://lists.w3.org/Archives/Public/public-webfonts-wg/2015Mar/0000.html
+		# TODO(user): remove to match spec once browsers are on newer OTS
+		self.tables = OrderedDict(sorted(self.tables.items()))
+
+		self.totalSfntSize = self._calcSFNTChecksumsLengthsAndOffsets()
+
+		fontData = self._transformTables()
+		self._writeFont(fontData)
+
+	def _prepareTables(self):
+		""" Normalise the glyf and loca tables if they are to be transformed, and
+		set the 'head' table's transform flag.
+		"""
 		if self.sfntVersion in ("\x00\x01\x00\x00", "true"):
 			isTrueType = True
 		elif self.sfntVersion == "OTTO":
@@ -234,18 +302,13 @@ class WOFF2Writer(SFNTWriter):
 			self._normaliseGlyfAndLoca(padding=4)
 		self._setHeadTransformFlag()
 
-		# To pass the legacy OpenType Sanitiser currently included in browsers,
-		# we must sort the table directory and data alphabetically by tag.
-		# See:
-		# https://github.com/google/woff2/pull/3
-		# https://lists.w3.org/Archives/Public/public-webfonts-wg/2015Mar/0000.html
-		# TODO(user): remove to match spec once browsers are on newer OTS
-		self.tables = OrderedDict(sorted(self.tables.items()))
-
-		self.totalSfntSize = self._calcSFNTChecksumsLengthsAndOffsets()
-
-		fontData = self._transformTables()
-		compressedFont = brotli.compress(fontData, mode=brotli.MODE_FONT)
+	def _writeFont(self, fontData):
+		""" Compress the transformed font data, and write it along with the
+		directory and the flavor data.
+		"""
+		compressedFont = brotli.compress(
+			fontData, mode=brotli.MODE_FONT,
+			quality=self.flavorData.brotliQuality, lgwin=self.flavorData.brotliWindow)
 
 		self.totalCompressedSize = len(compressedFont)
 		self.length = self._calcTotalSize()
@@ -265,12 +328,31 @@ class WOFF2Writer(SFNTWriter):
 		if self.sfntVersion == "OTTO":
 			return
 
-		for tag in ('maxp', 'head', 'loca', 'glyf'):
+		for tag in ('maxp', 'head', 'loca'):
 			self._decompileTable(tag)
+		if self._isNormalised(padding):
+			# recompiling would give the same glyf and loca data
+			return
+		self._decompileTable('glyf')
 		self.ttFont['glyf'].padding = padding
 		for tag in ('glyf', 'loca'):
 			self._compileTable(tag)
 
+	def _isNormalised(self, padding):
+		""" Return whether the glyph offsets are already aligned to multiples of
+		'padding' size, with the loca format that compiling would choose. """
+		locations = self.ttFont['loca'].locations
+		if padding % 2 or len(locations) != self.ttFont['maxp'].numGlyphs + 1:
+			return False
+		end = locations[-1]
+		if not 0 < end == len(self.tables['glyf'].data):
+			return False
+		if any(l % padding for l in locations):
+			return False
+		if any(a > b for a, b in zip(locations, locations[1:])):
+			return False
+		return self.ttFont['head'].indexToLocFormat == (end >= 0x20000)
+
 	def _setHeadTransformFlag(self):
 		""" Set bit 11 of 'head' table flags to indicate that the font has undergone
 		a lossless modifying transform. Re-compile head table data."""
@@ -399,6 +481,7 @@ class WOFF2Writer(SFNTWriter):
 		offset = self.directorySize
 		for entry in self.tables.values():
 			offset += len(entry.toString())
+		offset += len(self.collectionDirectory)
 		offset += self.totalCompressedSize
 		offset = (offset + 3) & ~3
 		offset = self._calcFlavorDataOffsetsAndSize(offset)
@@ -412,7 +495,8 @@ class WOFF2Writer(SFNTWriter):
 			self.metaOrigLength = len(data.metaData)
 			self.metaOffset = offset
 			self.compressedMetaData = brotli.compress(
-				data.metaData, mode=brotli.MODE_TEXT)
+				data.metaData, mode=brotli.MODE_TEXT,
+				quality=data.brotliQuality, lgwin=data.brotliWindow)
 			self.metaLength = len(self.compressedMetaData)
 			offset += self.metaLength
 		else:
@@ -445,7 +529,7 @@ class WOFF2Writer(SFNTWriter):
 		directory = sstruct.pack(self.directoryFormat, self)
 		for entry in self.tables.values():
 			directory = directory + entry.toString()
-		return directory
+		return directory + self.collectionDirectory
 
 	def _writeFlavorData(self):
 		"""Write metadata and/or private data using appropiate padding."""
@@ -466,6 +550,143 @@ class WOFF2Writer(SFNTWriter):
 		return True
 
 
+class WOFF2CollectionWriter(WOFF2Writer):
+
+	"""Writer of WOFF2 font collections.
+
+	The fonts are added with addFont(), and stored when the writer is closed.
+	Tables with the same data in several fonts are only stored once; for the
+	transformed tables, the tables they are reconstructed from must be the
+	same too.
+	"""
+
+	def __init__(self, file, flavorData=None):
+		super(WOFF2CollectionWriter, self).__init__(
+			file, 0, sfntVersion="ttcf", flavorData=flavorData)
+		self.fonts = []
+
+	def __setitem__(self, tag, data):
+		raise TTLibError("tables of WOFF2 collections are added with addFont()")
+
+	def addFont(self, sfntVersion, tables):
+		"""Add a font, given its 'sfntVersion' and a dict of raw table data
+		keyed by tag."""
+		writer = WOFF2Writer(
+			BytesIO(), len(tables), sfntVersion, flavorData=self.flavorData)
+		for tag, data in tables.items():
+			writer[tag] = data
+		writer._prepareTables()
+		writer.tables = OrderedDict(sorted(writer.tables.items()))
+		self.fonts.append(writer)
+
+	def close(self):
+		"""Write the tables of all the fonts, the table and collection
+		directories, and the flavor data."""
+		if not self.fonts:
+			raise TTLibError("a WOFF2 collection must contain at least one font")
+		transformedTables = self.flavorData.transformedTables
+		entries = OrderedDict()
+		owners = []
+		self.fontIndices = []
+		for writer in self.fonts:
+			indices = []
+			for tag, key in self._tableKeys(writer):
+				if key not in entries:
+					entries[key] = len(owners), writer.tables[tag]
+					owners.append((writer, tag))
+					if tag == "glyf" and tag in transformedTables:
+						# the 'loca' table of a transformed 'glyf' must
+						# immediately follow it in the table directory
+						locaKey = ("loca",) + key[1:]
+						entries[locaKey] = len(owners), writer.tables["loca"]
+						owners.append((writer, "loca"))
+				index, entry = entries[key]
+				# the font's writer uses the shared entries from now on
+				writer.tables[tag] = entry
+				indices.append(index)
+			self.fontIndices.append(indices)
+
+		self.tables = OrderedDict(entries.values())
+		self.numTables = len(self.tables)
+		self.totalSfntSize = self._calcCollectionLayout()
+
+		for (writer, tag), entry in zip(owners, self.tables.values()):
+			data = None
+			if tag in transformedTables:
+				data = writer.transformTable(tag)
+				if data is not None:
+					entry.transformed = True
+			if data is None:
+				# pass-through the table data without transformation
+				data = entry.data
+				entry.transformed = False
+			entry.offset = self.nextTableOffset
+			entry.saveData(self.transformBuffer, data)
+			self.nextTableOffset += entry.length
+
+		# a 'head' table shared by several fonts gets the checkSumAdjustment
+		# of the first of them
+		heads = set()
+		for writer in self.fonts:
+			head = writer.tables.get("head")
+			if head is not None and id(head) not in heads:
+				heads.add(id(head))
+				self.transformBuffer.seek(head.offset + 8)
+				self.transformBuffer.write(
+					struct.pack(">L", writer._calcMasterChecksum()))
+
+		self.collectionDirectory = self._packCollectionDirectory()
+		self._writeFont(self.transformBuffer.getvalue())
+
+	def _tableKeys(self, writer):
+		"""Yield the tag of each table of the font of 'writer', along with the
+		key of the tables it can be shared with."""
+		transformedTables = self.flavorData.transformedTables
+		tables = writer.tables
+		for tag, entry in tables.items():
+			key = (tag, entry.data)
+			if tag in transformedTables and tag in ("glyf", "loca", "hmtx"):
+				key = (tag,) + tuple(
+					tables[t].data for t in ("glyf", "loca", "hhea", "hmtx")
+					if t in tables)
+			yield tag, key
+
+	def _calcCollectionLayout(self):
+		"""Compute the 'original' checksums, lengths and offsets of the tables,
+		laid out in a TTC the way TTCollection.save does. Return the total size
+		of the uncompressed collection.
+		"""
+		for entry in self.tables.values():
+			data = entry.data
+			entry.origLength = len(data)
+			if entry.tag == 'head':
+				entry.checkSum = calcChecksum(data[:8] + b'\0\0\0\0' + data[12:])
+			else:
+				entry.checkSum = calcChecksum(data)
+		offset = ttcHeaderSize + 4 * len(self.fonts)
+		done = set()
+		for writer in self.fonts:
+			offset += sfntDirectorySize + sfntDirectoryEntrySize * len(writer.tables)
+			for entry in writer.tables.values():
+				if id(entry) not in done:
+					done.add(id(entry))
+					entry.origOffset = offset
+					offset += (entry.origLength + 3) & ~3
+		return offset
+
+	def _packCollectionDirectory(self):
+		"""Return WOFF2 collection directory data."""
+		data = [struct.pack(">L", 0x00010000), pack255UShort(len(self.fonts))]
+		for writer, indices in zip(self.fonts, self.fontIndices):
+			data.append(pack255UShort(len(indices)))
+			data.append(writer.sfntVersion.tobytes())
+			data.extend(pack255UShort(index) for index in indices)
+		return b"".join(data)
+
+	def _getVersion(self):
+		return self.fonts[0]._getVersion()
+
+
 # -- woff2 directory helpers and cruft
 
 woff2DirectoryFormat = """
@@ -543,6 +764,206 @@ bboxFormat = """
 """
 
 
+def _buildTripletTables():
+	"""Return the number of bytes of the triplet for each flag value, as a
+	bytes.translate table, and the decoding parameters of each flag value
+	(with the on-curve bit cleared).
+
+	Each triplet is read as a big-endian integer v, from which
+	dx = xSign * (xBase + ((v >> xShift) & xMask)) and
+	dy = ySign * (yBase + (v & yMask)).
+	"""
+	sizes = bytearray()
+	decoding = []
+	for flag in range(128):
+		xSign = 1 if flag & 1 else -1
+		ySign = 1 if flag & 2 else -1
+		if flag < 10:
+			entry = (1, 0, 0, 0, 0, 0xff, (flag & 14) << 7, xSign)
+		elif flag < 20:
+			entry = (1, 0, 0xff, ((flag - 10) & 14) << 7, xSign, 0, 0, 0)
+		elif flag < 84:
+			b0 = flag - 20
+			entry = (1, 4, 0x0f, 1 + (b0 & 0x30), xSign, 0x0f, 1 + ((b0 & 0x0c) << 2), ySign)
+		elif flag < 120:
+			b0 = flag - 84
+			entry = (2, 8, 0xff, 1 + ((b0 // 12) << 8), xSign,
+				0xff, 1 + (((b0 % 12) >> 2) << 8), ySign)
+		elif flag < 124:
+			entry = (3, 12, 0xfff, 0, xSign, 0xfff, 0, ySign)
+		else:
+			entry = (4, 16, 0xffff, 0, xSign, 0xffff, 0, ySign)
+		sizes.append(entry[0])
+		decoding.append(entry)
+	return bytes(sizes * 2), decoding
+
+_tripletSizes, _tripletDecoding = _buildTripletTables()
+
+# glyf flags for the points of WOFF2 flags, and WOFF2 off-curve bits for the
+# points of glyf flags (like after decompiling, any of 'keepFlags' counts as
+# on-curve)
+_onCurveFlags = bytes(0 if flag & 0x80 else flagOnCurve for flag in range(256))
+_offCurveBits = bytes(0 if flag & keepFlags else 0x80 for flag in range(256))
+
+# struct formats, and signs (0: zero, 1: positive, 2: negative), of the x and
+# y coordinates of the points of glyf flags; whitespace is ignored by struct
+_xFormats = bytes(
+	ord('B') if flag & flagXShort else ord(' ') if flag & flagXsame else ord('h')
+	for flag in range(256))
+_yFormats = bytes(
+	ord('B') if flag & flagYShort else ord(' ') if flag & flagYsame else ord('h')
+	for flag in range(256))
+_xSigns = bytes(
+	(1 if flag & flagXsame else 2) if flag & flagXShort else 0 if flag & flagXsame else 1
+	for flag in range(256))
+_ySigns = bytes(
+	(1 if flag & flagYsame else 2) if flag & flagYShort else 0 if flag & flagYsame else 1
+	for flag in range(256))
+_signs = (0, 1, -1)
+
+# glyf flags and data of the x and y coordinate deltas that fit in a byte
+_shortXDeltas = {0: (flagXsame, b"")}
+_shortYDeltas = {0: (flagYsame, b"")}
+for _delta in range(1, 256):
+	_shortXDeltas[_delta] = (flagXShort | flagXsame, bytechr(_delta))
+	_shortXDeltas[-_delta] = (flagXShort, bytechr(_delta))
+	_shortYDeltas[_delta] = (flagYShort | flagYsame, bytechr(_delta))
+	_shortYDeltas[-_delta] = (flagYShort, bytechr(_delta))
+del _delta
+
+
+def _getGlyphXMin(glyfTable, glyphName):
+	"""Return the xMin of a glyph, without expanding it."""
+	data = glyfTable._getCompactGlyphData(glyphName)
+	if data:
+		return struct.unpack(">h", data[2:4])[0]
+	return getattr(glyfTable._getGlyph(glyphName), "xMin", 0)
+
+
+def _unpack255UShortAt(data, pos):
+	"""Read a 255UInt16 at position 'pos' of 'data', and return it along with
+	the position following it."""
+	if pos >= len(data):
+		raise TTLibError('not enough data to unpack 255UInt16')
+	code = data[pos]
+	pos += 1
+	if code < 253:
+		return code, pos
+	if code == 253:
+		if pos + 2 > len(data):
+			raise TTLibError('not enough data to unpack 255UInt16')
+		return (data[pos] << 8) | data[pos + 1], pos + 2
+	if pos >= len(data):
+		raise TTLibError('not enough data to unpack 255UInt16')
+	return data[pos] + (506 if code == 254 else 253), pos + 1
+
+
+def _encodeTriplet(x, y):
+	"""Return the WOFF2 flag (without the on-curve bit) and the triplet bytes
+	encoding the coordinate delta (x, y)."""
+	absX = abs(x)
+	absY = abs(y)
+	xSignBit = 0 if (x < 0) else 1
+	ySignBit = 0 if (y < 0) else 1
+	xySignBits = xSignBit + 2 * ySignBit
+
+	if x == 0 and absY < 1280:
+		return ((absY & 0xf00) >> 7) + ySignBit, bytechr(absY & 0xff)
+	elif y == 0 and absX < 1280:
+		return 10 + ((absX & 0xf00) >> 7) + xSignBit, bytechr(absX & 0xff)
+	elif absX < 65 and absY < 65:
+		return (
+			20 + ((absX - 1) & 0x30) + (((absY - 1) & 0x30) >> 2) + xySignBits,
+			bytechr((((absX - 1) & 0xf) << 4) | ((absY - 1) & 0xf)))
+	elif absX < 769 and absY < 769:
+		return (
+			84 + 12 * (((absX - 1) & 0x300) >> 8) + (((absY - 1) & 0x300) >> 6) + xySignBits,
+			struct.pack(">BB", (absX - 1) & 0xff, (absY - 1) & 0xff))
+	elif absX < 4096 and absY < 4096:
+		return (
+			120 + xySignBits,
+			struct.pack(">BBB", absX >> 4, ((absX & 0xf) << 4) | (absY >> 8), absY & 0xff))
+	else:
+		return 124 + xySignBits, struct.pack(">HH", absX, absY)
+
+
+def _decodeTriplets(flags, data, pos):
+	"""Decode the coordinate deltas of the points with WOFF2 'flags' from the
+	triplets starting at position 'pos' of 'data'.  Return the x and y deltas,
+	and the position following the triplets."""
+	end = pos + sum(flags.translate(_tripletSizes))
+	if end > len(data):
+		raise TTLibError("not enough 'glyphStream' data")
+	decoding = _tripletDecoding
+	xDeltas = []
+	yDeltas = []
+	for flag in flags:
+		nBytes, xShift, xMask, xBase, xSign, yMask, yBase, ySign = decoding[flag & 0x7f]
+		if nBytes == 1:
+			value = data[pos]
+		else:
+			value = int.from_bytes(data[pos:pos + nBytes], "big")
+		pos += nBytes
+		xDeltas.append(xSign * (xBase + ((value >> xShift) & xMask)))
+		yDeltas.append(ySign * (yBase + (value & yMask)))
+	return xDeltas, yDeltas, end
+
+
+def _compileDeltas(flags, xDeltas, yDeltas):
+	"""Return the glyf flags, x and y coordinates data of the points with
+	WOFF2 'flags' and the given deltas, packed like Glyph.compileDeltasGreedy.
+	"""
+	pack = struct.pack
+	xEncoded = [_shortXDeltas.get(x) or (0, pack(">h", x)) for x in xDeltas]
+	yEncoded = [_shortYDeltas.get(y) or (0, pack(">h", y)) for y in yDeltas]
+	glyfFlags = [
+		flag | x[0] | y[0]
+		for flag, x, y in zip(flags.translate(_onCurveFlags), xEncoded, yEncoded)]
+	# runs of three or more equal flags are compressed, up to 256 at a time
+	compressedFlags = bytearray()
+	for flag, run in groupby(glyfFlags):
+		count = len(list(run))
+		while count:
+			repeat = min(count, 256)
+			if repeat < 3:
+				compressedFlags.extend([flag] * repeat)
+			else:
+				compressedFlags.extend([flag | flagRepeat, repeat - 1])
+			count -= repeat
+	return (bytes(compressedFlags),
+		b"".join([x[1] for x in xEncoded]), b"".join([y[1] for y in yEncoded]))
+
+
+def _decompileCoordinates(data, numberOfContours):
+	"""Return the endPtsOfContours, instructions, glyf flags and coordinate
+	deltas of the compiled simple glyph 'data'."""
+	pos = 10 + 2 * numberOfContours
+	endPtsOfContours = struct.unpack(">%dh" % numberOfContours, data[10:pos])
+	instructionLength, = struct.unpack(">h", data[pos:pos + 2])
+	pos += 2
+	instructions = data[pos:pos + instructionLength]
+	pos += instructionLength
+	nPoints = endPtsOfContours[-1] + 1
+	flags = bytearray()
+	while len(flags) < nPoints:
+		flag = data[pos]
+		pos += 1
+		if flag & flagRepeat:
+			flags.extend([flag] * (data[pos] + 1))
+			pos += 1
+		else:
+			flags.append(flag)
+	assert len(flags) == nPoints, "bad glyph flags"
+	deltas = []
+	for formats, signs in ((_xFormats, _xSigns), (_yFormats, _ySigns)):
+		coordinates = struct.Struct(b">" + flags.translate(formats))
+		values = iter(coordinates.unpack_from(data, pos))
+		pos += coordinates.size
+		deltas.append([sign and _signs[sign] * next(values)
+			for sign in flags.translate(signs)])
+	return endPtsOfContours, instructions, bytes(flags), deltas[0], deltas[1]
+
+
 def getKnownTagIndex(tag):
 	"""Return index of 'tag' in woff2KnownTags list. Return 63 if not found."""
 	for i in range(len(woff2KnownTags)):
@@ -716,166 +1137,144 @@ class WOFF2GlyfTable(getTableClass('glyf')):
 					"incorrect glyphOrder: expected %d glyphs, found %d" %
 					(len(self.glyphOrder), self.numGlyphs))
 
+		# the streams are decoded straight into compiled glyph data; like in
+		# table__g_l_y_f.decompile, the glyphs are only expanded on demand
+		Glyph = getTableModule('glyf').Glyph
 		glyphs = self.glyphs = {}
-		for glyphID, glyphName in enumerate(self.glyphOrder):
-			glyph = self._decodeGlyph(glyphID)
-			glyphs[glyphName] = glyph
+		self._glyphIDs = {glyphName: i for i, glyphName in enumerate(self.glyphOrder)}
+		for glyphName, glyphData in zip(self.glyphOrder, self._decodeGlyphs()):
+			glyphs[glyphName] = Glyph(glyphData)
+		del self._glyphIDs
+		if ttFont.lazy is False:
+			for glyph in glyphs.values():
+				glyph.expand(self)
 
 	def transform(self, ttFont):
 		""" Return transformed 'glyf' data """
-		self.numGlyphs = len(self.glyphs)
+		self.numGlyphs = len(self.keys())
 		assert len(self.glyphOrder) == self.numGlyphs
 		if 'maxp' in ttFont:
 			ttFont['maxp'].numGlyphs = self.numGlyphs
 		self.indexFormat = ttFont['head'].indexToLocFormat
 
+		# the streams are collected as lists of byte strings while encoding
 		for stream in self.subStreams:
-			setattr(self, stream, b"")
+			setattr(self, stream, [])
 		bboxBitmapSize = ((self.numGlyphs + 31) >> 5) << 2
 		self.bboxBitmap = array.array('B', [0]*bboxBitmapSize)
+		self._glyphIDs = {glyphName: i for i, glyphName in enumerate(self.glyphOrder)}
+		self._tripletCache = {}
 
 		for glyphID in range(self.numGlyphs):
 			self._encodeGlyph(glyphID)
 
-		self.bboxStream = self.bboxBitmap.tobytes() + self.bboxStream
+		del self._glyphIDs, self._tripletCache
+		self.bboxStream.insert(0, self.bboxBitmap.tobytes())
 		for stream in self.subStreams:
+			setattr(self, stream, b"".join(getattr(self, stream)))
 			setattr(self, stream + 'Size', len(getattr(self, stream)))
 		self.version = 0
 		data = sstruct.pack(woff2GlyfTableFormat, self)
 		data += bytesjoin([getattr(self, s) for s in self.subStreams])
 		return data
 
-	def _decodeGlyph(self, glyphID):
-		glyph = getTableModule('glyf').Glyph()
-		glyph.numberOfContours = self.nContourStream[glyphID]
-		if glyph.numberOfContours == 0:
-			return glyph
-		elif glyph.isComposite():
-			self._decodeComponents(glyph)
-		else:
-			self._decodeCoordinates(glyph)
-		self._decodeBBox(glyphID, glyph)
-		return glyph
+	def getGlyphID(self, glyphName):
+		# the glyph order can't change while the streams are decoded or encoded,
+		# so a reverse mapping is built for the components' glyph IDs
+		glyphIDs = getattr(self, "_glyphIDs", None)
+		if glyphIDs is None:
+			return super(WOFF2GlyfTable, self).getGlyphID(glyphName)
+		return glyphIDs[glyphName]
+
+	def _decodeGlyphs(self):
+		"""Yield the compiled data of each glyph, decoded from the sub-streams.
 
-	def _decodeComponents(self, glyph):
-		data = self.compositeStream
-		glyph.components = []
+		The result is the same as compiling the glyphs with recalcBBoxes=False
+		after decoding them into Glyph objects.
+		"""
+		nPointsStream = self.nPointsStream
+		flagStream = self.flagStream
+		glyphStream = self.glyphStream
+		compositeStream = memoryview(self.compositeStream)
+		bboxStream = self.bboxStream
+		instructionStream = self.instructionStream
+		bboxBitmap = self.bboxBitmap
+		nPointsPos = flagPos = glyphPos = bboxPos = instructionPos = 0
+		for glyphID, numberOfContours in enumerate(self.nContourStream):
+			if numberOfContours == 0:
+				yield b""
+				continue
+			haveBBox = bboxBitmap[glyphID >> 3] & (0x80 >> (glyphID & 7))
+			if numberOfContours < 0:
+				if not haveBBox:
+					raise TTLibError('no bbox values for composite glyph %d' % glyphID)
+				body, haveInstructions, compositeStream = \
+					self._decodeComponents(compositeStream)
+				data = [None, body]
+			else:
+				endPtsOfContours = []
+				endPoint = -1
+				for i in range(numberOfContours):
+					ptsOfContour, nPointsPos = _unpack255UShortAt(nPointsStream, nPointsPos)
+					endPoint += ptsOfContour
+					endPtsOfContours.append(endPoint)
+				nPoints = endPoint + 1
+				flags = flagStream[flagPos:flagPos + nPoints]
+				if len(flags) < nPoints:
+					raise TTLibError("not enough 'flagStream' data")
+				flagPos += nPoints
+				xDeltas, yDeltas, glyphPos = _decodeTriplets(flags, glyphStream, glyphPos)
+				data = [None, struct.pack(">%dh" % numberOfContours, *endPtsOfContours)]
+				haveInstructions = True
+			if haveInstructions:
+				instructionLength, glyphPos = _unpack255UShortAt(glyphStream, glyphPos)
+				instructions = instructionStream[
+					instructionPos:instructionPos + instructionLength]
+				instructionPos += instructionLength
+				data.append(struct.pack(">h", len(instructions)))
+				data.append(instructions)
+			if numberOfContours > 0:
+				data.extend(_compileDeltas(flags, xDeltas, yDeltas))
+			if haveBBox:
+				bbox = struct.unpack(">hhhh", bboxStream[bboxPos:bboxPos + 8])
+				bboxPos += 8
+			elif nPoints:
+				xs = list(accumulate(xDeltas))
+				ys = list(accumulate(yDeltas))
+				bbox = (min(xs), min(ys), max(xs), max(ys))
+			else:
+				bbox = (0, 0, 0, 0)
+			data[0] = struct.pack(">hhhhh", numberOfContours, *bbox)
+			yield b"".join(data)
+
+	def _decodeComponents(self, data):
+		"""Return the compiled components read from the composite stream
+		'data', whether the glyph has instructions, and the remaining data."""
+		GlyphComponent = getTableModule('glyf').GlyphComponent
+		components = []
 		more = 1
 		haveInstructions = 0
 		while more:
-			component = getTableModule('glyf').GlyphComponent()
+			component = GlyphComponent()
 			more, haveInstr, data = component.decompile(data, self)
 			haveInstructions = haveInstructions | haveInstr
-			glyph.components.append(component)
-		self.compositeStream = data
-		if haveInstructions:
-			self._decodeInstructions(glyph)
-
-	def _decodeCoordinates(self, glyph):
-		data = self.nPointsStream
-		endPtsOfContours = []
-		endPoint = -1
-		for i in range(glyph.numberOfContours):
-			ptsOfContour, data = unpack255UShort(data)
-			endPoint += ptsOfContour
-			endPtsOfContours.append(endPoint)
-		glyph.endPtsOfContours = endPtsOfContours
-		self.nPointsStream = data
-		self._decodeTriplets(glyph)
-		self._decodeInstructions(glyph)
-
-	def _decodeInstructions(self, glyph):
-		glyphStream = self.glyphStream
-		instructionStream = self.instructionStream
-		instructionLength, glyphStream = unpack255UShort(glyphStream)
-		glyph.program = ttProgram.Program()
-		glyph.program.fromBytecode(instructionStream[:instructionLength])
-		self.glyphStream = glyphStream
-		self.instructionStream = instructionStream[instructionLength:]
-
-	def _decodeBBox(self, glyphID, glyph):
-		haveBBox = bool(self.bboxBitmap[glyphID >> 3] & (0x80 >> (glyphID & 7)))
-		if glyph.isComposite() and not haveBBox:
-			raise TTLibError('no bbox values for composite glyph %d' % glyphID)
-		if haveBBox:
-			dummy, self.bboxStream = sstruct.unpack2(bboxFormat, self.bboxStream, glyph)
-		else:
-			glyph.recalcBounds(self)
-
-	def _decodeTriplets(self, glyph):
-
-		def withSign(flag, baseval):
-			assert 0 <= baseval and baseval < 65536, 'integer overflow'
-			return baseval if flag & 1 else -baseval
-
-		nPoints = glyph.endPtsOfContours[-1] + 1
-		flagSize = nPoints
-		if flagSize > len(self.flagStream):
-			raise TTLibError("not enough 'flagStream' data")
-		flagsData = self.flagStream[:flagSize]
-		self.flagStream = self.flagStream[flagSize:]
-		flags = array.array('B', flagsData)
-
-		triplets = array.array('B', self.glyphStream)
-		nTriplets = len(triplets)
-		assert nPoints <= nTriplets
-
-		x = 0
-		y = 0
-		glyph.coordinates = getTableModule('glyf').GlyphCoordinates.zeros(nPoints)
-		glyph.flags = array.array("B")
-		tripletIndex = 0
-		for i in range(nPoints):
-			flag = flags[i]
-			onCurve = not bool(flag >> 7)
-			flag &= 0x7f
-			if flag < 84:
-				nBytes = 1
-			elif flag < 120:
-				nBytes = 2
-			elif flag < 124:
-				nBytes = 3
-			else:
-				nBytes = 4
-			assert ((tripletIndex + nBytes) <= nTriplets)
-			if flag < 10:
-				dx = 0
-				dy = withSign(flag, ((flag & 14) << 7) + triplets[tripletIndex])
-			elif flag < 20:
-				dx = withSign(flag, (((flag - 10) & 14) << 7) + triplets[tripletIndex])
-				dy = 0
-			elif flag < 84:
-				b0 = flag - 20
-				b1 = triplets[tripletIndex]
-				dx = withSign(flag, 1 + (b0 & 0x30) + (b1 >> 4))
-				dy = withSign(flag >> 1, 1 + ((b0 & 0x0c) << 2) + (b1 & 0x0f))
-			elif flag < 120:
-				b0 = flag - 84
-				dx = withSign(flag, 1 + ((b0 // 12) << 8) + triplets[tripletIndex])
-				dy = withSign(flag >> 1,
-					1 + (((b0 % 12) >> 2) << 8) + triplets[tripletIndex + 1])
-			elif flag < 124:
-				b2 = triplets[tripletIndex + 1]
-				dx = withSign(flag, (triplets[tripletIndex] << 4) + (b2 >> 4))
-				dy = withSign(flag >> 1,
-					((b2 & 0x0f) << 8) + triplets[tripletIndex + 2])
-			else:
-				dx = withSign(flag,
-					(triplets[tripletIndex] << 8) + triplets[tripletIndex + 1])
-				dy = withSign(flag >> 1,
-					(triplets[tripletIndex + 2] << 8) + triplets[tripletIndex + 3])
-			tripletIndex += nBytes
-			x += dx
-			y += dy
-			glyph.coordinates[i] = (x, y)
-			glyph.flags.append(int(onCurve))
-		bytesConsumed = tripletIndex
-		self.glyphStream = self.glyphStream[bytesConsumed:]
+			components.append(component)
+		lastComponent = len(components) - 1
+		body = b"".join([
+			component.compile(i != lastComponent, haveInstructions and i == lastComponent, self)
+			for i, component in enumerate(components)])
+		return body, haveInstructions, data
 
 	def _encodeGlyph(self, glyphID):
 		glyphName = self.getGlyphName(glyphID)
-		glyph = self[glyphName]
-		self.nContourStream += struct.pack(">h", glyph.numberOfContours)
+		data = self._getCompactGlyphData(glyphName)
+		if data and struct.unpack(">h", data[:2])[0] > 0:
+			# encode simple glyphs straight from their compiled data
+			self._encodeCompiledGlyph(glyphID, data)
+			return
+		glyph = self._getGlyph(glyphName)
+		glyph.expand(self)
+		self.nContourStream.append(struct.pack(">h", glyph.numberOfContours))
 		if glyph.numberOfContours == 0:
 			return
 		elif glyph.isComposite():
@@ -884,6 +1283,25 @@ class WOFF2GlyfTable(getTableClass('glyf')):
 			self._encodeCoordinates(glyph)
 		self._encodeBBox(glyphID, glyph)
 
+	def _encodeCompiledGlyph(self, glyphID, data):
+		numberOfContours, xMin, yMin, xMax, yMax = struct.unpack(">hhhhh", data[:10])
+		endPtsOfContours, instructions, flags, xDeltas, yDeltas = \
+			_decompileCoordinates(data, numberOfContours)
+		self.nContourStream.append(data[:2])
+		self._encodeContours(endPtsOfContours)
+		self._encodeTriplets(flags.translate(_offCurveBits), xDeltas, yDeltas)
+		self.glyphStream.append(pack255UShort(len(instructions)))
+		self.instructionStream.append(instructions)
+		if xDeltas:
+			xs = list(accumulate(xDeltas))
+			ys = list(accumulate(yDeltas))
+			calculatedBBox = (min(xs), min(ys), max(xs), max(ys))
+		else:
+			calculatedBBox = (0, 0, 0, 0)
+		if (xMin, yMin, xMax, yMax) != calculatedBBox:
+			self.bboxBitmap[glyphID >> 3] |= 0x80 >> (glyphID & 7)
+			self.bboxStream.append(data[2:10])
+
 	def _encodeComponents(self, glyph):
 		lastcomponent = len(glyph.components) - 1
 		more = 1
@@ -893,23 +1311,33 @@ class WOFF2GlyfTable(getTableClass('glyf')):
 				haveInstructions = hasattr(glyph, "program")
 				more = 0
 			component = glyph.components[i]
-			self.compositeStream += component.compile(more, haveInstructions, self)
+			self.compositeStream.append(component.compile(more, haveInstructions, self))
 		if haveInstructions:
 			self._encodeInstructions(glyph)
 
 	def _encodeCoordinates(self, glyph):
+		assert len(glyph.coordinates) == len(glyph.flags)
+		self._encodeContours(glyph.endPtsOfContours)
+		coordinates = glyph.coordinates.copy()
+		coordinates.absoluteToRelative()
+		xDeltas = [x for x, y in coordinates]
+		yDeltas = [y for x, y in coordinates]
+		offCurveBits = bytes(0 if flag else 128 for flag in glyph.flags)
+		self._encodeTriplets(offCurveBits, xDeltas, yDeltas)
+		self._encodeInstructions(glyph)
+
+	def _encodeContours(self, endPtsOfContours):
 		lastEndPoint = -1
-		for endPoint in glyph.endPtsOfContours:
-			ptsOfContour = endPoint - lastEndPoint
-			self.nPointsStream += pack255UShort(ptsOfContour)
+		nPoints = []
+		for endPoint in endPtsOfContours:
+			nPoints.append(pack255UShort(endPoint - lastEndPoint))
 			lastEndPoint = endPoint
-		self._encodeTriplets(glyph)
-		self._encodeInstructions(glyph)
+		self.nPointsStream.extend(nPoints)
 
 	def _encodeInstructions(self, glyph):
 		instructions = glyph.program.getBytecode()
-		self.glyphStream += pack255UShort(len(instructions))
-		self.instructionStream += instructions
+		self.glyphStream.append(pack255UShort(len(instructions)))
+		self.instructionStream.append(instructions)
 
 	def _encodeBBox(self, glyphID, glyph):
 		assert glyph.numberOfContours != 0, "empty glyph has no bbox"
@@ -921,52 +1349,23 @@ class WOFF2GlyfTable(getTableClass('glyf')):
 			if currentBBox == calculatedBBox:
 				return
 		self.bboxBitmap[glyphID >> 3] |= 0x80 >> (glyphID & 7)
-		self.bboxStream += sstruct.pack(bboxFormat, glyph)
-
-	def _encodeTriplets(self, glyph):
-		assert len(glyph.coordinates) == len(glyph.flags)
-		coordinates = glyph.coordinates.copy()
-		coordinates.absoluteToRelative()
-
-		flags = array.array('B')
-		triplets = array.array('B')
-		for i in range(len(coordinates)):
-			onCurve = glyph.flags[i]
-			x, y = coordinates[i]
-			absX = abs(x)
-			absY = abs(y)
-			onCurveBit = 0 if onCurve else 128
-			xSignBit = 0 if (x < 0) else 1
-			ySignBit = 0 if (y < 0) else 1
-			xySignBits = xSignBit + 2 * ySignBit
-
-			if x == 0 and absY < 1280:
-				flags.append(onCurveBit + ((absY & 0xf00) >> 7) + ySignBit)
-				triplets.append(absY & 0xff)
-			elif y == 0 and absX < 1280:
-				flags.append(onCurveBit + 10 + ((absX & 0xf00) >> 7) + xSignBit)
-				triplets.append(absX & 0xff)
-			elif absX < 65 and absY < 65:
-				flags.append(onCurveBit + 20 + ((absX - 1) & 0x30) + (((absY - 1) & 0x30) >> 2) + xySignBits)
-				triplets.append((((absX - 1) & 0xf) << 4) | ((absY - 1) & 0xf))
-			elif absX < 769 and absY < 769:
-				flags.append(onCurveBit + 84 + 12 * (((absX - 1) & 0x300) >> 8) + (((absY - 1) & 0x300) >> 6) + xySignBits)
-				triplets.append((absX - 1) & 0xff)
-				triplets.append((absY - 1) & 0xff)
-			elif absX < 4096 and absY < 4096:
-				flags.append(onCurveBit + 120 + xySignBits)
-				triplets.append(absX >> 4)
-				triplets.append(((absX & 0xf) << 4) | (absY >> 8))
-				triplets.append(absY & 0xff)
-			else:
-				flags.append(onCurveBit + 124 + xySignBits)
-				triplets.append(absX >> 8)
-				triplets.append(absX & 0xff)
-				triplets.append(absY >> 8)
-				triplets.append(absY & 0xff)
-
-		self.flagStream += flags.tobytes()
-		self.glyphStream += triplets.tobytes()
+		self.bboxStream.append(sstruct.pack(bboxFormat, glyph))
+
+	def _encodeTriplets(self, offCurveBits, xDeltas, yDeltas):
+		"""Append the triplet encoding of the coordinate deltas to the flag
+		and glyph streams.  'offCurveBits' holds, for each point, 128 if the
+		point is off-curve, else 0."""
+		cache = self._tripletCache
+		flags = bytearray(offCurveBits)
+		triplets = []
+		for i, delta in enumerate(zip(xDeltas, yDeltas)):
+			encoded = cache.get(delta)
+			if encoded is None:
+				encoded = cache[delta] = _encodeTriplet(*delta)
+			flags[i] |= encoded[0]
+			triplets.append(encoded[1])
+		self.flagStream.append(bytes(flags))
+		self.glyphStream.append(b"".join(triplets))
 
 
 class WOFF2HmtxTable(getTableClass("hmtx")):
@@ -1014,9 +1413,7 @@ class WOFF2HmtxTable(getTableClass("hmtx")):
 			for i, glyphName in enumerate(glyphOrder):
 				if i >= numberOfHMetrics:
 					break
-				glyph = glyfTable[glyphName]
-				xMin = getattr(glyph, "xMin", 0)
-				lsbArray.append(xMin)
+				lsbArray.append(_getGlyphXMin(glyfTable, glyphName))
 
 		numberOfSideBearings = numGlyphs - numberOfHMetrics
 		if hasLeftSideBearingArray:
@@ -1031,9 +1428,7 @@ class WOFF2HmtxTable(getTableClass("hmtx")):
 			for i, glyphName in enumerate(glyphOrder):
 				if i < numberOfHMetrics:
 					continue
-				glyph = glyfTable[glyphName]
-				xMin = getattr(glyph, "xMin", 0)
-				leftSideBearingArray.append(xMin)
+				leftSideBearingArray.append(_getGlyphXMin(glyfTable, glyphName))
 
 		if data:
 			raise TTLibError("too much '%s' table data" % self.tableTag)
@@ -1060,7 +1455,7 @@ class WOFF2HmtxTable(getTableClass("hmtx")):
 		for i in range(numberOfHMetrics):
 			glyphName = glyphOrder[i]
 			lsb = self.metrics[glyphName][1]
-			if lsb != getattr(glyf[glyphName], "xMin", 0):
+			if lsb != _getGlyphXMin(glyf, glyphName):
 				hasLsbArray = True
 				break
 
@@ -1069,7 +1464,7 @@ class WOFF2HmtxTable(getTableClass("hmtx")):
 		for i in range(numberOfHMetrics, len(glyphOrder)):
 			glyphName = glyphOrder[i]
 			lsb = self.metrics[glyphName][1]
-			if lsb != getattr(glyf[glyphName], "xMin", 0):
+			if lsb != _getGlyphXMin(glyf, glyphName):
 				hasLeftSideBearingArray = True
 				break
 
@@ -1131,16 +1526,22 @@ class WOFF2FlavorData(WOFFFlavorData):
 
 	Flavor = 'woff2'
 
-	def __init__(self, reader=None, data=None, transformedTables=None):
+	def __init__(self, reader=None, data=None, transformedTables=None,
+			brotliQuality=None, brotliWindow=None):
 		"""Data class that holds the WOFF2 header major/minor version, any
 		metadata or private data (as bytes strings), and the set of
 		table tags that have transformations applied (if reader is not None),
-		or will have once the WOFF2 font is compiled.
+		or will have once the WOFF2 font is compiled, along with the Brotli
+		settings used to compress it.
 
 		Args:
 			reader: an SFNTReader (or subclass) object to read flavor data from.
 			data: another WOFFFlavorData object to initialise data from.
 			transformedTables: set of strings containing table tags to be transformed.
+			brotliQuality: Brotli compression quality, from 0 to 11 (default:
+				BROTLI_QUALITY).
+			brotliWindow: base 2 logarithm of the Brotli window size, from 10 to 24
+				(default: BROTLI_WINDOW).
 
 		Raises:
 			ImportError if the brotli module is not installed.
@@ -1200,11 +1601,17 @@ class WOFF2FlavorData(WOFFFlavorData):
 			self.privData = data.privData
 			if transformedTables is None and hasattr(data, "transformedTables"):
 				 transformedTables = data.transformedTables
+			if brotliQuality is None:
+				brotliQuality = getattr(data, "brotliQuality", None)
+			if brotliWindow is None:
+				brotliWindow = getattr(data, "brotliWindow", None)
 
 		if transformedTables is None:
 			transformedTables = woff2TransformedTableTags
 
 		self.transformedTables = set(transformedTables)
+		self.brotliQuality = BROTLI_QUALITY if brotliQuality is None else brotliQuality
+		self.brotliWindow = BROTLI_WINDOW if brotliWindow is None else brotliWindow
 
 
 def unpackBase128(data):
@@ -1361,34 +1768,65 @@ def pack255UShort(value):
 		return struct.pack(">BH", 253, value)
 
 
-def compress(input_file, output_file, transform_tables=None):
-	"""Compress OpenType font to WOFF2.
+def compress(input_file, output_file, transform_tables=None, quality=None,
+		window=None):
+	"""Compress OpenType font, or font collection, to WOFF2.
 
 	Args:
 		input_file: a file path, file or file-like object (open in binary mode)
-			containing an OpenType font (either CFF- or TrueType-flavored).
+			containing an OpenType font (either CFF- or TrueType-flavored), or
+			an OpenType font collection.
 		output_file: a file path, file or file-like object where to save the
 			compressed WOFF2 font.
 		transform_tables: Optional[Iterable[str]]: a set of table tags for which
 			to enable preprocessing transformations. By default, only 'glyf'
 			and 'loca' tables are transformed. An empty set means disable all
 			transformations.
+		quality: Optional[int]: the Brotli compression quality, from 0 to 11
+			(default: BROTLI_QUALITY).
+		window: Optional[int]: the base 2 logarithm of the Brotli window size,
+			from 10 to 24 (default: BROTLI_WINDOW).
 	"""
 	log.info("Processing %s => %s" % (input_file, output_file))
+	_compress(input_file, output_file, transform_tables, quality, window)
+
+
+def _compress(input_file, output_file, transform_tables, quality, window):
+	if _isFontCollection(input_file):
+		from fontTools.ttLib.ttCollection import TTCollection
+
+		collection = TTCollection(
+			input_file, shareTables=True, recalcBBoxes=False, recalcTimestamp=False)
+		flavorData = WOFF2FlavorData(
+			data=collection.fonts[0].flavorData, transformedTables=transform_tables,
+			brotliQuality=quality, brotliWindow=window)
+		# tables with the same data are only stored once
+		buf = BytesIO()
+		writer = WOFF2CollectionWriter(buf, flavorData=flavorData)
+		for font in collection:
+			writer.addFont(font.sfntVersion, {
+				tag: font.getTableData(tag)
+				for tag in font.keys() if tag != "GlyphOrder"
+			})
+		writer.close()
+		collection.close()
+		_writeData(output_file, buf.getvalue())
+		return
 
 	font = TTFont(input_file, recalcBBoxes=False, recalcTimestamp=False)
 	font.flavor = "woff2"
 
-	if transform_tables is not None:
+	if transform_tables is not None or quality is not None or window is not None:
 		font.flavorData = WOFF2FlavorData(
-			data=font.flavorData, transformedTables=transform_tables
+			data=font.flavorData, transformedTables=transform_tables,
+			brotliQuality=quality, brotliWindow=window
 		)
 
 	font.save(output_file, reorderTables=False)
 
 
 def decompress(input_file, output_file):
-	"""Decompress WOFF2 font to OpenType font.
+	"""Decompress WOFF2 font, or font collection, to OpenType font (collection).
 
 	Args:
 		input_file: a file path, file or file-like object (open in binary mode)
@@ -1398,10 +1836,148 @@ def decompress(input_file, output_file):
 	"""
 	log.info("Processing %s => %s" % (input_file, output_file))
 
-	font = TTFont(input_file, recalcBBoxes=False, recalcTimestamp=False)
-	font.flavor = None
-	font.flavorData = None
-	font.save(output_file, reorderTables=True)
+	if _isFontCollection(input_file):
+		from fontTools.ttLib.ttCollection import TTCollection
+
+		collection = TTCollection(
+			input_file, shareTables=True, recalcBBoxes=False, recalcTimestamp=False)
+		for font in collection:
+			font.flavor = None
+			font.flavorData = None
+		collection.save(output_file, shareTables=True)
+		return
+
+	# copy the tables other than glyf, loca and hmtx without decompiling them
+	buf = BytesIO()
+	if hasattr(input_file, "read"):
+		transcodeFont(input_file, buf)
+	else:
+		with open(input_file, "rb") as f:
+			transcodeFont(f, buf)
+	_writeData(output_file, buf.getvalue())
+
+
+def rewriteWOFF2(reader, file, flavorData=None):
+	"""Write the WOFF2 font read by 'reader' to 'file', with the metadata,
+	private data and Brotli settings of 'flavorData', passing the transformed
+	font data through instead of reconstructing and transforming the tables
+	again. Return False, without writing anything, if 'flavorData' requires
+	a different set of transformed tables, or the font is a collection.
+	"""
+	flavorData = WOFF2FlavorData(data=flavorData or reader.flavorData)
+	transformed = {tag for tag, entry in reader.tables.items() if entry.transformed}
+	if (
+		reader.sfntVersion == "ttcf"
+		or "DSIG" in reader.tables
+		or transformed != {
+			tag for tag in flavorData.transformedTables if tag in reader.tables
+		}
+	):
+		return False
+	if "head" in reader.tables:
+		reader["head"]  # for WOFF2Writer._getVersion
+	writer = WOFF2Writer(
+		file, reader.numTables, reader.sfntVersion, flavorData=flavorData)
+	writer.tables = reader.tables
+	writer.totalSfntSize = reader.totalSfntSize
+	writer._writeFont(reader.transformBuffer.getvalue())
+	return True
+
+
+# the combinations of transformed tables tried by compressBatch, the default
+# one first
+_candidateTransforms = (
+	{"glyf", "loca"},
+	{"glyf", "loca", "hmtx"},
+	{"hmtx"},
+	set(),
+)
+
+
+def compressBatch(jobs, transform_tables=None, try_transforms=False,
+		quality=None, window=None, workers=None):
+	"""Compress a batch of OpenType fonts, or font collections, to WOFF2.
+
+	Args:
+		jobs: an iterable of (input_file, output_file) pairs, as passed to
+			compress().
+		transform_tables: Optional[Iterable[str]]: the set of table tags to
+			transform, as for compress(); ignored if try_transforms is true.
+		try_transforms: bool: compress each TrueType-flavored font with each
+			combination of 'glyf'/'loca' and 'hmtx' transforms, and keep the
+			smallest result.
+		quality, window: Optional[int]: the Brotli settings, as for compress().
+		workers: Optional[int]: if greater than 1, compress that many fonts
+			(or transform combinations) at a time in worker processes.
+
+	Returns:
+		The list of the sets of tables transformed in each output font.
+	"""
+	jobs = list(jobs)
+	tasks = []
+	for i, (inputFile, outputFile) in enumerate(jobs):
+		log.info("Processing %s => %s" % (inputFile, outputFile))
+		if hasattr(inputFile, "read"):
+			data = inputFile.read()
+		else:
+			with open(inputFile, "rb") as f:
+				data = f.read()
+		if try_transforms and data[:4] != b"OTTO":
+			candidates = _candidateTransforms
+		elif transform_tables is not None:
+			candidates = (set(transform_tables),)
+		else:
+			candidates = (set(woff2TransformedTableTags),)
+		for transformTables in candidates:
+			tasks.append((i, transformTables, data))
+
+	args = [(data, tables, quality, window) for _, tables, data in tasks]
+	if workers is not None and workers > 1:
+		from concurrent.futures import ProcessPoolExecutor
+
+		with ProcessPoolExecutor(workers) as executor:
+			results = list(executor.map(_compressData, *zip(*args)))
+	else:
+		results = [_compressData(*a) for a in args]
+
+	best = [None] * len(jobs)
+	for (i, transformTables, _), result in zip(tasks, results):
+		# on ties, keep the first candidate
+		if best[i] is None or len(result) < len(best[i][1]):
+			best[i] = (transformTables, result)
+
+	chosen = []
+	for (_, outputFile), (transformTables, result) in zip(jobs, best):
+		_writeData(outputFile, result)
+		chosen.append(transformTables)
+	return chosen
+
+
+def _compressData(data, transformTables, quality, window):
+	output = BytesIO()
+	_compress(BytesIO(data), output, transformTables, quality, window)
+	return output.getvalue()
+
+
+def _writeData(file, data):
+	if hasattr(file, "write"):
+		file.write(data)
+	else:
+		with open(file, "wb") as f:
+			f.write(data)
+
+
+def _isFontCollection(file):
+	"""Return whether the file path or file object contains a font collection,
+	either an OpenType one or a WOFF2 one."""
+	if hasattr(file, "read"):
+		pos = file.tell()
+		header = file.read(8)
+		file.seek(pos)
+	else:
+		with open(file, "rb") as f:
+			header = f.read(8)
+	return header[:4] == b"ttcf" or header == b"wOF2ttcf"
 
 
 def main(args=None):
@@ -1444,7 +2020,8 @@ def main(args=None):
 	parser_compress.add_argument(
 		"input_file",
 		metavar="INPUT",
-		help="the input OpenType font (.ttf or .otf)",
+		nargs="+",
+		help="the input OpenType font(s) (.ttf or .otf) or font collection(s) (.ttc)",
 	)
 	parser_decompress.add_argument(
 		"input_file",
@@ -1456,7 +2033,7 @@ def main(args=None):
 		"-o",
 		"--output-file",
 		metavar="OUTPUT",
-		help="the output WOFF2 font",
+		help="the output WOFF2 font (only with a single INPUT)",
 	)
 	parser_decompress.add_argument(
 		"-o",
@@ -1480,6 +2057,33 @@ def main(args=None):
 		action=_HmtxTransformAction,
 		help="Enable optional transformation for 'hmtx' table",
 	)
+	transform_group.add_argument(
+		"--try-transforms",
+		action="store_true",
+		help="Try all the combinations of glyf/loca and hmtx transforms, and "
+		"keep the smallest output",
+	)
+
+	parser_compress.add_argument(
+		"--quality",
+		type=int,
+		default=BROTLI_QUALITY,
+		help="Brotli compression quality, from 0 to 11 (default: %(default)s)",
+	)
+	parser_compress.add_argument(
+		"--window",
+		type=int,
+		default=BROTLI_WINDOW,
+		help="base 2 logarithm of the Brotli window size, from 10 to 24 "
+		"(default: %(default)s)",
+	)
+	parser_compress.add_argument(
+		"-j",
+		"--jobs",
+		type=int,
+		default=None,
+		help="compress that many fonts (or transform combinations) in parallel",
+	)
 
 	parser_compress.set_defaults(
 		subcommand=compress,
@@ -1500,16 +2104,33 @@ def main(args=None):
 		level=("ERROR" if quiet else "DEBUG" if verbose else "INFO"),
 	)
 
+	if subcommand is compress:
+		inputFiles = options.pop("input_file")
+		outputFile = options.pop("output_file")
+		if outputFile and len(inputFiles) > 1:
+			parser.error("-o/--output-file requires a single INPUT")
+		jobs = [
+			(
+				inputFile,
+				outputFile or makeOutputFileName(
+					inputFile, outputDir=None, extension=".woff2"),
+			)
+			for inputFile in inputFiles
+		]
+		try:
+			compressBatch(jobs, workers=options.pop("jobs"), **options)
+		except TTLibError as e:
+			parser.error(e)
+		return
+
 	if not options["output_file"]:
-		if subcommand is compress:
-			extension = ".woff2"
-		elif subcommand is decompress:
-			# choose .ttf/.otf file extension depending on sfntVersion
+		if subcommand is decompress:
+			# choose .ttf/.otf/.ttc file extension depending on sfntVersion
 			with open(options["input_file"], "rb") as f:
 				f.seek(4)  # skip 'wOF2' signature
 				sfntVersion = f.read(4)
 			assert len(sfntVersion) == 4, "not enough data"
-			extension = ".otf" if sfntVersion == b"OTTO" else ".ttf"
+			extension = {b"OTTO": ".otf", b"ttcf": ".ttc"}.get(sfntVersion, ".ttf")
 		else:
 			raise AssertionError(subcommand)
 		options["output_file"] = makeOutputFileName(
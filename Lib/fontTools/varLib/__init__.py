@@ -23,7 +23,7 @@ from fontTools.misc.fixedTools import otRound
 from fontTools.misc.arrayTools import Vector
 from fontTools.ttLib import TTFont, newTable
 from fontTools.ttLib.tables._f_v_a_r import Axis, NamedInstance
-from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
+from fontTools.ttLib.tables._g_l_y_f import Glyph, GlyphCoordinates
 from fontTools.ttLib.tables.ttProgram import Program
 from fontTools.ttLib.tables.TupleVariation import TupleVariation
 from fontTools.ttLib.tables import otTables as ot
@@ -33,6 +33,7 @@ from fontTools.varLib.merger import VariationMerger
 from fontTools.varLib.mvar import MVAR_ENTRIES
 from fontTools.varLib.iup import iup_delta_optimize
 from fontTools.varLib.featureVars import addFeatureVariations
+from fontTools.varLib.buildCache import BuildCache, fingerprint, tableFingerprint
 from fontTools.designspaceLib import DesignSpaceDocument
 from collections import OrderedDict, namedtuple
 import os.path
@@ -228,20 +229,76 @@ def _add_stat(font, axes):
 	stat.ElidedFallbackNameID = 2
 
 
-def _add_gvar(font, masterModel, master_ttfs, tolerance=0.5, optimize=True):
+class _GlyfReleaser(object):
+	"""Bounds the memory used by the glyphs of the master fonts' glyf
+	tables.  The glyphs that were accessed since the last chunk are
+	replaced by unexpanded copies of their raw data every 'chunkSize'
+	calls to tick(), freeing their decompiled data.  Lazily decompiled
+	tables already keep their raw data, so they only drop the Glyph
+	objects made since the last chunk."""
+
+	def __init__(self, fonts, chunkSize):
+		self.chunkSize = chunkSize
+		self.count = 0
+		self.tables = []
+		for font in fonts:
+			if 'glyf' not in font:
+				continue
+			glyf = font['glyf']
+			if glyf._isLazy():
+				self.tables.append((glyf, None))
+				continue
+			rawData = {
+				name: glyph.data for name, glyph in glyf.glyphs.items()
+				if hasattr(glyph, "data")
+			}
+			glyf.glyphs = _AccessRecordingDict(glyf.glyphs)
+			self.tables.append((glyf, rawData))
+
+	def tick(self):
+		self.count += 1
+		if self.count % self.chunkSize == 0:
+			self.release()
+
+	def release(self):
+		for glyf, rawData in self.tables:
+			if rawData is None:
+				if glyf._isLazy():
+					glyf._glyphCache.clear()
+				continue
+			glyphs = glyf.glyphs
+			for name in glyphs.accessed:
+				if name in rawData:
+					dict.__setitem__(glyphs, name, Glyph(rawData[name]))
+			glyphs.accessed.clear()
+
+
+class _AccessRecordingDict(dict):
+
+	def __init__(self, *args, **kwargs):
+		dict.__init__(self, *args, **kwargs)
+		self.accessed = set()
+
+	def __getitem__(self, key):
+		self.accessed.add(key)
+		return dict.__getitem__(self, key)
+
+
+def _add_gvar(font, masterModel, master_ttfs, tolerance=0.5, optimize=True, cache=None,
+		releaser=None):
 	if tolerance < 0:
 		raise ValueError("`tolerance` must be a positive number.")
 
 	log.info("Generating gvar")
 	assert "gvar" not in font
 	gvar = font["gvar"] = newTable('gvar')
-	glyf = font['glyf']
 
 	# use hhea.ascent of base master as default vertical origin when vmtx is missing
 	baseAscent = font['hhea'].ascent
 	for glyph in font.getGlyphOrder():
 
-		isComposite = glyf[glyph].isComposite()
+		if releaser is not None:
+			releaser.tick()
 
 		allData = [
 			m["glyf"].getCoordinatesAndControls(glyph, m, defaultVerticalOrigin=baseAscent)
@@ -256,6 +313,16 @@ def _add_gvar(font, masterModel, master_ttfs, tolerance=0.5, optimize=True):
 			log.warning("glyph %s has incompatible masters; skipping" % glyph)
 			continue
 		del allControls
+		isComposite = control.numberOfContours == -1
+
+		if cache is not None:
+			key = fingerprint(
+				model.supports, tolerance, optimize, isComposite, control,
+				*[(c.array.typecode, c.array.tobytes()) for c in allCoords])
+			variations = cache.getGlyphVariations(glyph, key)
+			if variations is not None:
+				gvar.variations[glyph] = variations
+				continue
 
 		# Update gvar
 		gvar.variations[glyph] = []
@@ -299,6 +366,9 @@ def _add_gvar(font, masterModel, master_ttfs, tolerance=0.5, optimize=True):
 
 			gvar.variations[glyph].append(var)
 
+		if cache is not None:
+			cache.putGlyphVariations(glyph, key, gvar.variations[glyph])
+
 
 def _remove_TTHinting(font):
 	for tag in ("cvar", "cvt ", "fpgm", "prep"):
@@ -310,7 +380,7 @@ def _remove_TTHinting(font):
 	font["glyf"].removeHinting()
 	# TODO: Modify gasp table to deactivate gridfitting for all ranges?
 
-def _merge_TTHinting(font, masterModel, master_ttfs, tolerance=0.5):
+def _merge_TTHinting(font, masterModel, master_ttfs, tolerance=0.5, releaser=None):
 
 	log.info("Merging TT hinting")
 	assert "cvar" not in font
@@ -334,7 +404,9 @@ def _merge_TTHinting(font, masterModel, master_ttfs, tolerance=0.5):
 
 	# glyf table
 
-	for name, glyph in font["glyf"].glyphs.items():
+	for name in font["glyf"].keys():
+		if releaser is not None:
+			releaser.tick()
 		all_pgms = [
 			m["glyf"][name].program
 			for m in master_ttfs
@@ -342,7 +414,7 @@ def _merge_TTHinting(font, masterModel, master_ttfs, tolerance=0.5):
 		]
 		if not any(all_pgms):
 			continue
-		glyph.expand(font["glyf"])
+		glyph = font["glyf"][name]
 		if hasattr(glyph, "program"):
 			font_pgm = glyph.program
 		else:
@@ -443,50 +515,49 @@ def _add_VHVAR(font, masterModel, master_ttfs, axisTags, tableFields):
 def _get_advance_metrics(font, masterModel, master_ttfs,
 		axisTags, glyphOrder, advMetricses, vOrigMetricses=None):
 
-	vhAdvanceDeltasAndSupports = {}
-	vOrigDeltasAndSupports = {}
-	for glyph in glyphOrder:
-		vhAdvances = [metrics[glyph][0] if glyph in metrics else None for metrics in advMetricses]
-		vhAdvanceDeltasAndSupports[glyph] = masterModel.getDeltasAndSupports(vhAdvances)
+	vhAdvances = [
+		[metrics[glyph][0] if glyph in metrics else None for metrics in advMetricses]
+		for glyph in glyphOrder
+	]
 
-	singleModel = models.allEqual(id(v[1]) for v in vhAdvanceDeltasAndSupports.values())
+	singleModel = models.allEqual(
+		tuple(v is not None for v in advances) for advances in vhAdvances)
 
 	if vOrigMetricses:
 		singleModel = False
-		for glyph in glyphOrder:
-			# We need to supply a vOrigs tuple with non-None default values
-			# for each glyph. vOrigMetricses contains values only for those
-			# glyphs which have a non-default vOrig.
-			vOrigs = [metrics[glyph] if glyph in metrics else defaultVOrig
-				for metrics, defaultVOrig in vOrigMetricses]
-			vOrigDeltasAndSupports[glyph] = masterModel.getDeltasAndSupports(vOrigs)
+		# We need to supply a vOrigs tuple with non-None default values
+		# for each glyph. vOrigMetricses contains values only for those
+		# glyphs which have a non-default vOrig.
+		vOrigs = [
+			[metrics[glyph] if glyph in metrics else defaultVOrig
+			 for metrics, defaultVOrig in vOrigMetricses]
+			for glyph in glyphOrder
+		]
 
 	directStore = None
 	if singleModel:
 		# Build direct mapping
-		supports = next(iter(vhAdvanceDeltasAndSupports.values()))[1][1:]
+		model, _ = masterModel.getSubModel(vhAdvances[0])
+		supports = model.supports[1:]
 		varTupleList = builder.buildVarRegionList(supports, axisTags)
 		varTupleIndexes = list(range(len(supports)))
 		varData = builder.buildVarData(varTupleIndexes, [], optimize=False)
-		for glyphName in glyphOrder:
-			varData.addItem(vhAdvanceDeltasAndSupports[glyphName][0])
+		for deltas in model.getDeltasMatrix([models.nonNone(advances) for advances in vhAdvances]):
+			varData.addItem(deltas)
 		varData.optimize()
 		directStore = builder.buildVarStore(varTupleList, [varData])
 
 	# Build optimized indirect mapping
 	storeBuilder = varStore.OnlineVarStoreBuilder(axisTags)
+	storeBuilder.setModel(masterModel)
 	advMapping = {}
-	for glyphName in glyphOrder:
-		deltas, supports = vhAdvanceDeltasAndSupports[glyphName]
-		storeBuilder.setSupports(supports)
-		advMapping[glyphName] = storeBuilder.storeDeltas(deltas)
+	for glyphName, (_, varIdx) in zip(glyphOrder, storeBuilder.storeMastersMatrix(vhAdvances)):
+		advMapping[glyphName] = varIdx
 
 	if vOrigMetricses:
 		vOrigMap = {}
-		for glyphName in glyphOrder:
-			deltas, supports = vOrigDeltasAndSupports[glyphName]
-			storeBuilder.setSupports(supports)
-			vOrigMap[glyphName] = storeBuilder.storeDeltas(deltas)
+		for glyphName, (_, varIdx) in zip(glyphOrder, storeBuilder.storeMastersMatrix(vOrigs)):
+			vOrigMap[glyphName] = varIdx
 
 	indirectStore = storeBuilder.finish()
 	mapping2 = indirectStore.optimize()
@@ -873,13 +944,24 @@ def set_default_weight_width_slant(font, location):
 			font["post"].italicAngle = italicAngle
 
 
-def build(designspace, master_finder=lambda s:s, exclude=[], optimize=True):
+def build(designspace, master_finder=lambda s:s, exclude=[], optimize=True,
+		cache_dir=None, stream_masters=False):
 	"""
 	Build variation font from a designspace file.
 
 	If master_finder is set, it should be a callable that takes master
 	filename as found in designspace file and map it to master font
 	binary as to be opened (eg. .ttf or .otf).
+
+	If cache_dir is set, it is the path of a directory where the gvar data
+	of each glyph, and the HVAR, VVAR and merged OpenType Layout tables,
+	are stored along with fingerprints of their inputs; on subsequent
+	builds, the results whose inputs didn't change are reused.
+
+	If stream_masters is True, master font binaries are opened lazily from
+	memory-mapped files, and while building gvar and cvar the decompiled
+	master glyphs are freed after each chunk of glyphs, so that only the
+	raw glyph data stays resident.
 	"""
 	if hasattr(designspace, "sources"):  # Assume a DesignspaceDocument
 		pass
@@ -890,7 +972,7 @@ def build(designspace, master_finder=lambda s:s, exclude=[], optimize=True):
 	log.info("Building variable font")
 
 	log.info("Loading master fonts")
-	master_fonts = load_masters(designspace, master_finder)
+	master_fonts = load_masters(designspace, master_finder, stream=stream_masters)
 
 	# TODO: 'master_ttfs' is unused except for return value, remove later
 	master_ttfs = []
@@ -921,21 +1003,51 @@ def build(designspace, master_finder=lambda s:s, exclude=[], optimize=True):
 	model = models.VariationModel(normalized_master_locs, axisOrder=axisTags)
 	assert 0 == model.mapping[ds.base_idx]
 
+	cache = None
+	if cache_dir is not None:
+		cache = BuildCache(cache_dir)
+		# Fingerprint the inputs before any step gets to look at them.
+		modelKey = fingerprint(model.locations, axisTags, vf.getGlyphOrder())
+		masterKeys = [
+			{tag: tableFingerprint(master, tag) for tag in _CACHED_STEP_INPUTS}
+			for master in master_fonts
+		]
+
+	def buildTables(step, inputTags, outputTags, func):
+		if cache is None:
+			func()
+			return
+		key = fingerprint(step, modelKey, *[
+			[keys[tag] for tag in inputTags] for keys in masterKeys
+		])
+		cache.buildTables(step, key, vf, outputTags, func)
+
 	log.info("Building variations tables")
 	if 'BASE' not in exclude and 'BASE' in vf:
 		_add_BASE(vf, model, master_fonts, axisTags)
 	if 'MVAR' not in exclude:
 		_add_MVAR(vf, model, master_fonts, axisTags)
 	if 'HVAR' not in exclude:
-		_add_HVAR(vf, model, master_fonts, axisTags)
+		buildTables('HVAR', ['hmtx'], ['HVAR'],
+			lambda: _add_HVAR(vf, model, master_fonts, axisTags))
 	if 'VVAR' not in exclude and 'vmtx' in vf:
-		_add_VVAR(vf, model, master_fonts, axisTags)
+		buildTables('VVAR', ['vmtx', 'VORG'], ['VVAR'],
+			lambda: _add_VVAR(vf, model, master_fonts, axisTags))
 	if 'GDEF' not in exclude or 'GPOS' not in exclude:
-		_merge_OTL(vf, model, master_fonts, axisTags)
+		buildTables('OTL', ['GSUB', 'GDEF', 'GPOS'], ['GSUB', 'GDEF', 'GPOS'],
+			lambda: _merge_OTL(vf, model, master_fonts, axisTags))
+	releaser = None
+	if stream_masters and 'glyf' in vf:
+		releaser = _GlyfReleaser(master_fonts, STREAM_CHUNK_SIZE)
 	if 'gvar' not in exclude and 'glyf' in vf:
-		_add_gvar(vf, model, master_fonts, optimize=optimize)
+		_add_gvar(vf, model, master_fonts, optimize=optimize, cache=cache,
+			releaser=releaser)
+		if cache is not None:
+			cache.save()
 	if 'cvar' not in exclude and 'glyf' in vf:
-		_merge_TTHinting(vf, model, master_fonts)
+		_merge_TTHinting(vf, model, master_fonts, releaser=releaser)
+	if releaser is not None:
+		releaser.release()
 	if 'GSUB' not in exclude and ds.rules:
 		_add_GSUB_feature_variations(vf, ds.axes, ds.internal_axis_supports, ds.rules, ds.rulesProcessingLast)
 	if 'CFF2' not in exclude and ('CFF ' in vf or 'CFF2' in vf):
@@ -960,10 +1072,26 @@ def build(designspace, master_finder=lambda s:s, exclude=[], optimize=True):
 	return vf, model, master_ttfs
 
 
-def _open_font(path, master_finder=lambda s: s):
+# Master tables that the results of the cached build steps depend on
+_CACHED_STEP_INPUTS = ['hmtx', 'vmtx', 'VORG', 'GSUB', 'GDEF', 'GPOS']
+
+
+# Number of glyphs after which the decompiled master glyphs are freed
+# when building with stream_masters=True
+STREAM_CHUNK_SIZE = 256
+
+
+def _mmap_file(path):
+	import mmap
+	with open(path, "rb") as f:
+		return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _open_font(path, master_finder=lambda s: s, stream=False):
 	# load TTFont masters from given 'path': this can be either a .TTX or an
 	# OpenType binary font; or if neither of these, try use the 'master_finder'
 	# callable to resolve the path to a valid .TTX or OpenType font binary.
+	# If 'stream' is True, binary fonts are loaded lazily from a memory map.
 	from fontTools.ttx import guessFileType
 
 	master_path = os.path.normpath(path)
@@ -976,13 +1104,16 @@ def _open_font(path, master_finder=lambda s: s):
 		font = TTFont()
 		font.importXML(master_path)
 	elif tp in ("TTF", "OTF", "WOFF", "WOFF2"):
-		font = TTFont(master_path)
+		if stream:
+			font = TTFont(_mmap_file(master_path), lazy=True)
+		else:
+			font = TTFont(master_path)
 	else:
 		raise VarLibValidationError("Invalid master path: %r" % master_path)
 	return font
 
 
-def load_masters(designspace, master_finder=lambda s: s):
+def load_masters(designspace, master_finder=lambda s: s, stream=False):
 	"""Ensure that all SourceDescriptor.font attributes have an appropriate TTFont
 	object loaded, or else open TTFont objects from the SourceDescriptor.path
 	attributes.
@@ -991,6 +1122,9 @@ def load_masters(designspace, master_finder=lambda s: s):
 	latter case, use the provided master_finder callable to map from UFO paths to
 	the respective master font binaries (e.g. .ttf, .otf or .ttx).
 
+	If stream is True, master font binaries are opened lazily from memory-mapped
+	files.
+
 	Return list of master TTFont objects in the same order they are listed in the
 	DesignSpaceDocument.
 	"""
@@ -1004,7 +1138,8 @@ def load_masters(designspace, master_finder=lambda s: s):
 				"attribute."
 			)
 
-	return designspace.loadSourceFonts(_open_font, master_finder=master_finder)
+	return designspace.loadSourceFonts(
+		_open_font, master_finder=master_finder, stream=stream)
 
 
 class MasterFinder(object):
@@ -1068,6 +1203,25 @@ def main(args=None):
 			'name. The default value is "%(default)s".'
 		)
 	)
+	parser.add_argument(
+		'--cache-dir',
+		metavar='DIR',
+		default=None,
+		help=(
+			'directory where to keep the results of this build, to '
+			'only recompute those whose masters data changed on '
+			'subsequent builds'
+		)
+	)
+	parser.add_argument(
+		'--stream-masters',
+		action='store_true',
+		help=(
+			'open master fonts lazily from memory-mapped files and free '
+			'their decompiled glyphs as the build progresses, to bound '
+			'memory use with many or large masters'
+		)
+	)
 	logging_group = parser.add_mutually_exclusive_group(required=False)
 	logging_group.add_argument(
 		"-v", "--verbose",
@@ -1091,7 +1245,9 @@ def main(args=None):
 		designspace_filename,
 		finder,
 		exclude=options.exclude,
-		optimize=options.optimize
+		optimize=options.optimize,
+		cache_dir=options.cache_dir,
+		stream_masters=options.stream_masters,
 	)
 
 	outfile = options.outfile
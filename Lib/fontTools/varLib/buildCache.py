@@ -0,0 +1,176 @@
+"""Cache of the results of varLib.build(), for incremental rebuilds.
+
+The cache is a directory holding:
+
+- for the table building steps whose inputs are master tables (eg. HVAR,
+  or the merging of the OpenType Layout tables), the compiled output
+  tables, along with a fingerprint of the input master tables, the glyph
+  order and the variation model;
+
+- for gvar, the TupleVariations of each glyph, along with a fingerprint of
+  the master outlines and metrics (phantom points) of that glyph and of
+  the variation model used for it.
+
+When the fingerprint of a step or glyph is unchanged since the last build,
+its result is reused instead of being computed again.
+"""
+from fontTools.misc.py23 import *
+from fontTools.ttLib import newTable
+from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
+from fontTools.ttLib.tables.TupleVariation import TupleVariation
+import fontTools
+import hashlib
+import json
+import logging
+import os
+
+
+log = logging.getLogger("fontTools.varLib.buildCache")
+
+
+def fingerprint(*items):
+	h = hashlib.sha1(fontTools.version.encode())
+	for item in items:
+		if not isinstance(item, bytes):
+			item = repr(item).encode("utf-8")
+		h.update(b"%d:" % len(item))
+		h.update(item)
+	return h.hexdigest()
+
+
+def tableFingerprint(font, tag):
+	"""Returns the fingerprint of the compiled table 'tag' of 'font'."""
+	if tag not in font:
+		return ""
+	return fingerprint(tag, font.getTableData(tag))
+
+
+class BuildCache(object):
+
+	"""Build cache stored in the directory 'path', created if needed.
+
+	Table results are read lazily and written as soon as they are stored;
+	glyph variations are written by save()."""
+
+	def __init__(self, path):
+		self.path = path
+		self._glyphs = None
+		self._newGlyphs = {}
+		self.hits = self.misses = 0
+
+	def _tablesPath(self, step):
+		return os.path.join(self.path, "tables", step)
+
+	# Tables
+
+	def getTables(self, step, key):
+		"""Returns a dict of the compiled tables that were stored for 'step'
+		with the same 'key', None if there are none.  Tables stored as
+		absent map to None."""
+		path = self._tablesPath(step)
+		try:
+			with open(os.path.join(path, "key"), "r") as f:
+				if f.read() != key:
+					return None
+			with open(os.path.join(path, "tables.json"), "r") as f:
+				tags = json.load(f)
+			tables = {}
+			for tag, fileName in tags.items():
+				if fileName is None:
+					tables[tag] = None
+				else:
+					with open(os.path.join(path, fileName), "rb") as f:
+						tables[tag] = f.read()
+			return tables
+		except (OSError, ValueError):
+			return None
+
+	def putTables(self, step, key, tables):
+		"""Stores the dict of compiled 'tables' for 'step' under 'key'."""
+		path = self._tablesPath(step)
+		os.makedirs(path, exist_ok=True)
+		tags = {}
+		for i, (tag, data) in enumerate(sorted(tables.items())):
+			if data is None:
+				tags[tag] = None
+				continue
+			tags[tag] = fileName = "%d.bin" % i
+			with open(os.path.join(path, fileName), "wb") as f:
+				f.write(data)
+		with open(os.path.join(path, "tables.json"), "w") as f:
+			json.dump(tags, f)
+		# Written last, so that an interrupted write is a cache miss
+		with open(os.path.join(path, "key"), "w") as f:
+			f.write(key)
+
+	def buildTables(self, step, key, font, tags, func):
+		"""Calls func() to build the tables 'tags' of 'font', unless they
+		were stored for 'step' with the same 'key', in which case they are
+		decompiled from the cache instead.  Returns True on a cache hit."""
+		tables = self.getTables(step, key)
+		if tables is not None and set(tables) == set(tags):
+			log.info("Reusing cached %s", step)
+			for tag, data in tables.items():
+				if data is None:
+					if tag in font:
+						del font[tag]
+					continue
+				table = newTable(tag)
+				table.decompile(data, font)
+				font[tag] = table
+			return True
+		func()
+		self.putTables(step, key, {
+			tag: font.getTableData(tag) if tag in font else None
+			for tag in tags
+		})
+		return False
+
+	# Glyph variations
+
+	def _loadGlyphs(self):
+		try:
+			with open(os.path.join(self.path, "gvar.json"), "r") as f:
+				self._glyphs = json.load(f)
+		except (OSError, ValueError):
+			self._glyphs = {}
+
+	def getGlyphVariations(self, glyphName, key):
+		"""Returns the list of TupleVariations stored for 'glyphName' with the
+		same 'key', None if there are none."""
+		if self._glyphs is None:
+			self._loadGlyphs()
+		entry = self._glyphs.get(glyphName)
+		if entry is None or entry[0] != key:
+			self.misses += 1
+			return None
+		self.hits += 1
+		self._newGlyphs[glyphName] = entry
+		return [
+			TupleVariation(
+				{axis: tuple(support) for axis, support in axes.items()},
+				_decodeCoordinates(coordinates))
+			for axes, coordinates in entry[1]
+		]
+
+	def putGlyphVariations(self, glyphName, key, variations):
+		"""Stores the list of TupleVariations of 'glyphName' under 'key'."""
+		self._newGlyphs[glyphName] = [key, [
+			[var.axes, [None if pt is None else list(pt) for pt in var.coordinates]]
+			for var in variations
+		]]
+
+	def save(self):
+		"""Writes the glyph variations used or stored since the cache was
+		opened; those of other glyphs are dropped."""
+		os.makedirs(self.path, exist_ok=True)
+		with open(os.path.join(self.path, "gvar.json"), "w") as f:
+			json.dump(self._newGlyphs, f)
+		log.info("Reused cached gvar for %d of %d glyphs",
+			 self.hits, self.hits + self.misses)
+
+
+def _decodeCoordinates(coordinates):
+	if any(pt is None for pt in coordinates):
+		return [None if pt is None else tuple(pt) for pt in coordinates]
+	return GlyphCoordinates(coordinates)
@@ -355,10 +355,9 @@ def instantiateGvarGlyph(varfont, glyphname, axisLimits, optimize=True):
             var.optimize(coordinates, endPts, isComposite)
 
 
-def instantiateGvar(varfont, axisLimits, optimize=True):
+def instantiateGvar(varfont, axisLimits, optimize=True, workers=None):
     log.info("Instantiating glyf/gvar tables")
 
-    gvar = varfont["gvar"]
     glyf = varfont["glyf"]
     # Get list of glyph names sorted by component depth.
     # If a composite glyph is processed before its base glyph, the bounds may
@@ -373,13 +372,159 @@ def instantiateGvar(varfont, axisLimits, optimize=True):
             name,
         ),
     )
-    for glyphname in glyphnames:
-        instantiateGvarGlyph(varfont, glyphname, axisLimits, optimize=optimize)
+    if workers is not None and workers > 1:
+        _instantiateGvarParallel(varfont, glyphnames, axisLimits, optimize, workers)
+    else:
+        for glyphname in glyphnames:
+            instantiateGvarGlyph(varfont, glyphname, axisLimits, optimize=optimize)
 
-    if not gvar.variations:
+    if not varfont["gvar"].variations:
         del varfont["gvar"]
 
 
+def _getGvarGlyphData(varfont, axisTags):
+    # Return the shared tuples and a dict of raw per-glyph variation data.
+    # If the 'gvar' table was not decompiled yet, the data is sliced from the
+    # binary table without decompiling it.
+    from fontTools.ttLib.tables import _g_v_a_r
+    from fontTools.misc import sstruct
+
+    if varfont.isLoaded("gvar") or varfont.reader is None:
+        gvar = varfont["gvar"]
+        glyf = varfont["glyf"]
+        glyphData = {}
+        for glyphname, variations in gvar.variations.items():
+            pointCount = gvar.getNumPoints_(glyf[glyphname])
+            glyphData[glyphname] = _g_v_a_r.compileGlyph_(
+                variations, pointCount, axisTags, {}
+            )
+        return [], glyphData
+
+    data = varfont.reader["gvar"]
+    header = sstruct.unpack(
+        _g_v_a_r.GVAR_HEADER_FORMAT, data[: _g_v_a_r.GVAR_HEADER_SIZE]
+    )
+    glyphOrder = varfont.getGlyphOrder()
+    assert header["glyphCount"] == len(glyphOrder)
+    offsets = _g_v_a_r.table__g_v_a_r.decompileOffsets_(
+        data[_g_v_a_r.GVAR_HEADER_SIZE :],
+        tableFormat=(header["flags"] & 1),
+        glyphCount=header["glyphCount"],
+    )
+    sharedTuples = _g_v_a_r.tv.decompileSharedTuples(
+        axisTags, header["sharedTupleCount"], data, header["offsetToSharedTuples"]
+    )
+    offsetToData = header["offsetToGlyphVariationData"]
+    glyphData = {
+        glyphname: data[offsetToData + offsets[i] : offsetToData + offsets[i + 1]]
+        for i, glyphname in enumerate(glyphOrder)
+    }
+    return sharedTuples, glyphData
+
+
+def _instantiateGvarGlyphData(items, sharedTuples, axisTags, axisLimits, optimize):
+    # Runs in a worker process; see _instantiateGvarParallel.
+    # Same as instantiateGvarGlyph, minus setting the glyph's coordinates,
+    # which must be done in component depth order by the caller.
+    from fontTools.ttLib.tables import _g_v_a_r
+
+    results = []
+    for coordinatesData, typecode, endPts, isComposite, glyphData in items:
+        coordinates = _g_l_y_f.GlyphCoordinates(typecode=typecode)
+        coordinates.array.frombytes(coordinatesData)
+        pointCount = len(coordinates)
+        tupleVarStore = _g_v_a_r.decompileGlyph_(
+            pointCount, sharedTuples, axisTags, glyphData
+        )
+        defaultDeltas = instantiateTupleVariationStore(
+            tupleVarStore, axisLimits, coordinates, endPts
+        )
+        if defaultDeltas:
+            coordinates += _g_l_y_f.GlyphCoordinates(defaultDeltas)
+        if optimize:
+            for var in tupleVarStore:
+                var.optimize(coordinates, endPts, isComposite)
+        results.append(
+            (
+                coordinates.array.typecode,
+                coordinates.array.tobytes(),
+                _g_v_a_r.compileGlyph_(tupleVarStore, pointCount, axisTags, {}),
+            )
+        )
+    return results
+
+
+def _instantiateGvarParallel(varfont, glyphnames, axisLimits, optimize, workers):
+    # Glyphs' deltas are instantiated (and optionally IUP-optimized) in worker
+    # processes, which exchange raw coordinate arrays and gvar glyph data with
+    # the main process. Only glyf.setCoordinates, which recalculates bounds and
+    # metrics from the components, depends on the glyphs' component depth: the
+    # results are consumed in the depth-sorted order while the workers proceed.
+    from concurrent.futures import ProcessPoolExecutor
+    from fontTools.ttLib import newTable
+    from fontTools.ttLib.tables import _g_v_a_r
+
+    axisTags = [axis.axisTag for axis in varfont["fvar"].axes]
+    sharedTuples, glyphData = _getGvarGlyphData(varfont, axisTags)
+    glyf = varfont["glyf"]
+
+    # glyphs without variations only need their coordinates to be set
+    coordinates = {}
+    todo = []
+    items = []
+    for glyphname in glyphnames:
+        coords, ctrl = glyf.getCoordinatesAndControls(glyphname, varfont)
+        coordinates[glyphname] = coords
+        data = glyphData.get(glyphname)
+        if data:
+            todo.append(glyphname)
+            items.append(
+                (
+                    coords.array.tobytes(),
+                    coords.array.typecode,
+                    ctrl.endPts,
+                    glyf[glyphname].isComposite(),
+                    data,
+                )
+            )
+
+    chunkSize = max(1, min(256, len(items) // (workers * 4) or 1))
+    chunks = [items[i : i + chunkSize] for i in range(0, len(items), chunkSize)]
+
+    variations = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            _instantiateGvarGlyphData,
+            chunks,
+            *[[arg] * len(chunks) for arg in (sharedTuples, axisTags, axisLimits, optimize)],
+        )
+        done = iter(todo)
+        pending = iter(glyphnames)
+        for chunkResults in results:
+            for typecode, coordinatesData, data in chunkResults:
+                glyphname = next(done)
+                coords = _g_l_y_f.GlyphCoordinates(typecode=typecode)
+                coords.array.frombytes(coordinatesData)
+                coordinates[glyphname] = coords
+                if data:
+                    pointCount = len(coords)
+                    variations[glyphname] = _g_v_a_r.decompileGlyph_(
+                        pointCount, [], axisTags, data
+                    )
+                # set coordinates of all the glyphs up to this one in depth order
+                for name in pending:
+                    glyf.setCoordinates(name, coordinates.pop(name), varfont)
+                    if name == glyphname:
+                        break
+        for name in pending:
+            glyf.setCoordinates(name, coordinates.pop(name), varfont)
+
+    gvar = varfont["gvar"] if varfont.isLoaded("gvar") else newTable("gvar")
+    gvar.version, gvar.reserved = 1, 0
+    gvar.variations = variations
+    varfont["gvar"] = gvar
+
+
 def setCvarDeltas(cvt, deltas):
     for i, delta in enumerate(deltas):
         if delta:
@@ -1175,7 +1320,7 @@ def populateAxisDefaults(varfont, axisLimits):
 
 
 def instantiateVariableFont(
-    varfont, axisLimits, inplace=False, optimize=True, overlap=True
+    varfont, axisLimits, inplace=False, optimize=True, overlap=True, workers=None
 ):
     """ Instantiate variable font, either fully or partially.
 
@@ -1204,6 +1349,8 @@ def instantiateVariableFont(
             using a non-zero fill rule. Thus we always set these flags on all glyphs
             to maximise cross-compatibility of the generated instance. You can disable
             this by setting `overalap` to False.
+        workers (int): if greater than 1, the 'gvar' deltas are instantiated in that
+            many worker processes.
     """
     sanityCheckVariableTables(varfont)
 
@@ -1217,7 +1364,9 @@ def instantiateVariableFont(
         varfont = deepcopy(varfont)
 
     if "gvar" in varfont:
-        instantiateGvar(varfont, normalizedLimits, optimize=optimize)
+        instantiateGvar(
+            varfont, normalizedLimits, optimize=optimize, workers=workers
+        )
 
     if "cvar" in varfont:
         instantiateCvar(varfont, normalizedLimits)
@@ -1346,6 +1495,13 @@ def parseArgs(args):
         help="Don't set OVERLAP_SIMPLE/OVERLAP_COMPOUND glyf flags (only applicable "
         "when generating a full instance)",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes used to instantiate the gvar table",
+    )
     loggingGroup = parser.add_mutually_exclusive_group(required=False)
     loggingGroup.add_argument(
         "-v", "--verbose", action="store_true", help="Run more verbosely."
@@ -1391,6 +1547,7 @@ def main(args=None):
         inplace=True,
         optimize=options.optimize,
         overlap=options.overlap,
+        workers=options.jobs,
     )
 
     outfile = (
@@ -7,9 +7,9 @@ $ fonttools varLib.interpolatable font1 font2 ...
 """
 
 from fontTools.pens.basePen import AbstractPen, BasePen
-from fontTools.pens.recordingPen import RecordingPen
+from fontTools.pens.momentsPen import MomentsPen
 from fontTools.pens.statisticsPen import StatisticsPen
-import itertools
+import math
 
 
 class PerContourPen(BasePen):
@@ -46,6 +46,68 @@ class PerContourOrComponentPen(PerContourPen):
 		self.value[-1].addComponent(glyphName, transformation)
 
 
+class _ContourVectorsPen(MomentsPen):
+	"""Computes a statistics vector for each contour and component of the
+	glyph drawn into it, in a single pass.
+
+	The moments are reset at the start of each contour; the vector is
+	computed from them when the contour is closed.  Components are
+	measured as a whole, with their own StatisticsPen."""
+
+	def __init__(self, glyphset=None):
+		MomentsPen.__init__(self, glyphset=glyphset)
+		self.vectors = []
+
+	def _moveTo(self, p0):
+		self.area = 0
+		self.momentX = 0
+		self.momentY = 0
+		self.momentXX = 0
+		self.momentXY = 0
+		self.momentYY = 0
+		MomentsPen._moveTo(self, p0)
+
+	def _closePath(self):
+		MomentsPen._closePath(self)
+		self.vectors.append(_statisticsVector(self))
+
+	def _endPath(self):
+		MomentsPen._endPath(self)
+		self.vectors.append(_statisticsVector(self))
+
+	def addComponent(self, glyphName, transformation):
+		stats = StatisticsPen(glyphset=self.glyphSet)
+		stats.addComponent(glyphName, transformation)
+		self.vectors.append(_statisticsVector(stats))
+
+
+def _statisticsVector(moments):
+	"""Returns the comparison vector of a contour from its moments of area,
+	with the same statistics as StatisticsPen computes."""
+	area = moments.area
+	size = abs(area) ** .5 * .5
+	if not area:
+		return (int(size), 0, 0, 0, 0, 0)
+	meanX = moments.momentX / area
+	meanY = moments.momentY / area
+	varianceX = moments.momentXX / area - meanX**2
+	varianceY = moments.momentYY / area - meanY**2
+	stddevX = math.copysign(abs(varianceX)**.5, varianceX)
+	stddevY = math.copysign(abs(varianceY)**.5, varianceY)
+	covariance = moments.momentXY / area - meanX*meanY
+	correlation = covariance / (stddevX * stddevY)
+	if abs(correlation) <= 1e-3:
+		correlation = 0
+	return (
+		int(size),
+		int(meanX),
+		int(meanY),
+		int(stddevX * 2),
+		int(stddevY * 2),
+		int(correlation * size),
+	)
+
+
 def _vdiff(v0, v1):
 	return tuple(b-a for a,b in zip(v0,v1))
 def _vlen(vec):
@@ -57,122 +119,260 @@ def _vlen(vec):
 def _matching_cost(G, matching):
 	return sum(G[i][j] for i,j in enumerate(matching))
 
+def _hungarian(G):
+	"""Solves the assignment problem for the square cost matrix G with the
+	Hungarian algorithm, in O(n**3).  Returns the column matched to each row.
+
+	>>> _hungarian([[4, 1, 3], [2, 0, 5], [3, 2, 2]])
+	[1, 0, 2]
+	"""
+	n = len(G)
+	inf = float('inf')
+	# Row and column potentials, and the row matched to each column; all
+	# 1-based, with column 0 as a sentinel for the row being inserted.
+	u = [0] * (n + 1)
+	v = [0] * (n + 1)
+	p = [0] * (n + 1)
+	way = [0] * (n + 1)
+	for i in range(1, n + 1):
+		p[0] = i
+		j0 = 0
+		minv = [inf] * (n + 1)
+		used = [False] * (n + 1)
+		while True:
+			used[j0] = True
+			i0 = p[j0]
+			row = G[i0 - 1]
+			ui0 = u[i0]
+			delta = inf
+			j1 = 0
+			for j in range(1, n + 1):
+				if not used[j]:
+					cur = row[j - 1] - ui0 - v[j]
+					if cur < minv[j]:
+						minv[j] = cur
+						way[j] = j0
+					if minv[j] < delta:
+						delta = minv[j]
+						j1 = j
+			for j in range(n + 1):
+				if used[j]:
+					u[p[j]] += delta
+					v[j] -= delta
+				else:
+					minv[j] -= delta
+			j0 = j1
+			if not p[j0]:
+				break
+		# Augment along the alternating path.
+		while j0:
+			j1 = way[j0]
+			p[j0] = p[j1]
+			j0 = j1
+	matching = [0] * n
+	for j in range(1, n + 1):
+		matching[p[j] - 1] = j - 1
+	return matching
+
 def min_cost_perfect_bipartite_matching(G):
 	n = len(G)
 	try:
 		from scipy.optimize import linear_sum_assignment
 		rows, cols = linear_sum_assignment(G)
 		assert (rows == list(range(n))).all()
-		return list(cols), _matching_cost(G, cols)
+		cols = [int(col) for col in cols]
 	except ImportError:
-		pass
+		cols = _hungarian(G)
+	return cols, _matching_cost(G, cols)
 
-	try:
-		from munkres import Munkres
-		cols = [None] * n
-		for row,col in Munkres().compute(G):
-			cols[row] = col
-		return cols, _matching_cost(G, cols)
-	except ImportError:
-		pass
 
-	if n > 6:
-		raise Exception("Install Python module 'munkres' or 'scipy >= 0.17.0'")
+def _glyph_vectors(glyphset, glyph_name):
+	pen = _ContourVectorsPen(glyphset=glyphset)
+	glyphset[glyph_name].draw(pen)
+	return pen.vectors
 
-	# Otherwise just brute-force
-	permutations = itertools.permutations(range(n))
-	best = list(next(permutations))
-	best_cost = _matching_cost(G, best)
-	for p in permutations:
-		cost = _matching_cost(G, p)
-		if cost < best_cost:
-			best, best_cost = list(p), cost
-	return best, best_cost
 
+def _glyph_problems(glyphsets, glyph_name, names):
+	"""Returns the list of problems found in glyph_name across glyphsets."""
+	problems = []
+	allVectors = []
+	for glyphset,name in zip(glyphsets, names):
+		if glyph_name not in glyphset:
+			problems.append({"type": "missing", "master": name})
+			allVectors.append(None)
+			continue
+		try:
+			allVectors.append(_glyph_vectors(glyphset, glyph_name))
+		except (ValueError, ZeroDivisionError) as e:
+			problems.append({"type": "math_error", "master": name, "error": str(e)})
+			allVectors.append(None)
 
-def test(glyphsets, glyphs=None, names=None):
+	# Check each master against the next one in the list.
+	for i,(m0,m1) in enumerate(zip(allVectors[:-1], allVectors[1:])):
+		if m0 is None or m1 is None:
+			continue
+		if len(m0) != len(m1):
+			problems.append({
+				"type": "path_count",
+				"master_1": names[i],
+				"master_2": names[i+1],
+				"value_1": len(m0),
+				"value_2": len(m1),
+			})
+			continue
+		if not m0:
+			continue
+		costs = [[_vlen(_vdiff(v0,v1)) for v1 in m1] for v0 in m0]
+		matching, matching_cost = min_cost_perfect_bipartite_matching(costs)
+		identity = list(range(len(m0)))
+		if matching != identity:
+			identity_cost = _matching_cost(costs, identity)
+			if identity_cost > matching_cost:
+				problems.append({
+					"type": "contour_order",
+					"master_1": names[i],
+					"master_2": names[i+1],
+					"value_1": identity,
+					"value_2": matching,
+				})
+				break
+			matching_cost = identity_cost
+		upem = 2048
+		item_cost = round((matching_cost / len(m0) / len(m0[0])) ** .5 / upem * 100)
+		threshold = 7
+		if item_cost >= threshold:
+			problems.append({
+				"type": "high_cost",
+				"master_1": names[i],
+				"master_2": names[i+1],
+				"value_1": item_cost,
+				"value_2": threshold,
+			})
+	return problems
 
+
+def test_gen(glyphsets, glyphs=None, names=None):
+	"""Checks the glyphs of glyphsets for interpolation compatibility,
+	yielding (glyph_name, problem) tuples as they are found.  Each problem
+	is a dict with a "type" key and the masters and values involved."""
 	if names is None:
 		names = glyphsets
 	if glyphs is None:
 		glyphs = glyphsets[0].keys()
 
-	hist = []
 	for glyph_name in glyphs:
-		#print()
-		#print(glyph_name)
+		for problem in _glyph_problems(glyphsets, glyph_name, names):
+			yield glyph_name, problem
 
-		try:
-			allVectors = []
-			for glyphset,name in zip(glyphsets, names):
-				#print('.', end='')
-				glyph = glyphset[glyph_name]
-
-				perContourPen = PerContourOrComponentPen(RecordingPen, glyphset=glyphset)
-				glyph.draw(perContourPen)
-				contourPens = perContourPen.value
-				del perContourPen
-
-				contourVectors = []
-				allVectors.append(contourVectors)
-				for contour in contourPens:
-					stats = StatisticsPen(glyphset=glyphset)
-					contour.replay(stats)
-					size = abs(stats.area) ** .5 * .5
-					vector = (
-						int(size),
-						int(stats.meanX),
-						int(stats.meanY),
-						int(stats.stddevX * 2),
-						int(stats.stddevY * 2),
-						int(stats.correlation * size),
-					)
-					contourVectors.append(vector)
-					#print(vector)
-
-			# Check each master against the next one in the list.
-			for i,(m0,m1) in enumerate(zip(allVectors[:-1],allVectors[1:])):
-				if len(m0) != len(m1):
-					print('%s: %s+%s: Glyphs not compatible!!!!!' % (glyph_name, names[i], names[i+1]))
-					continue
-				if not m0:
-					continue
-				costs = [[_vlen(_vdiff(v0,v1)) for v1 in m1] for v0 in m0]
-				matching, matching_cost = min_cost_perfect_bipartite_matching(costs)
-				if matching != list(range(len(m0))):
-					print('%s: %s+%s: Glyph has wrong contour/component order: %s' % (glyph_name, names[i], names[i+1], matching)) #, m0, m1)
-					break
-				upem = 2048
-				item_cost = round((matching_cost / len(m0) / len(m0[0])) ** .5 / upem * 100)
-				hist.append(item_cost)
-				threshold = 7
-				if item_cost >= threshold:
-					print('%s: %s+%s: Glyph has very high cost: %d%%' % (glyph_name, names[i], names[i+1], item_cost))
-
-
-		except ValueError as e:
-			print('%s: %s: math error %s; skipping glyph.' % (glyph_name, name, e))
-			print(contour.value)
-			#raise
-	#for x in hist:
-	#	print(x)
-
-def main(args):
-	filenames = args
-	glyphs = None
-	#glyphs = ['uni08DB', 'uniFD76']
-	#glyphs = ['uni08DE', 'uni0034']
-	#glyphs = ['uni08DE', 'uni0034', 'uni0751', 'uni0753', 'uni0754', 'uni08A4', 'uni08A4.fina', 'uni08A5.fina']
 
+def test(glyphsets, glyphs=None, names=None):
+	"""Returns a dict mapping the names of the glyphs that have problems
+	to the list of their problems, as yielded by test_gen()."""
+	problems = {}
+	for glyph_name, problem in test_gen(glyphsets, glyphs=glyphs, names=names):
+		problems.setdefault(glyph_name, []).append(problem)
+	return problems
+
+
+_worker_glyphsets = {}
+
+def _load_glyphsets(paths):
+	from fontTools.ttLib import TTFont
+	return [TTFont(path).getGlyphSet() for path in paths]
+
+def _test_paths_chunk(paths, glyphs, names):
+	# Worker processes keep the fonts they loaded for subsequent chunks.
+	key = tuple(paths)
+	glyphsets = _worker_glyphsets.get(key)
+	if glyphsets is None:
+		_worker_glyphsets.clear()
+		glyphsets = _worker_glyphsets[key] = _load_glyphsets(paths)
+	return list(test_gen(glyphsets, glyphs=glyphs, names=names))
+
+
+def test_paths_gen(paths, glyphs=None, names=None, workers=None, chunkSize=64):
+	"""Like test_gen(), but for the font files at paths.
+
+	If 'workers' is greater than 1, glyphs are checked in that many
+	processes, each loading the fonts once; problems are then yielded
+	as soon as the chunk of glyphs they were found in is done, so not
+	necessarily in glyph order."""
 	from os.path import basename
-	names = [basename(filename).rsplit('.', 1)[0] for filename in filenames]
+	if names is None:
+		names = [basename(path).rsplit('.', 1)[0] for path in paths]
+
+	if workers is None or workers <= 1:
+		glyphsets = _load_glyphsets(paths)
+		for result in test_gen(glyphsets, glyphs=glyphs, names=names):
+			yield result
+		return
 
+	from concurrent.futures import ProcessPoolExecutor, as_completed
 	from fontTools.ttLib import TTFont
-	fonts = [TTFont(filename) for filename in filenames]
 
-	glyphsets = [font.getGlyphSet() for font in fonts]
-	test(glyphsets, glyphs=glyphs, names=names)
+	if glyphs is None:
+		glyphs = TTFont(paths[0]).getGlyphOrder()
+	glyphs = list(glyphs)
+	chunks = [glyphs[i:i+chunkSize] for i in range(0, len(glyphs), chunkSize)]
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		futures = [executor.submit(_test_paths_chunk, paths, chunk, names)
+			   for chunk in chunks]
+		for future in as_completed(futures):
+			for result in future.result():
+				yield result
+
+
+def _format_problem(glyph_name, problem):
+	t = problem["type"]
+	if t == "missing":
+		return '%s: Glyph was missing in master %s' % (glyph_name, problem["master"])
+	if t == "math_error":
+		return '%s: %s: math error %s; skipping glyph.' % (
+			glyph_name, problem["master"], problem["error"])
+	masters = '%s+%s' % (problem["master_1"], problem["master_2"])
+	if t == "path_count":
+		return '%s: %s: Glyphs not compatible: %d vs %d contours/components' % (
+			glyph_name, masters, problem["value_1"], problem["value_2"])
+	if t == "contour_order":
+		return '%s: %s: Glyph has wrong contour/component order: %s' % (
+			glyph_name, masters, problem["value_2"])
+	if t == "high_cost":
+		return '%s: %s: Glyph has very high cost: %d%%' % (
+			glyph_name, masters, problem["value_1"])
+	return '%s: %s' % (glyph_name, problem)
+
+
+def main(args=None):
+	"""Check interpolation compatibility of master fonts"""
+	import argparse
+	import json
+
+	parser = argparse.ArgumentParser(
+		"fonttools varLib.interpolatable",
+		description=main.__doc__)
+	parser.add_argument('inputs', metavar='FILE', nargs='+',
+		help="Input master TTF/OTF files")
+	parser.add_argument('-g', '--glyphs', metavar='GLYPHS',
+		help="Space-separated names of the glyphs to check")
+	parser.add_argument('-j', '--jobs', metavar='N', type=int,
+		help="Check glyphs in N worker processes")
+	parser.add_argument('--json', action='store_true',
+		help="Output one JSON object per problem, as they are found")
+	options = parser.parse_args(args)
+
+	glyphs = options.glyphs.split() if options.glyphs else None
+
+	found = False
+	for glyph_name, problem in test_paths_gen(
+			options.inputs, glyphs=glyphs, workers=options.jobs):
+		found = True
+		if options.json:
+			print(json.dumps(dict(problem, glyph=glyph_name)), flush=True)
+		else:
+			print(_format_problem(glyph_name, problem), flush=True)
+	if found:
+		return 1
 
 if __name__ == '__main__':
 	import sys
-	main(sys.argv[1:])
+	sys.exit(main())
@@ -415,76 +415,160 @@ def _ClassDef_calculate_Format(self, font):
 			fmt = 1
 	self.Format = fmt
 
-def _PairPosFormat2_align_matrices(self, lst, font, transparent=False):
+def _PairPosFormat2_align_classes(self, lst, font):
+	"""Merges the class definitions of the subtables in lst into self.
 
-	matrices = [l.Class1Record for l in lst]
+	Returns two lists with one item per subtable: the first holds, for each
+	merged first class, the old first class it maps to, or None if the
+	subtable does not cover it; the second holds, for each merged second
+	class, the old second class it maps to."""
 
 	# Align first classes
 	self.ClassDef1, classes = _ClassDef_merge_classify([l.ClassDef1 for l in lst], [l.Coverage.glyphs for l in lst])
 	_ClassDef_calculate_Format(self.ClassDef1, font)
 	self.Class1Count = len(classes)
-	new_matrices = []
-	for l,matrix in zip(lst, matrices):
-		nullRow = None
+	class1Maps = []
+	for l in lst:
 		coverage = set(l.Coverage.glyphs)
 		classDef1 = l.ClassDef1.classDefs
-		class1Records = []
+		class1Map = []
 		for classSet in classes:
 			exemplarGlyph = next(iter(classSet))
 			if exemplarGlyph not in coverage:
-				# Follow-up to e6125b353e1f54a0280ded5434b8e40d042de69f,
-				# Fixes https://github.com/googlei18n/fontmake/issues/470
-				# Again, revert 8d441779e5afc664960d848f62c7acdbfc71d7b9
-				# when merger becomes selfless.
-				nullRow = None
-				if nullRow is None:
-					nullRow = ot.Class1Record()
-					class2records = nullRow.Class2Record = []
-					# TODO: When merger becomes selfless, revert e6125b353e1f54a0280ded5434b8e40d042de69f
-					for _ in range(l.Class2Count):
-						if transparent:
-							rec2 = None
-						else:
-							rec2 = ot.Class2Record()
-							rec2.Value1 = otBase.ValueRecord(self.ValueFormat1) if self.ValueFormat1 else None
-							rec2.Value2 = otBase.ValueRecord(self.ValueFormat2) if self.ValueFormat2 else None
-						class2records.append(rec2)
-				rec1 = nullRow
+				class1Map.append(None)
 			else:
-				klass = classDef1.get(exemplarGlyph, 0)
-				rec1 = matrix[klass] # TODO handle out-of-range?
-			class1Records.append(rec1)
-		new_matrices.append(class1Records)
-	matrices = new_matrices
-	del new_matrices
+				class1Map.append(classDef1.get(exemplarGlyph, 0))
+		class1Maps.append(class1Map)
 
 	# Align second classes
 	self.ClassDef2, classes = _ClassDef_merge_classify([l.ClassDef2 for l in lst])
 	_ClassDef_calculate_Format(self.ClassDef2, font)
 	self.Class2Count = len(classes)
-	new_matrices = []
-	for l,matrix in zip(lst, matrices):
+	class2Maps = []
+	for l in lst:
 		classDef2 = l.ClassDef2.classDefs
+		class2Map = []
+		for classSet in classes:
+			if not classSet: # class=0
+				class2Map.append(0)
+			else:
+				exemplarGlyph = next(iter(classSet))
+				class2Map.append(classDef2.get(exemplarGlyph, 0))
+		class2Maps.append(class2Map)
+
+	return class1Maps, class2Maps
+
+def _PairPosFormat2_align_matrices(self, lst, font, transparent=False):
+
+	class1Maps, class2Maps = _PairPosFormat2_align_classes(self, lst, font)
+
+	matrices = []
+	for l,class1Map,class2Map in zip(lst, class1Maps, class2Maps):
+		matrix = l.Class1Record
 		class1Records = []
-		for rec1old in matrix:
-			oldClass2Records = rec1old.Class2Record
+		for klass1 in class1Map:
+			if klass1 is None:
+				# Follow-up to e6125b353e1f54a0280ded5434b8e40d042de69f,
+				# Fixes https://github.com/googlei18n/fontmake/issues/470
+				# Again, revert 8d441779e5afc664960d848f62c7acdbfc71d7b9
+				# when merger becomes selfless.
+				oldClass2Records = []
+				# TODO: When merger becomes selfless, revert e6125b353e1f54a0280ded5434b8e40d042de69f
+				for _ in range(l.Class2Count):
+					if transparent:
+						rec2 = None
+					else:
+						rec2 = ot.Class2Record()
+						rec2.Value1 = otBase.ValueRecord(self.ValueFormat1) if self.ValueFormat1 else None
+						rec2.Value2 = otBase.ValueRecord(self.ValueFormat2) if self.ValueFormat2 else None
+					oldClass2Records.append(rec2)
+			else:
+				oldClass2Records = matrix[klass1].Class2Record # TODO handle out-of-range?
 			rec1new = ot.Class1Record()
-			class2Records = rec1new.Class2Record = []
-			for classSet in classes:
-				if not classSet: # class=0
-					rec2 = oldClass2Records[0]
-				else:
-					exemplarGlyph = next(iter(classSet))
-					klass = classDef2.get(exemplarGlyph, 0)
-					rec2 = oldClass2Records[klass]
-				class2Records.append(copy.deepcopy(rec2))
+			rec1new.Class2Record = [copy.deepcopy(oldClass2Records[klass2])
+						for klass2 in class2Map]
 			class1Records.append(rec1new)
-		new_matrices.append(class1Records)
-	matrices = new_matrices
-	del new_matrices
+		matrices.append(class1Records)
 
 	return matrices
 
+def _ValueRecord_copy(self):
+	if all(v is None or isinstance(v, int) for v in self.__dict__.values()):
+		return otBase.ValueRecord(src=self)
+	return copy.deepcopy(self)
+
+def _PairPosFormat2_merge_variations(self, lst, merger):
+	"""Builds the Class1Record matrix of self from the subtables in lst,
+	like merging their aligned matrices with merger.mergeLists() would, but
+	without building the aligned matrices: the master values of all value
+	records are gathered first, then their deltas are computed a whole
+	column at a time and stored in the same order mergeLists() would store
+	them."""
+	class1Maps, class2Maps = _PairPosFormat2_align_classes(self, lst, merger.font)
+
+	model = merger.model
+	nullValues = [otBase.ValueRecord(vf) if vf else None
+		      for vf in (self.ValueFormat1, self.ValueFormat2)]
+	# List of (subModel, fields) to store, in mergeLists() order; subModel is
+	# None for fields of records present in all masters.
+	jobs = []
+	fields = []
+	class1Records = []
+	for i in range(self.Class1Count):
+		masterRows = []
+		for l,class1Map,class2Map in zip(lst, class1Maps, class2Maps):
+			klass1 = class1Map[i]
+			if klass1 is None:
+				masterRows.append(None)
+			else:
+				oldClass2Records = l.Class1Record[klass1].Class2Record
+				masterRows.append([oldClass2Records[klass2] for klass2 in class2Map])
+		rec1 = ot.Class1Record()
+		rec1.Class2Record = []
+		for j in range(self.Class2Count):
+			rec2 = ot.Class2Record()
+			for valueName, nullValue in zip(('Value1', 'Value2'), nullValues):
+				values = [nullValue if row is None else getattr(row[j], valueName)
+					  for row in masterRows]
+				out = values[0]
+				subModel = None
+				if None in values:
+					if allNone(values):
+						setattr(rec2, valueName, None)
+						continue
+					subModel, values = model.getSubModel(values)
+				if not allEqualTo(out, values, type):
+					raise VarLibMergeError((out, values))
+				out = _ValueRecord_copy(out)
+				setattr(rec2, valueName, out)
+				if subModel is not None:
+					jobs.append((None, fields))
+					fields = []
+				for name, tableName in _ValueRecord_variable_fields:
+					if hasattr(out, name):
+						masterValues = [getattr(a, name, 0) for a in values]
+						if not allEqual(masterValues):
+							fields.append((out, name, tableName, masterValues))
+				if subModel is not None:
+					jobs.append((subModel, fields))
+					fields = []
+			rec1.Class2Record.append(rec2)
+		class1Records.append(rec1)
+	jobs.append((None, fields))
+
+	storeBuilder = merger.store_builder
+	for subModel, fields in jobs:
+		if subModel is not None:
+			merger.setModel(subModel)
+		stored = storeBuilder.storeMastersMatrix([masterValues for _,_,_,masterValues in fields])
+		for (out, name, tableName, _), (base, varIdx) in zip(fields, stored):
+			setattr(out, name, base)
+			setattr(out, tableName, builder.buildVarDevTable(varIdx))
+		if subModel is not None:
+			merger.setModel(model)
+
+	return class1Records
+
 def _PairPosFormat2_merge(self, lst, merger):
 	assert allEqual([l.ValueFormat2 == 0 for l in lst if l.Class1Record]), "Report bug against fonttools."
 
@@ -511,6 +595,10 @@ def _PairPosFormat2_merge(self, lst, merger):
 		if l.Coverage.glyphs != glyphs:
 			assert l == subtables[-1]
 
+	if isinstance(merger, VariationMerger):
+		self.Class1Record = _PairPosFormat2_merge_variations(self, lst, merger)
+		return
+
 	matrices = _PairPosFormat2_align_matrices(self, lst, merger.font)
 
 	self.Class1Record = list(matrices[0]) # TODO move merger to be selfless
@@ -1081,12 +1169,14 @@ def merge(merger, self, lst):
 		self.XDeviceTable = XDeviceTable
 		self.YDeviceTable = YDeviceTable
 
-@VariationMerger.merger(otBase.ValueRecord)
-def merge(merger, self, lst):
-	for name, tableName in [('XAdvance','XAdvDevice'),
+_ValueRecord_variable_fields = [('XAdvance','XAdvDevice'),
 				('YAdvance','YAdvDevice'),
 				('XPlacement','XPlaDevice'),
-				('YPlacement','YPlaDevice')]:
+				('YPlacement','YPlaDevice')]
+
+@VariationMerger.merger(otBase.ValueRecord)
+def merge(merger, self, lst):
+	for name, tableName in _ValueRecord_variable_fields:
 
 		if hasattr(self, name):
 			value, deviceTable = buildVarDevTable(merger.store_builder,
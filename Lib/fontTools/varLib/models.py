@@ -6,6 +6,7 @@ __all__ = ['nonNone', 'allNone', 'allEqual', 'allEqualTo', 'subList',
 	   'VariationModel']
 
 from .errors import VariationModelError
+from collections import OrderedDict
 
 
 def nonNone(lst):
@@ -213,6 +214,7 @@ class VariationModel(object):
 
 		self._computeMasterSupports(keyFunc.axisPoints)
 		self._subModels = {}
+		self._scalarCache = OrderedDict()
 
 	def getSubModel(self, items):
 		if None not in items:
@@ -357,6 +359,7 @@ class VariationModel(object):
 
 		self.supports = supports
 		self.deltaWeights = deltaWeights
+		self._deltaWeightsItems = [list(w.items()) for w in deltaWeights]
 
 	def getDeltas(self, masterValues):
 		assert len(masterValues) == len(self.deltaWeights)
@@ -369,12 +372,61 @@ class VariationModel(object):
 			out.append(delta)
 		return out
 
+	def getDeltasMatrix(self, masterValuesMatrix):
+		"""Same as calling getDeltas() on each row of masterValuesMatrix,
+		a sequence of rows with one value per master, but processes each
+		master across all rows at once.  Returns a list of rows of deltas.
+
+		>>> model = VariationModel([{}, {'wght': 1}, {'wght': -1}])
+		>>> model.getDeltasMatrix([(100, 150, 80), (0, 10, 0)])
+		[[100, -20.0, 50.0], [0, 0.0, 10.0]]
+		"""
+		if not masterValuesMatrix:
+			return []
+		columns = list(zip(*masterValuesMatrix))
+		assert len(columns) == len(self.deltaWeights)
+		mapping = self.reverseMapping
+		out = []
+		for i,weights in enumerate(self._deltaWeightsItems):
+			delta = columns[mapping[i]]
+			for j,weight in weights:
+				delta = [d - o * weight for d,o in zip(delta, out[j])]
+			out.append(delta)
+		return [list(row) for row in zip(*out)]
+
 	def getDeltasAndSupports(self, items):
 		model, items = self.getSubModel(items)
 		return model.getDeltas(items), model.supports
 
+	def getDeltasAndSupportsMatrix(self, itemsMatrix):
+		"""Same as calling getDeltasAndSupports() on each row of itemsMatrix.
+		The deltas of rows that share a sub-model are computed together."""
+		rowsBySubModel = {}
+		for i,items in enumerate(itemsMatrix):
+			key = tuple(v is not None for v in items)
+			rowsBySubModel.setdefault(key, []).append(i)
+		out = [None] * len(itemsMatrix)
+		for rows in rowsBySubModel.values():
+			model, _ = self.getSubModel(itemsMatrix[rows[0]])
+			matrix = [nonNone(itemsMatrix[i]) for i in rows]
+			for i,deltas in zip(rows, model.getDeltasMatrix(matrix)):
+				out[i] = (deltas, model.supports)
+		return out
+
+	_scalarCacheSize = 256
+
 	def getScalars(self, loc):
-		return [supportScalar(loc, support) for support in self.supports]
+		key = tuple(sorted(loc.items()))
+		cache = self._scalarCache
+		scalars = cache.get(key)
+		if scalars is None:
+			scalars = tuple(supportScalar(loc, support) for support in self.supports)
+			cache[key] = scalars
+			if len(cache) > self._scalarCacheSize:
+				cache.popitem(last=False)
+		else:
+			cache.move_to_end(key)
+		return list(scalars)
 
 	@staticmethod
 	def interpolateFromDeltasAndScalars(deltas, scalars):
@@ -389,6 +441,24 @@ class VariationModel(object):
 				v += contribution
 		return v
 
+	@staticmethod
+	def interpolateFromDeltasMatrixAndScalars(deltasMatrix, scalars):
+		"""Same as calling interpolateFromDeltasAndScalars() on each row
+		of deltasMatrix.  Returns a list of interpolated values."""
+		weights = [(i, scalar) for i, scalar in enumerate(scalars) if scalar]
+		out = []
+		for deltas in deltasMatrix:
+			assert len(deltas) == len(scalars)
+			v = None
+			for i, scalar in weights:
+				contribution = deltas[i] * scalar
+				if v is None:
+					v = contribution
+				else:
+					v += contribution
+			out.append(v)
+		return out
+
 	def interpolateFromDeltas(self, loc, deltas):
 		scalars = self.getScalars(loc)
 		return self.interpolateFromDeltasAndScalars(deltas, scalars)
@@ -61,44 +61,84 @@ def interpolate_cff2_PrivateDict(topDict, interpolateFromDeltas):
 
 def interpolate_cff2_charstrings(topDict, interpolateFromDeltas, glyphOrder):
 	charstrings = topDict.CharStrings
+	programs = interpolate_cff2_programs(topDict, [interpolateFromDeltas], glyphOrder)
+	for gname in glyphOrder:
+		program, = programs[gname]
+		if program is not None:
+			charstrings[gname].program = program
+
+
+def _parse_cff2_blends(charstring):
+	# Split a (desubroutinized) CFF2 charstring program into the list of
+	# tokens to copy and of blends to interpolate; vsindex operators are
+	# consumed.  Each blend is a (vsindex, defaults, deltaTuples) tuple and
+	# stands for the blended values in the output program.
+	program = charstring.program
+	parts = []
+	vsindex = 0
+	last_i = 0
+	for i, token in enumerate(program):
+		if token == 'vsindex':
+			vsindex = program[i - 1]
+			if last_i != 0:
+				parts.append(program[last_i:i - 1])
+			last_i = i + 1
+		elif token == 'blend':
+			num_regions = charstring.getNumRegions(vsindex)
+			numMasters = 1 + num_regions
+			num_args = program[i - 1]
+			# The program list starting at program[i] is now:
+			# ..args for following operations
+			# num_args values  from the default font
+			# num_args tuples, each with numMasters-1 delta values
+			# num_blend_args
+			# 'blend'
+			argi = i - (num_args * numMasters + 1)
+			end_args = argi + num_args
+			deltas = [program[ti:ti + num_regions]
+				for ti in range(end_args, end_args + num_args * num_regions, num_regions)]
+			parts.append(program[last_i:argi])
+			parts.append((vsindex, program[argi:end_args], deltas))
+			last_i = i + 1
+	if last_i == 0:
+		return None
+	parts.append(program[last_i:])
+	return parts
+
+
+def interpolate_cff2_programs(topDict, interpolators, glyphOrder):
+	"""Interpolate the CFF2 charstrings of 'glyphOrder' at several locations.
+
+	'interpolators' is a list of interpolateFromDeltas functions, one per
+	location.  The blends of each charstring are parsed once.  Return a dict
+	mapping glyph names to lists of programs, one per location; the programs
+	are None for charstrings without blends.  The charstrings must already be
+	desubroutinized.
+	"""
+	charstrings = topDict.CharStrings
+	result = {}
 	for gname in glyphOrder:
 		# Interpolate charstring
 		# e.g replace blend op args with regular args,
 		# and use and discard vsindex op.
-		charstring = charstrings[gname]
-		new_program = []
-		vsindex = 0
-		last_i = 0
-		for i, token in enumerate(charstring.program):
-			if token == 'vsindex':
-				vsindex = charstring.program[i - 1]
-				if last_i != 0:
-					new_program.extend(charstring.program[last_i:i - 1])
-				last_i = i + 1
-			elif token == 'blend':
-				num_regions = charstring.getNumRegions(vsindex)
-				numMasters = 1 + num_regions
-				num_args = charstring.program[i - 1]
-				# The program list starting at program[i] is now:
-				# ..args for following operations
-				# num_args values  from the default font
-				# num_args tuples, each with numMasters-1 delta values
-				# num_blend_args
-				# 'blend'
-				argi = i - (num_args * numMasters + 1)
-				end_args = tuplei = argi + num_args
-				while argi < end_args:
-					next_ti = tuplei + num_regions
-					deltas = charstring.program[tuplei:next_ti]
-					delta = interpolateFromDeltas(vsindex, deltas)
-					charstring.program[argi] += otRound(delta)
-					tuplei = next_ti
-					argi += 1
-				new_program.extend(charstring.program[last_i:end_args])
-				last_i = i + 1
-		if last_i != 0:
-			new_program.extend(charstring.program[last_i:])
-			charstring.program = new_program
+		parts = _parse_cff2_blends(charstrings[gname])
+		if parts is None:
+			result[gname] = [None] * len(interpolators)
+			continue
+		programs = []
+		for interpolateFromDeltas in interpolators:
+			new_program = []
+			for part in parts:
+				if isinstance(part, tuple):
+					vsindex, defaults, deltas = part
+					new_program.extend(
+						value + otRound(interpolateFromDeltas(vsindex, delta))
+						for value, delta in zip(defaults, deltas))
+				else:
+					new_program.extend(part)
+			programs.append(new_program)
+		result[gname] = programs
+	return result
 
 
 def interpolate_cff2_metrics(varfont, topDict, glyphOrder, loc):
@@ -148,6 +188,64 @@ def interpolate_cff2_metrics(varfont, topDict, glyphOrder, loc):
 			hmtx[gname] = tuple(entry)
 
 
+def interpolate_gvar_coordinates(varfont, locs):
+	"""Interpolate the glyf coordinates of a variable font at several
+	normalized locations.
+
+	Each glyph's deltas are decoded and inferred (IUP) once, and applied
+	for all locations.  Return a list of (glyphname, coordinatesList) pairs,
+	where coordinatesList holds the coordinates (including phantom points)
+	for each location.  The glyphs are sorted by component depth, which is
+	the order in which they must be set with glyf.setCoordinates().
+	"""
+	gvar = varfont['gvar']
+	glyf = varfont['glyf']
+	# get list of glyph names in gvar sorted by component depth
+	glyphnames = sorted(
+		gvar.variations.keys(),
+		key=lambda name: (
+			glyf[name].getCompositeMaxpValues(glyf).maxComponentDepth
+			if glyf[name].isComposite() else 0,
+			name))
+	result = []
+	for glyphname in glyphnames:
+		variations = gvar.variations[glyphname]
+		coordinates, g = glyf.getCoordinatesAndControls(glyphname, varfont)
+		scalars = [[supportScalar(loc, var.axes) for loc in locs]
+			for var in variations]
+		deltas = [None] * len(variations)
+		coordinatesList = []
+		for i in range(len(locs)):
+			instanceCoordinates = coordinates.copy()
+			for j, var in enumerate(variations):
+				scalar = scalars[j][i]
+				if not scalar: continue
+				delta = deltas[j]
+				if delta is None:
+					delta = var.coordinates
+					if None in delta:
+						delta = iup_delta(delta, coordinates, g.endPts)
+					delta = deltas[j] = GlyphCoordinates(delta)
+				instanceCoordinates += delta * scalar
+			coordinatesList.append(instanceCoordinates)
+		result.append((glyphname, coordinatesList))
+	return result
+
+
+def normalize_location(varfont, location):
+	"""Normalize a user-space location with the variable font's fvar axes and
+	avar mapping, quantized to F2Dot14."""
+	fvar = varfont['fvar']
+	axes = {a.axisTag:(a.minValue,a.defaultValue,a.maxValue) for a in fvar.axes}
+	loc = normalizeLocation(location, axes)
+	if 'avar' in varfont:
+		maps = varfont['avar'].segments
+		loc = {k: piecewiseLinearMap(v, maps[k]) for k,v in loc.items()}
+	# Quantize to F2Dot14, to avoid surprise interpolations.
+	loc = {k:floatToFixedToFloat(v, 14) for k,v in loc.items()}
+	return loc
+
+
 def instantiateVariableFont(varfont, location, inplace=False, overlap=True):
 	""" Generate a static instance from a variable TTFont and a dictionary
 	defining the desired location along the variable font's axes.
@@ -169,41 +267,28 @@ def instantiateVariableFont(varfont, location, inplace=False, overlap=True):
 		stream.seek(0)
 		varfont = TTFont(stream)
 
-	fvar = varfont['fvar']
-	axes = {a.axisTag:(a.minValue,a.defaultValue,a.maxValue) for a in fvar.axes}
-	loc = normalizeLocation(location, axes)
-	if 'avar' in varfont:
-		maps = varfont['avar'].segments
-		loc = {k: piecewiseLinearMap(v, maps[k]) for k,v in loc.items()}
-	# Quantize to F2Dot14, to avoid surprise interpolations.
-	loc = {k:floatToFixedToFloat(v, 14) for k,v in loc.items()}
+	loc = normalize_location(varfont, location)
 	# Location is normalized now
 	log.info("Normalized location: %s", loc)
 
-	if 'gvar' in varfont:
+	return _instantiate(varfont, location, loc, overlap)
+
+
+def _instantiate(varfont, location, loc, overlap,
+		glyphCoordinates=None, charStringPrograms=None):
+	# Reduce varfont in place to the instance at the normalized location
+	# 'loc'.  The glyf coordinates and CFF2 programs may be passed in
+	# precomputed, see instantiateVariableFonts.
+	fvar = varfont['fvar']
+
+	if glyphCoordinates is None and 'gvar' in varfont:
+		glyphCoordinates = [
+			(glyphname, coordinatesList[0])
+			for glyphname, coordinatesList in interpolate_gvar_coordinates(varfont, [loc])]
+	if glyphCoordinates is not None:
 		log.info("Mutating glyf/gvar tables")
-		gvar = varfont['gvar']
 		glyf = varfont['glyf']
-		# get list of glyph names in gvar sorted by component depth
-		glyphnames = sorted(
-			gvar.variations.keys(),
-			key=lambda name: (
-				glyf[name].getCompositeMaxpValues(glyf).maxComponentDepth
-				if glyf[name].isComposite() else 0,
-				name))
-		for glyphname in glyphnames:
-			variations = gvar.variations[glyphname]
-			coordinates, _ = glyf.getCoordinatesAndControls(glyphname, varfont)
-			origCoords, endPts = None, None
-			for var in variations:
-				scalar = supportScalar(loc, var.axes)
-				if not scalar: continue
-				delta = var.coordinates
-				if None in delta:
-					if origCoords is None:
-						origCoords, g = glyf.getCoordinatesAndControls(glyphname, varfont)
-					delta = iup_delta(delta, origCoords, g.endPts)
-				coordinates += GlyphCoordinates(delta) * scalar
+		for glyphname, coordinates in glyphCoordinates:
 			glyf.setCoordinates(glyphname, coordinates, varfont)
 	else:
 		glyf = None
@@ -230,8 +315,13 @@ def instantiateVariableFont(varfont, location, inplace=False, overlap=True):
 		vsInstancer = VarStoreInstancer(topDict.VarStore.otVarStore, fvar.axes, loc)
 		interpolateFromDeltas = vsInstancer.interpolateFromDeltas
 		interpolate_cff2_PrivateDict(topDict, interpolateFromDeltas)
-		CFF2.desubroutinize()
-		interpolate_cff2_charstrings(topDict, interpolateFromDeltas, glyphOrder)
+		if charStringPrograms is None:
+			CFF2.desubroutinize()
+			interpolate_cff2_charstrings(topDict, interpolateFromDeltas, glyphOrder)
+		else:
+			charstrings = topDict.CharStrings
+			for gname, program in charStringPrograms.items():
+				charstrings[gname].setProgram(program)
 		interpolate_cff2_metrics(varfont, topDict, glyphOrder, loc)
 		del topDict.rawDict['VarStore']
 		del topDict.VarStore
@@ -398,6 +488,111 @@ def instantiateVariableFont(varfont, location, inplace=False, overlap=True):
 	return varfont
 
 
+def instantiateVariableFonts(varfont, locations, overlap=True, workers=None):
+	""" Generate static instances from a variable TTFont for a list of
+	locations, each a dictionary of user-space coordinates as accepted by
+	instantiateVariableFont().  Return a list of new TTFont objects, in the
+	same order as the locations.  The input varfont is not modified.
+
+	This is faster than calling instantiateVariableFont() once per location:
+	the gvar deltas and the CFF2 blends are decoded once, and each glyph is
+	interpolated at all locations in one go.
+
+	If ``workers`` is greater than 1, the instances are finished in that many
+	worker processes.
+	"""
+	locs = [normalize_location(varfont, location) for location in locations]
+	for loc in locs:
+		log.info("Normalized location: %s", loc)
+
+	stream = BytesIO()
+	varfont.save(stream)
+	stream.seek(0)
+	template = TTFont(stream)
+
+	glyphCoordinates = [None] * len(locs)
+	if 'gvar' in template:
+		log.info("Interpolating glyf/gvar tables")
+		interpolated = interpolate_gvar_coordinates(template, locs)
+		glyphCoordinates = [
+			[(glyphname, coordinatesList[i]) for glyphname, coordinatesList in interpolated]
+			for i in range(len(locs))]
+		del template['gvar']
+
+	charStringPrograms = [None] * len(locs)
+	if 'CFF2' in template:
+		log.info("Interpolating CFF2 charstrings")
+		glyphOrder = template.getGlyphOrder()
+		CFF2 = template['CFF2']
+		CFF2.desubroutinize()
+		topDict = CFF2.cff.topDictIndex[0]
+		fvarAxes = template['fvar'].axes
+		interpolators = [
+			VarStoreInstancer(topDict.VarStore.otVarStore, fvarAxes, loc).interpolateFromDeltas
+			for loc in locs]
+		programs = interpolate_cff2_programs(topDict, interpolators, glyphOrder)
+		charStringPrograms = [
+			{gname: programList[i] for gname, programList in programs.items()
+				if programList[i] is not None}
+			for i in range(len(locs))]
+
+	stream = BytesIO()
+	template.save(stream)
+	data = stream.getvalue()
+
+	args = (locations, locs, glyphCoordinates, charStringPrograms)
+	if workers is not None and workers > 1 and len(locs) > 1:
+		from concurrent.futures import ProcessPoolExecutor
+
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			results = executor.map(
+				_instantiateFromData, [data] * len(locs), *args,
+				[overlap] * len(locs), [True] * len(locs))
+			return [TTFont(BytesIO(result)) for result in results]
+	return [
+		_instantiateFromData(data, *instanceArgs, overlap)
+		for instanceArgs in zip(*args)]
+
+
+def _instantiateFromData(data, location, loc, glyphCoordinates,
+		charStringPrograms, overlap, compile=False):
+	# Runs in a worker process when 'compile' is True, and then returns the
+	# compiled instance; see instantiateVariableFonts
+	varfont = _instantiate(
+		TTFont(BytesIO(data)), location, loc, overlap,
+		glyphCoordinates=glyphCoordinates,
+		charStringPrograms=charStringPrograms)
+	if not compile:
+		return varfont
+	stream = BytesIO()
+	varfont.save(stream)
+	return stream.getvalue()
+
+
+def _parseLocation(locargs):
+	"""Parse a list of 'AXIS=LOC' strings into a location dictionary.
+	Raise ValueError if the format is invalid."""
+	loc = {}
+	for arg in locargs:
+		try:
+			tag, val = arg.split('=')
+			assert len(tag) <= 4
+			loc[tag.ljust(4)] = float(val)
+		except (ValueError, AssertionError):
+			raise ValueError("invalid location argument format: %r" % arg)
+	return loc
+
+
+def _instanceFileName(varfilename, location, outputDir=None):
+	stem, ext = os.path.splitext(os.path.basename(varfilename))
+	suffix = "".join(
+		"-%s%s" % (tag.strip(), ("%f" % value).rstrip("0").rstrip("."))
+		for tag, value in sorted(location.items()))
+	if outputDir is None:
+		outputDir = os.path.dirname(varfilename)
+	return os.path.join(outputDir, stem + suffix + ext)
+
+
 def main(args=None):
 	from fontTools import configLogger
 	import argparse
@@ -413,7 +608,22 @@ def main(args=None):
 		" wght=700 wdth=80. The default is the location of the base master.")
 	parser.add_argument(
 		"-o", "--output", metavar="OUTPUT.ttf", default=None,
-		help="Output instance TTF file (default: INPUT-instance.ttf).")
+		help="Output instance TTF file (default: INPUT-instance.ttf). "
+		"With -l or --named-instances, the output directory (default: the "
+		"input file's directory).")
+	parser.add_argument(
+		"-l", "--location", metavar="AXIS=LOC[,AXIS=LOC...]",
+		dest="locations", action="append", default=[],
+		help="Comma-separated location of an instance to generate. May be "
+		"given several times; all the instances are generated together and "
+		"named after their location, e.g. INPUT-wdth80-wght700.ttf.")
+	parser.add_argument(
+		"--named-instances", action="store_true",
+		help="Generate the named instances defined in the fvar table.")
+	parser.add_argument(
+		"-j", "--jobs", type=int, default=None,
+		help="Number of worker processes used when generating several "
+		"instances.")
 	logging_group = parser.add_mutually_exclusive_group(required=False)
 	logging_group.add_argument(
 		"-v", "--verbose", action="store_true", help="Run more verbosely.")
@@ -428,22 +638,47 @@ def main(args=None):
 	options = parser.parse_args(args)
 
 	varfilename = options.input
-	outfile = (
-		os.path.splitext(varfilename)[0] + '-instance.ttf'
-		if not options.output else options.output)
 	configLogger(level=(
 		"DEBUG" if options.verbose else
 		"ERROR" if options.quiet else
 		"INFO"))
 
-	loc = {}
-	for arg in options.locargs:
-		try:
-			tag, val = arg.split('=')
-			assert len(tag) <= 4
-			loc[tag.ljust(4)] = float(val)
-		except (ValueError, AssertionError):
-			parser.error("invalid location argument format: %r" % arg)
+	if options.locations or options.named_instances:
+		if options.locargs:
+			parser.error("AXIS=LOC arguments can't be used with -l or --named-instances")
+		locations = []
+		for arg in options.locations:
+			try:
+				locations.append(_parseLocation(arg.replace(",", " ").split()))
+			except ValueError as e:
+				parser.error(str(e))
+
+		log.info("Loading variable font")
+		varfont = TTFont(varfilename)
+
+		if options.named_instances:
+			locations.extend(
+				{tag.ljust(4): value for tag, value in instance.coordinates.items()}
+				for instance in varfont['fvar'].instances)
+		log.info("Locations: %s", locations)
+
+		instances = instantiateVariableFonts(
+			varfont, locations, overlap=options.overlap, workers=options.jobs)
+
+		for location, instance in zip(locations, instances):
+			outfile = _instanceFileName(varfilename, location, options.output)
+			log.info("Saving instance font %s", outfile)
+			instance.save(outfile)
+		return
+
+	outfile = (
+		os.path.splitext(varfilename)[0] + '-instance.ttf'
+		if not options.output else options.output)
+
+	try:
+		loc = _parseLocation(options.locargs)
+	except ValueError as e:
+		parser.error(str(e))
 	log.info("Location: %s", loc)
 
 	log.info("Loading variable font")
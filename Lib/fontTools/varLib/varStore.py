@@ -1,11 +1,10 @@
 from fontTools.misc.fixedTools import otRound
 from fontTools.ttLib.tables import otTables as ot
-from fontTools.varLib.models import supportScalar
+from fontTools.varLib.models import supportScalar, nonNone
 from fontTools.varLib.builder import (buildVarRegionList, buildVarStore,
 				      buildVarRegion, buildVarData)
 from functools import partial
-from collections import defaultdict
-from array import array
+import heapq
 
 
 def _getLocationKey(loc):
@@ -25,16 +24,23 @@ class OnlineVarStoreBuilder(object):
 		self._varDataIndices = {}
 		self._varDataCaches = {}
 		self._cache = {}
+		self._masterCaches = {}
+		self._masterCache = None
 
 	def setModel(self, model):
 		self.setSupports(model.supports)
 		self._model = model
+		self._masterCache = self._masterCaches.setdefault(model, {})
 
 	def setSupports(self, supports):
 		self._model = None
-		self._supports = list(supports)
-		if not self._supports[0]:
-			del self._supports[0] # Drop base master support
+		self._masterCache = None
+		supports = list(supports)
+		if not supports[0]:
+			del supports[0] # Drop base master support
+		if supports == self._supports:
+			return
+		self._supports = supports
 		self._cache = {}
 		self._data = None
 
@@ -68,7 +74,7 @@ class OnlineVarStoreBuilder(object):
 			self._outer = varDataIdx
 			self._data = self._store.VarData[varDataIdx]
 			self._cache = self._varDataCaches[key]
-			if len(self._data.Item) == 0xFFF:
+			if len(self._data.Item) == 0xFFFF:
 				# This is full.  Need new one.
 				varDataIdx = None
 
@@ -83,9 +89,37 @@ class OnlineVarStoreBuilder(object):
 
 
 	def storeMasters(self, master_values):
-		deltas = self._model.getDeltas(master_values)
-		base = otRound(deltas.pop(0))
-		return base, self.storeDeltas(deltas)
+		key = tuple(master_values)
+		stored = self._masterCache.get(key)
+		if stored is None:
+			deltas = self._model.getDeltas(master_values)
+			base = otRound(deltas.pop(0))
+			stored = self._masterCache[key] = base, self.storeDeltas(deltas)
+		return stored
+
+	def storeMastersMatrix(self, masterValuesMatrix):
+		"""Same as calling storeMasters() on each row of masterValuesMatrix,
+		but the deltas of all the rows not stored before are computed at
+		once.  Rows may have None for masters that lack a value, in which
+		case they are stored using the model of the other masters."""
+		model = self._model
+		cache = self._masterCache
+		keys = [tuple(row) for row in masterValuesMatrix]
+		newKeys = [key for key in dict.fromkeys(keys) if key not in cache]
+		deltasByKey = {}
+		for subModel, subKeys in _groupBySubModel(model, newKeys):
+			deltasMatrix = subModel.getDeltasMatrix([nonNone(key) for key in subKeys])
+			for key, deltas in zip(subKeys, deltasMatrix):
+				deltasByKey[key] = subModel, deltas
+		for key in newKeys:
+			subModel, deltas = deltasByKey[key]
+			if subModel is not self._model:
+				self.setModel(subModel)
+			base = otRound(deltas.pop(0))
+			cache[key] = base, self.storeDeltas(deltas)
+		if model is not self._model:
+			self.setModel(model)
+		return [cache[key] for key in keys]
 
 	def storeDeltas(self, deltas):
 		# Pity that this exists here, since VarData_addItem
@@ -115,6 +149,14 @@ class OnlineVarStoreBuilder(object):
 		self._cache[deltas] = varIdx
 		return varIdx
 
+def _groupBySubModel(model, keys):
+	groups = {}
+	for key in keys:
+		groups.setdefault(tuple(v is not None for v in key), []).append(key)
+	for subKeys in groups.values():
+		subModel, _ = model.getSubModel(subKeys[0])
+		yield subModel, subKeys
+
 def VarData_addItem(self, deltas):
 	deltas = [otRound(d) for d in deltas]
 
@@ -384,25 +426,15 @@ class _Encoding(object):
 		return c
 
 
-	def _find_yourself_best_new_encoding(self, done_by_width):
-		self.best_new_encoding = None
-		for new_width in range(self.width+1, self.width+self.room+1):
-			for new_encoding in done_by_width[new_width]:
-				if new_encoding.can_encode(self.chars):
-					break
-			else:
-				new_encoding = None
-			self.best_new_encoding = new_encoding
-
-
 class _EncodingDict(dict):
 
 	def __missing__(self, chars):
 		r = self[chars] = _Encoding(chars)
 		return r
 
-	def add_row(self, row):
-		chars = self._row_characteristics(row)
+	def add_row(self, row, chars=None):
+		if chars is None:
+			chars = self._row_characteristics(row)
 		self[chars].append(row)
 
 	@staticmethod
@@ -418,6 +450,149 @@ class _EncodingDict(dict):
 			i <<= 2
 		return chars
 
+	@staticmethod
+	def _sparse_row_characteristics(regionIndices, item):
+		"""Returns encoding characteristics for a row given as the deltas
+		of a VarData item for each of its (distinct) regionIndices."""
+		chars = 0
+		for regionIdx, v in zip(regionIndices, item):
+			if v:
+				chars |= 1 << (regionIdx * 2)
+				if not (-128 <= v <= 127):
+					chars |= 2 << (regionIdx * 2)
+		return chars
+
+
+try:
+	_popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+	def _popcount(n):
+		return bin(n).count('1')
+
+
+class _EncodingMerger(object):
+	"""Greedily merge encodings, best gain first.
+
+	Merging two encodings can't gain more than the smaller of their
+	overheads, while each row costs at least a byte per column it gains.
+	So an encoding with at least as many rows as its overhead can never
+	gain columns: it can only absorb encodings whose characteristics are a
+	subset of its own, and two such encodings are never merged.
+
+	Each encoding only keeps its 'numPartners' best candidate merges in a
+	heap keyed on their gain, so that the heap stays linear in the number
+	of encodings.  Entries that refer to encodings that were merged since
+	are skipped when popped; once all the candidates of an encoding are
+	gone, its best partners are looked up again among the remaining
+	encodings.
+	"""
+
+	def __init__(self, encodings, numColumns, numPartners=16):
+		# bits 0, 2, 4...: fold the two characteristic bits of each column
+		# into one to count the used columns
+		self.columnMask = int('01' * numColumns, 2) if numColumns else 0
+		self.numPartners = numPartners
+		self.encodings = []
+		self.numCandidates = []  # live heap entries of each encoding
+		# characteristics, used columns, overhead + width * count, count
+		self.small = {}  # encodings that may gain columns
+		self.large = {}  # encodings that can't gain columns
+		self.heap = []
+		for encoding in encodings:
+			self._add(encoding)
+
+	def _add(self, encoding):
+		i = len(self.encodings)
+		self.encodings.append(encoding)
+		self.numCandidates.append(0)
+		chars = encoding.chars
+		count = len(encoding)
+		key = (chars, (chars | (chars >> 1)) & self.columnMask,
+		       encoding.overhead + encoding.width * count, count)
+		self._push_candidates(i, key)
+		if count < encoding.overhead:
+			self.small[i] = key
+		else:
+			self.large[i] = key
+		return i
+
+	def _remove(self, i):
+		encoding = self.encodings[i]
+		self.encodings[i] = None
+		self.small.pop(i, None)
+		self.large.pop(i, None)
+		return encoding
+
+	def _push_candidates(self, i, key=None):
+		"""Push the best merges of encoding i with the other encodings."""
+		if key is None:
+			key = self.small.get(i) or self.large[i]
+		chars, columns, base, count = key
+		encoding = self.encodings[i]
+
+		# gain = base + other_base - combined_overhead
+		#        - combined_width * (count + other_count)
+		# With combined_overhead = 6 + 2 * combined_columns, the candidates
+		# are listed with the terms that depend on the other encoding, as
+		# cost, so that gain = base - 6 - cost.
+		if count < encoding.overhead:
+			candidates = [
+				(_popcount(chars | other_chars) * (count + other_count)
+				 + 2 * _popcount(columns | other_columns) - other_base, j)
+				for j, (other_chars, other_columns, other_base, other_count)
+				in self.small.items() if j != i]
+			candidates.extend(
+				(_popcount(other_chars) * (count + other_count)
+				 + 2 * _popcount(other_columns) - other_base, j)
+				for j, (other_chars, other_columns, other_base, other_count)
+				in self.large.items() if not (chars & ~other_chars))
+		else:
+			candidates = [
+				(_popcount(chars) * (count + other_count)
+				 + 2 * _popcount(columns) - other_base, j)
+				for j, (other_chars, other_columns, other_base, other_count)
+				in self.small.items() if not (other_chars & ~chars)]
+
+		limit = base - 6
+		heap = self.heap
+		n = 0
+		for cost, j in heapq.nsmallest(self.numPartners, candidates):
+			if cost >= limit:
+				break
+			heapq.heappush(heap, (cost - limit, i, j))
+			n += 1
+		self.numCandidates[i] = n
+
+	def merge(self):
+		encodings = self.encodings
+		numCandidates = self.numCandidates
+		heap = self.heap
+		chars_index = {encoding.chars: i for i, encoding in enumerate(encodings)}
+		while heap:
+			_, i, j = heapq.heappop(heap)
+			if encodings[i] is None:
+				continue
+			if encodings[j] is None:
+				numCandidates[i] -= 1
+				if not numCandidates[i]:
+					self._push_candidates(i)
+				continue
+			encoding = self._remove(i)
+			other_encoding = self._remove(j)
+			del chars_index[encoding.chars]
+			del chars_index[other_encoding.chars]
+			combined_chars = other_encoding.chars | encoding.chars
+			combined_encoding = _Encoding(combined_chars)
+			combined_encoding.extend(encoding.items)
+			combined_encoding.extend(other_encoding.items)
+			# If an encoding with the combined characteristics exists
+			# already, fold it in as well.
+			k = chars_index.pop(combined_chars, None)
+			if k is not None:
+				combined_encoding.extend(self._remove(k).items)
+			chars_index[combined_chars] = self._add(combined_encoding)
+		return [encoding for encoding in encodings if encoding is not None]
+
 
 def VarStore_optimize(self):
 	"""Optimize storage. Returns mapping from old VarIdxes to new ones."""
@@ -426,7 +601,7 @@ def VarStore_optimize(self):
 	# Check that no two VarRegions are the same; if they are, fold them.
 
 	n = len(self.VarRegionList.Region) # Number of columns
-	zeroes = array('h', [0]*n)
+	zeroes = [0] * n
 
 	front_mapping = {} # Map from old VarIdxes to full row tuples
 
@@ -434,85 +609,30 @@ def VarStore_optimize(self):
 
 	# Collect all items into a set of full rows (with lots of zeroes.)
 	for major,data in enumerate(self.VarData):
-		regionIndices = data.VarRegionIndex
+		regionIndices = list(data.VarRegionIndex)
+		sparse = len(set(regionIndices)) == len(regionIndices)
 
 		for minor,item in enumerate(data.Item):
 
-			row = array('h', zeroes)
+			row = list(zeroes)
 			for regionIdx,v in zip(regionIndices, item):
 				row[regionIdx] += v
 			row = tuple(row)
 
-			encodings.add_row(row)
+			if sparse:
+				chars = encodings._sparse_row_characteristics(regionIndices, item)
+			else:
+				chars = None
+			encodings.add_row(row, chars)
 			front_mapping[(major<<16)+minor] = row
 
-	# Separate encodings that have no gain (are decided) and those having
-	# possible gain (possibly to be merged into others.)
-	encodings = sorted(encodings.values(), key=_Encoding.__len__, reverse=True)
-	done_by_width = defaultdict(list)
-	todo = []
-	for encoding in encodings:
-		if not encoding.gain:
-			done_by_width[encoding.width].append(encoding)
-		else:
-			todo.append(encoding)
-
-	# For each encoding that is possibly to be merged, find the best match
-	# in the decided encodings, and record that.
-	todo.sort(key=_Encoding.get_room)
-	for encoding in todo:
-		encoding._find_yourself_best_new_encoding(done_by_width)
-
-	# Walk through todo encodings, for each, see if merging it with
-	# another todo encoding gains more than each of them merging with
-	# their best decided encoding. If yes, merge them and add resulting
-	# encoding back to todo queue.  If not, move the enconding to decided
-	# list.  Repeat till done.
-	while todo:
-		encoding = todo.pop()
-		best_idx = None
-		best_gain = 0
-		for i,other_encoding in enumerate(todo):
-			combined_chars = other_encoding.chars | encoding.chars
-			combined_width = _Encoding._popcount(combined_chars)
-			combined_overhead = _Encoding._characteristic_overhead(combined_chars)
-			combined_gain = (
-					+ encoding.overhead
-					+ other_encoding.overhead
-					- combined_overhead
-					- (combined_width - encoding.width) * len(encoding)
-					- (combined_width - other_encoding.width) * len(other_encoding)
-					)
-			this_gain = 0 if encoding.best_new_encoding is None else (
-						+ encoding.overhead
-						- (encoding.best_new_encoding.width - encoding.width) * len(encoding)
-					)
-			other_gain = 0 if other_encoding.best_new_encoding is None else (
-						+ other_encoding.overhead
-						- (other_encoding.best_new_encoding.width - other_encoding.width) * len(other_encoding)
-					)
-			separate_gain = this_gain + other_gain
-
-			if combined_gain > separate_gain:
-				best_idx = i
-				best_gain = combined_gain - separate_gain
-
-		if best_idx is None:
-			# Encoding is decided as is
-			done_by_width[encoding.width].append(encoding)
-		else:
-			other_encoding = todo[best_idx]
-			combined_chars = other_encoding.chars | encoding.chars
-			combined_encoding = _Encoding(combined_chars)
-			combined_encoding.extend(encoding.items)
-			combined_encoding.extend(other_encoding.items)
-			combined_encoding._find_yourself_best_new_encoding(done_by_width)
-			del todo[best_idx]
-			todo.append(combined_encoding)
+	# Repeatedly merge the two encodings whose merging gains the most bytes,
+	# till no merge is beneficial anymore.
+	encodings = sorted(encodings.values(), key=_Encoding.sort_key)
+	encodings = _EncodingMerger(encodings, n).merge()
 
 	# Assemble final store.
 	back_mapping = {} # Mapping from full rows to new VarIdxes
-	encodings = sum(done_by_width.values(), [])
 	encodings.sort(key=_Encoding.sort_key)
 	self.VarData = []
 	for major,encoding in enumerate(encodings):
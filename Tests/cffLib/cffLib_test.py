@@ -1,4 +1,7 @@
-from fontTools.cffLib import TopDict, PrivateDict, CharStrings
+from fontTools.cffLib import (TopDict, PrivateDict, CharStrings, FDSelect,
+                              packCharset, packCharset0, parseCharset,
+                              parseCharset0, packFDSelect3, packFDSelect4)
+from fontTools.misc.py23 import BytesIO
 from fontTools.misc.testTools import parseXML, DataFilesHandler
 from fontTools.ttLib import TTFont
 import copy
@@ -107,6 +110,44 @@ class CffLibTest(DataFilesHandler):
         glyphOrder = font2.getGlyphOrder()
         self.assertEqual(len(glyphOrder), len(set(glyphOrder)))
 
+    def test_compile_workers(self):
+        ttx_path = self.getpath('TestOTF.ttx')
+        font = TTFont(recalcBBoxes=False, recalcTimestamp=False)
+        font.importXML(ttx_path)
+        cff = font["CFF "].cff
+
+        expected = BytesIO()
+        cff.compile(expected, font)
+        for charString in cff[0].CharStrings.values():
+            charString.decompile()
+            self.assertIsNone(charString.bytecode)
+
+        data = BytesIO()
+        cff.compile(data, font, workers=2)
+        self.assertEqual(data.getvalue(), expected.getvalue())
+
+    def test_charset_roundtrip(self):
+        charset = [".notdef"] + ["cid%05d" % i for i in [1, 2, 3, 10, 11, 500]]
+        charset += ["cid%05d" % i for i in range(1000, 1300)]
+
+        data = packCharset0(charset, True, None)
+        self.assertEqual(data[0], 0)
+        file = BytesIO(data[1:])
+        self.assertEqual(parseCharset0(len(charset), file, None, True), charset)
+        self.assertEqual(file.tell(), len(data) - 1)
+
+        data = packCharset(charset, True, None)
+        self.assertEqual(data[0], 2)
+        file = BytesIO(data[1:] + b"garbage")
+        self.assertEqual(parseCharset(len(charset), file, None, True, 2), charset)
+        self.assertEqual(file.tell(), len(data) - 1)
+
+    def test_FDSelect_roundtrip(self):
+        gidArray = [0, 0, 1, 1, 1, 0, 2, 2]
+        for pack in (packFDSelect3, packFDSelect4):
+            fdSelect = FDSelect(BytesIO(pack(gidArray)), len(gidArray))
+            self.assertEqual(fdSelect.gidArray, gidArray)
+
 
 if __name__ == "__main__":
     sys.exit(unittest.main())
@@ -0,0 +1,108 @@
+from fontTools.cffLib import TopDict, PrivateDict, CharStrings
+from fontTools.cffLib.width import (optimizeWidths, optimizeWidthsBruteforce,
+                                    optimizeCharStringWidths, byteCost)
+from fontTools.misc.testTools import parseXML
+from fontTools.pens.basePen import NullPen
+import pytest
+
+
+@pytest.mark.parametrize(
+    "widths, expectedCost",
+    [
+        ([500], 0),
+        ([500, 500, 600], 1),
+        ([0, 250, 250, 250, 1000, 1000], 4),
+        ([100, 120, 300, 1200, 1200, 1250, 1260, 40], 9),
+        ([-50, 0, 0, 1400, 1400, 700], 5),
+    ],
+)
+def test_optimizeWidths(widths, expectedCost):
+    # expected costs as found by optimizeWidthsBruteforce
+    default, nominal = optimizeWidths(widths)
+    assert byteCost(widths, default, nominal) == expectedCost
+
+
+def test_optimizeWidths_bruteforce():
+    widths = [10, 10, 60, 130, 130, 131]
+    default, nominal = optimizeWidths(widths)
+    expected = optimizeWidthsBruteforce(widths)
+    assert byteCost(widths, default, nominal) == byteCost(widths, *expected)
+
+
+def _makeTopDict(xml):
+    topDict = TopDict()
+    topDict.Private = PrivateDict()
+    topDict.CharStrings = CharStrings(None, None, None, topDict.Private, None, None)
+    topDict.CharStrings.fromXML(None, None, parseXML(xml))
+    topDict.charset = list(topDict.CharStrings.keys())
+    return topDict
+
+
+def _getWidths(topDict):
+    widths = {}
+    for glyphName in topDict.charset:
+        charString = topDict.CharStrings[glyphName]
+        charString.draw(NullPen())
+        widths[glyphName] = charString.width
+    return widths
+
+
+def test_optimizeCharStringWidths():
+    topDict = _makeTopDict("""
+        <CharString name=".notdef">
+          500 endchar
+        </CharString>
+        <CharString name="A">
+          600 100 100 rmoveto 200 hlineto endchar
+        </CharString>
+        <CharString name="B">
+          600 100 hmoveto 200 vlineto endchar
+        </CharString>
+        <CharString name="C">
+          620 0 20 hstem 100 100 rmoveto 200 hlineto endchar
+        </CharString>
+    """)
+    widths = _getWidths(topDict)
+
+    optimizeCharStringWidths(topDict)
+
+    assert topDict.Private.defaultWidthX == 600
+    assert topDict.Private.nominalWidthX == 0
+    assert _getWidths(topDict) == widths
+    assert topDict.CharStrings["A"].program[0] == 100
+
+
+def test_optimizeCharStringWidths_ignoreWidths():
+    topDict = _makeTopDict("""
+        <CharString name=".notdef">
+          endchar
+        </CharString>
+        <CharString name="A">
+          600 100 100 rmoveto 200 hlineto endchar
+        </CharString>
+        <CharString name="B">
+          600 100 hmoveto 200 vlineto endchar
+        </CharString>
+    """)
+
+    optimizeCharStringWidths(topDict, ignoreWidths={".notdef"})
+
+    assert topDict.Private.defaultWidthX == 600
+    assert topDict.CharStrings[".notdef"].program == ["endchar"]
+
+
+def test_optimizeCharStringWidths_width_in_subroutine():
+    topDict = _makeTopDict("""
+        <CharString name="A">
+          600 100 100 rmoveto 200 hlineto endchar
+        </CharString>
+        <CharString name="B">
+          -107 callsubr 200 vlineto endchar
+        </CharString>
+    """)
+    program = topDict.CharStrings["A"].program[:]
+
+    optimizeCharStringWidths(topDict)
+
+    assert topDict.Private.defaultWidthX == 0
+    assert topDict.CharStrings["A"].program == program
@@ -0,0 +1,220 @@
+from fontTools.cu2qu.convert import (
+    otf_to_ttf, fonts_otf_to_ttf, ttf_to_otf, main)
+from fontTools.cu2qu.errors import Error, IncompatibleGlyphsError
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.areaPen import AreaPen
+from fontTools.pens.boundsPen import BoundsPen
+from fontTools.pens.t2CharStringPen import T2CharStringPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont
+import io
+import os
+import pytest
+
+
+def _draw_o(pen, size):
+    # outer contour counter-clockwise, inner one clockwise, as in CFF
+    pen.moveTo((300, 0))
+    pen.curveTo((300 + size, 0), (500, 100), (500, 300))
+    pen.curveTo((500, 500), (300 + size, 600), (300, 600))
+    pen.curveTo((300 - size, 600), (100, 500), (100, 300))
+    pen.curveTo((100, 100), (300 - size, 0), (300, 0))
+    pen.closePath()
+    pen.moveTo((300, 100))
+    pen.lineTo((200, 300))
+    pen.lineTo((300, 500))
+    pen.lineTo((400, 300))
+    pen.closePath()
+
+
+def _draw_square(pen):
+    pen.moveTo((100, 0))
+    pen.lineTo((400, 0))
+    pen.lineTo((400, 300))
+    pen.lineTo((100, 300))
+    pen.closePath()
+
+
+def _make_otf(size=110):
+    fb = FontBuilder(1000, isTTF=False)
+    glyphOrder = [".notdef", "space", "o", "square"]
+    fb.setupGlyphOrder(glyphOrder)
+    fb.setupCharacterMap({0x20: "space", 0x6F: "o", 0x25A1: "square"})
+    advanceWidths = {".notdef": 600, "space": 250, "o": 600, "square": 500}
+    charStrings = {}
+    for glyphName in glyphOrder:
+        pen = T2CharStringPen(advanceWidths[glyphName], None)
+        if glyphName == "o":
+            _draw_o(pen, size)
+        elif glyphName == "square":
+            _draw_square(pen)
+        charStrings[glyphName] = pen.getCharString()
+    fb.setupCFF("TestFont-Regular", {"FullName": "Test Font"}, charStrings, {})
+    metrics = {}
+    glyphTable = fb.font["CFF "].cff.topDictIndex[0].CharStrings
+    for glyphName in glyphOrder:
+        bounds = glyphTable[glyphName].calcBounds(glyphTable)
+        metrics[glyphName] = (advanceWidths[glyphName], bounds[0] if bounds else 0)
+    fb.setupHorizontalMetrics(metrics)
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({"familyName": "Test Font", "styleName": "Regular",
+                     "psName": "TestFont-Regular"})
+    fb.setupOS2()
+    fb.setupPost()
+    return _reload(fb.font)
+
+
+def _reload(font):
+    buf = io.BytesIO()
+    font.save(buf)
+    buf.seek(0)
+    return TTFont(buf)
+
+
+def _glyph_areas(font):
+    glyphSet = font.getGlyphSet()
+    areas = {}
+    for glyphName in font.getGlyphOrder():
+        pen = AreaPen(glyphSet)
+        glyphSet[glyphName].draw(pen)
+        areas[glyphName] = pen.value
+    return areas
+
+
+def test_otf_to_ttf():
+    font = _make_otf()
+    expected = _glyph_areas(font)
+
+    otf_to_ttf(font)
+    font = _reload(font)
+
+    assert font.sfntVersion == "\0\1\0\0"
+    assert "CFF " not in font
+    assert "glyf" in font and "loca" in font
+    assert font["maxp"].tableVersion == 0x00010000
+    assert font["maxp"].maxContours == 2
+    assert font["post"].formatType == 2.0
+    glyf = font["glyf"]
+    assert glyf["o"].numberOfContours == 2
+    assert glyf["space"].numberOfContours == 0
+    assert font["hmtx"]["o"] == (600, 100)
+    assert font["hmtx"]["square"] == (500, 100)
+    # TrueType contours run clockwise, so the areas have the opposite sign
+    for glyphName, area in _glyph_areas(font).items():
+        assert -area == pytest.approx(expected[glyphName], rel=5e-3)
+
+
+def test_otf_to_ttf_keep_direction():
+    font = _make_otf()
+    expected = _glyph_areas(font)
+
+    otf_to_ttf(font, reverse_direction=False, post_format=3.0)
+
+    assert font["post"].formatType == 3.0
+    for glyphName, area in _glyph_areas(font).items():
+        assert area == pytest.approx(expected[glyphName], rel=5e-3)
+
+
+def test_otf_to_ttf_max_err():
+    coarse = _make_otf()
+    otf_to_ttf(coarse, max_err=10)
+    fine = _make_otf()
+    otf_to_ttf(fine, max_err=0.1)
+
+    assert (len(coarse["glyf"]["o"].coordinates) <
+            len(fine["glyf"]["o"].coordinates))
+
+
+def test_fonts_otf_to_ttf_compatible():
+    fonts = [_make_otf(size=110), _make_otf(size=10)]
+
+    fonts_otf_to_ttf(fonts)
+
+    glyphs = [font["glyf"]["o"] for font in fonts]
+    assert len(glyphs[0].coordinates) == len(glyphs[1].coordinates)
+    assert glyphs[0].endPtsOfContours == glyphs[1].endPtsOfContours
+    assert list(glyphs[0].flags) == list(glyphs[1].flags)
+
+
+def test_fonts_otf_to_ttf_incompatible():
+    fonts = [_make_otf(), _make_otf()]
+    pen = T2CharStringPen(600, None)
+    _draw_square(pen)
+    charStrings = fonts[1]["CFF "].cff.topDictIndex[0].CharStrings
+    charString = pen.getCharString()
+    charString.private = charStrings["o"].private
+    charString.globalSubrs = charStrings["o"].globalSubrs
+    charStrings["o"] = charString
+
+    with pytest.raises(IncompatibleGlyphsError, match="'o'"):
+        fonts_otf_to_ttf(fonts)
+
+
+def test_otf_to_ttf_workers():
+    serial = _make_otf()
+    otf_to_ttf(serial)
+    parallel = _make_otf()
+    otf_to_ttf(parallel, workers=2)
+
+    for glyphName in serial.getGlyphOrder():
+        assert serial["glyf"][glyphName] == parallel["glyf"][glyphName]
+
+
+def test_ttf_to_otf():
+    font = _make_otf()
+    expected = _glyph_areas(font)
+    otf_to_ttf(font)
+    font = _reload(font)
+
+    ttf_to_otf(font)
+    font = _reload(font)
+
+    assert font.sfntVersion == "OTTO"
+    assert "glyf" not in font and "loca" not in font
+    assert font["maxp"].tableVersion == 0x00005000
+    assert font["post"].formatType == 3.0
+    cff = font["CFF "].cff
+    assert cff.fontNames == ["TestFont-Regular"]
+    charStrings = cff.topDictIndex[0].CharStrings
+    for glyphName in font.getGlyphOrder():
+        charStrings[glyphName].draw(BoundsPen(None))
+        assert charStrings[glyphName].width == font["hmtx"][glyphName][0]
+    for glyphName, area in _glyph_areas(font).items():
+        assert area == pytest.approx(expected[glyphName], rel=5e-3)
+
+
+def test_ttf_to_otf_decomposes_components():
+    font = _make_otf()
+    otf_to_ttf(font)
+    pen = TTGlyphPen(font.getGlyphSet())
+    pen.addComponent("square", (1, 0, 0, 1, 0, 100))
+    font["glyf"]["o"] = pen.glyph()
+
+    ttf_to_otf(font)
+
+    charString = font["CFF "].cff.topDictIndex[0].CharStrings["o"]
+    pen = BoundsPen(None)
+    charString.draw(pen)
+    assert pen.bounds == (100, 100, 400, 400)
+
+
+def test_ttf_to_otf_variable_font():
+    font = _make_otf()
+    otf_to_ttf(font)
+    font["gvar"] = font["glyf"].__class__("gvar")
+
+    with pytest.raises(Error):
+        ttf_to_otf(font)
+
+
+def test_main(tmpdir):
+    inputPath = os.path.join(str(tmpdir), "TestFont.otf")
+    _make_otf().save(inputPath)
+
+    main([inputPath, "-e", "0.5"])
+    ttfPath = os.path.join(str(tmpdir), "TestFont.ttf")
+    assert "glyf" in TTFont(ttfPath)
+
+    outputPath = os.path.join(str(tmpdir), "TestFont-roundtrip.otf")
+    main([ttfPath, "-o", outputPath])
+    assert "CFF " in TTFont(outputPath)
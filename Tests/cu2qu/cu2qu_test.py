@@ -0,0 +1,99 @@
+from fontTools.cu2qu import curve_to_quadratic, curves_to_quadratic
+from fontTools.cu2qu.cu2qu import (
+    cubic_approx_spline, split_cubic_into_n_iter, MAX_N)
+from fontTools.cu2qu.errors import ApproxNotFoundError
+import random
+import pytest
+
+
+def _bezier_point(points, t):
+    # de Casteljau
+    while len(points) > 1:
+        points = [(p0[0] + (p1[0] - p0[0]) * t, p0[1] + (p1[1] - p0[1]) * t)
+                  for p0, p1 in zip(points, points[1:])]
+    return points[0]
+
+
+def _max_distance(curve, spline, steps=20):
+    # The n quadratics of the spline approximate the n pieces of the curve
+    # split at equal parameter intervals; compare them at the same parameter.
+    offCurves = spline[1:-1]
+    n = len(offCurves)
+    onCurves = [spline[0]]
+    for off, nxt in zip(offCurves, offCurves[1:]):
+        onCurves.append(((off[0] + nxt[0]) / 2, (off[1] + nxt[1]) / 2))
+    onCurves.append(spline[-1])
+    distance = 0
+    for i in range(n):
+        quadratic = [onCurves[i], offCurves[i], onCurves[i + 1]]
+        for j in range(steps + 1):
+            t = j / steps
+            x, y = _bezier_point(quadratic, t)
+            cx, cy = _bezier_point(curve, (i + t) / n)
+            distance = max(distance, ((x - cx) ** 2 + (y - cy) ** 2) ** .5)
+    return distance
+
+
+def _random_curve(rnd):
+    return [(rnd.uniform(0, 1000), rnd.uniform(0, 1000)) for _ in range(4)]
+
+
+def test_curve_to_quadratic_end_points():
+    curve = [(0, 0), (0, 100), (100, 100), (100, 0)]
+    spline = curve_to_quadratic(curve, 1)
+    assert spline[0] == (0, 0)
+    assert spline[-1] == (100, 0)
+
+
+def test_curve_to_quadratic_single_quadratic():
+    # a degree-elevated quadratic is approximated exactly
+    spline = curve_to_quadratic([(0, 0), (0, 30), (30, 50), (90, 60)], 1)
+    assert spline == [(0, 0), (0, 45), (90, 60)]
+
+
+@pytest.mark.parametrize("max_err", [0.1, 1, 5])
+def test_curve_to_quadratic_max_err(max_err):
+    rnd = random.Random(max_err)
+    for _ in range(20):
+        curve = _random_curve(rnd)
+        spline = curve_to_quadratic(curve, max_err)
+        assert _max_distance(curve, spline) <= max_err
+
+
+def test_curve_to_quadratic_smaller_error_more_segments():
+    curve = [(0, 0), (0, 1000), (1000, 1000), (1000, 0)]
+    assert (len(curve_to_quadratic(curve, 0.1)) >
+            len(curve_to_quadratic(curve, 10)))
+
+
+def test_curves_to_quadratic_compatible():
+    rnd = random.Random(0)
+    for _ in range(20):
+        curves = [_random_curve(rnd) for _ in range(3)]
+        splines = curves_to_quadratic(curves, [1] * 3)
+        assert len({len(spline) for spline in splines}) == 1
+        for curve, spline in zip(curves, splines):
+            assert spline[0] == pytest.approx(curve[0])
+            assert spline[-1] == pytest.approx(curve[-1])
+
+
+def test_split_cubic_into_n_iter():
+    curve = [complex(*p) for p in [(0, 0), (0, 100), (100, 100), (100, 0)]]
+    for n in (2, 3, 4, 5, 6, 7):
+        pieces = list(split_cubic_into_n_iter(*curve, n))
+        assert len(pieces) == n
+        assert pieces[0][0] == curve[0]
+        assert pieces[-1][3] == pytest.approx(curve[3])
+        for i, piece in enumerate(pieces):
+            x, y = _bezier_point([(c.real, c.imag) for c in curve], (i + 1) / n)
+            assert piece[3] == pytest.approx(complex(x, y))
+
+
+def test_cubic_approx_spline_not_found():
+    curve = [complex(*p) for p in [(0, 0), (0, 100), (100, 100), (100, 0)]]
+    assert cubic_approx_spline(curve, 1, 0.1) is None
+
+
+def test_curve_to_quadratic_not_found():
+    with pytest.raises(ApproxNotFoundError):
+        curve_to_quadratic([(0, 0), (0, 1e9), (1e9, 1e9), (1e9, 0)], 1e-9)
@@ -0,0 +1,66 @@
+from fontTools.pens.cu2quPen import Cu2QuPen
+from fontTools.pens.recordingPen import RecordingPen
+import pytest
+
+
+def test_lines_pass_through():
+    rec = RecordingPen()
+    pen = Cu2QuPen(rec, max_err=1.0)
+    pen.moveTo((0, 0))
+    pen.lineTo((100, 0))
+    pen.qCurveTo((100, 100), (0, 100))
+    pen.closePath()
+    pen.addComponent("a", (1, 0, 0, 1, 0, 0))
+
+    assert rec.value == [
+        ('moveTo', ((0, 0),)),
+        ('lineTo', ((100, 0),)),
+        ('qCurveTo', ((100, 100), (0, 100))),
+        ('closePath', ()),
+        ('addComponent', ('a', (1, 0, 0, 1, 0, 0))),
+    ]
+
+
+def test_curve_to_quadratic():
+    rec = RecordingPen()
+    pen = Cu2QuPen(rec, max_err=1.0)
+    pen.moveTo((0, 0))
+    pen.curveTo((0, 30), (30, 50), (90, 60))
+    pen.endPath()
+
+    assert rec.value == [
+        ('moveTo', ((0, 0),)),
+        ('qCurveTo', ((0, 45), (90, 60))),
+        ('endPath', ()),
+    ]
+
+
+def test_super_bezier_and_stats():
+    rec = RecordingPen()
+    stats = {}
+    pen = Cu2QuPen(rec, max_err=1.0, stats=stats)
+    pen.moveTo((0, 0))
+    pen.curveTo((0, 100), (100, 200), (200, 200), (300, 100), (300, 0))
+    pen.closePath()
+
+    operators = [op for op, _ in rec.value]
+    assert operators[0] == 'moveTo'
+    assert operators[-1] == 'closePath'
+    assert set(operators[1:-1]) == {'qCurveTo'}
+    assert rec.value[-2][1][-1] == (300, 0)
+    assert sum(stats.values()) == len(operators) - 2
+
+
+def test_reverse_direction():
+    rec = RecordingPen()
+    pen = Cu2QuPen(rec, max_err=1.0, reverse_direction=True)
+    pen.moveTo((0, 0))
+    pen.lineTo((100, 0))
+    pen.curveTo((100, 30), (70, 60), (0, 60))
+    pen.closePath()
+
+    assert rec.value[0] == ('moveTo', ((0, 0),))
+    assert rec.value[1] == ('lineTo', ((0, 60),))
+    assert rec.value[2][0] == 'qCurveTo'
+    assert rec.value[2][1][-1] == (100, 0)
+    assert rec.value[-1] == ('closePath', ())
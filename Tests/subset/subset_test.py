@@ -872,5 +872,105 @@ def test_subset_empty_glyf(tmp_path, ttf_path):
     assert all(loc == 0 for loc in loca)
 
 
+def _build_hinted_subrs_font():
+    from fontTools.cffLib import SubrsIndex
+    from fontTools.misc.psCharStrings import T2CharString
+
+    fb = FontBuilder(1000, isTTF=False)
+    glyphs = [".notdef", "A", "B", "C"]
+    fb.setupGlyphOrder(glyphs)
+    fb.setupCharacterMap({0x41: "A", 0x42: "B", 0x43: "C"})
+    fb.setupHorizontalMetrics({g: (500, 0) for g in glyphs})
+    fb.setupHorizontalHeader()
+    subrs = SubrsIndex()
+    # hintmask in a subroutine called without arguments
+    subrs.append(T2CharString(
+        program=["hintmask", b"\xc0", 100, 0, "rlineto", "return"]))
+    # stems declared from the caller's arguments
+    subrs.append(T2CharString(program=["hstemhm", "return"]))
+    charStrings = {
+        ".notdef": T2CharString(program=["endchar"]),
+        "A": T2CharString(program=[
+            0, 10, 20, 10, -106, "callsubr", 0, 0, "rmoveto",
+            -107, "callsubr", -107, "callsubr", 0, -100, "rlineto", "endchar"]),
+        "B": T2CharString(program=[
+            0, 10, 20, 10, -106, "callsubr", 0, 0, "rmoveto",
+            -107, "callsubr", -100, 0, "rlineto", "endchar"]),
+        # nine stems, so the hintmask is two bytes long
+        "C": T2CharString(program=[
+            0, 5, 10, 5, 20, 5, 30, 5, 40, 5, 50, 5, 60, 5, 70, 5, 80, 5,
+            -106, "callsubr", 0, 0, "rmoveto",
+            "hintmask", b"\xff\x80", 0, 100, "rlineto", "endchar"]),
+    }
+    fb.setupCFF("TestHintedSubrs", {}, charStrings, {"Subrs": subrs})
+    fb.setupOS2()
+    fb.setupPost()
+    buf = io.BytesIO()
+    fb.save(buf)
+    buf.seek(0)
+    return TTFont(buf)
+
+
+def test_no_hinting_subr_states_CFF(monkeypatch):
+    from fontTools.subset.cff import _DehintingT2Decompiler
+
+    font = _build_hinted_subrs_font()
+    topDict = font["CFF "].cff.topDictIndex[0]
+    hintmaskSubr, stemSubr = topDict.Private.Subrs
+
+    executed = []
+    execute = _DehintingT2Decompiler.execute
+
+    def spy(self, charString):
+        executed.append(charString)
+        return execute(self, charString)
+
+    monkeypatch.setattr(_DehintingT2Decompiler, "execute", spy)
+
+    options = subset.Options(hinting=False, notdef_outline=True)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(glyphs=font.getGlyphOrder())
+    subsetter.subset(font)
+
+    # the second call in "A" is made with a different hint state, the call
+    # in "B" with the same as the first one, so it isn't run again
+    assert sum(cs is hintmaskSubr for cs in executed) == 2
+    # the stems depend on the caller's arguments, so it is always run
+    assert sum(cs is stemSubr for cs in executed) == 3
+
+    topDict = font["CFF "].cff.topDictIndex[0]
+    charStrings = topDict.CharStrings
+    assert charStrings["A"].program == [
+        0, 0, "rmoveto", -107, "callsubr", -107, "callsubr",
+        0, -100, "rlineto", "endchar"]
+    assert charStrings["B"].program == [
+        0, 0, "rmoveto", -107, "callsubr", -100, 0, "rlineto", "endchar"]
+    assert charStrings["C"].program == [
+        0, 0, "rmoveto", 0, 100, "rlineto", "endchar"]
+    assert [subr.program for subr in topDict.Private.Subrs] == [
+        [100, 0, "rlineto", "return"]]
+
+
+def test_static_subr_usage_undecompiled_subr_CFF():
+    from fontTools.subset.cff import _static_subr_usage
+
+    font = _build_hinted_subrs_font()
+    topDict = font["CFF "].cff.topDictIndex[0]
+    # glyphs set from programs, their subroutines still only have bytecode
+    source = _build_hinted_subrs_font()["CFF "].cff.topDictIndex[0]
+    for glyphName in font.getGlyphOrder():
+        charString = source.CharStrings[glyphName]
+        charString.decompile()
+        topDict.CharStrings[glyphName].setProgram(charString.program)
+    assert all(subr.needsDecompilation() for subr in topDict.Private.Subrs)
+    assert _static_subr_usage(topDict) is None
+
+    subsetter = subset.Subsetter(subset.Options(notdef_outline=True))
+    subsetter.populate(glyphs=[".notdef", "A"])
+    subsetter.subset(font)
+    subrs = font["CFF "].cff.topDictIndex[0].Private.Subrs
+    assert len(subrs) == 2
+
+
 if __name__ == "__main__":
     sys.exit(unittest.main())
@@ -0,0 +1,134 @@
+import array
+import io
+import os
+import sys
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.fontCache import FontCache
+from fontTools.ttLib.tables.DefaultTable import DefaultTable
+import pytest
+
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "varLib", "data")
+
+
+@pytest.fixture
+def fontPath(tmp_path):
+    font = TTFont()
+    font.importXML(os.path.join(DATA_DIR, "PartialInstancerTest-VF.ttx"))
+    path = str(tmp_path / "font.ttf")
+    font.save(path)
+    return path
+
+
+@pytest.fixture
+def longLocaFontPath(tmp_path, fontPath):
+    # 'loca' in the long format, though the short one would do
+    font = TTFont(fontPath, recalcBBoxes=False, recalcTimestamp=False)
+    locations = array.array("I", font["loca"].locations)
+    if sys.byteorder != "big":
+        locations.byteswap()
+    loca = DefaultTable("loca")
+    loca.data = locations.tobytes()
+    font["loca"] = loca
+    font["head"].indexToLocFormat = 1
+    path = str(tmp_path / "longLoca.ttf")
+    font.save(path)
+    return path
+
+
+def _saveFont(font):
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue()
+
+
+def _entries(cache):
+    return sorted(f for f in os.listdir(cache.directory) if f.endswith(".fontcache"))
+
+
+def test_openFont(tmp_path, fontPath):
+    cache = FontCache(str(tmp_path / "cache"))
+    expected = TTFont(fontPath)
+
+    font = cache.openFont(fontPath)
+    assert font.isLoaded("post")
+    assert len(_entries(cache)) == 1
+
+    font = cache.openFont(fontPath)
+    assert not font.isLoaded("post")
+    assert font.getGlyphOrder() == expected.getGlyphOrder()
+    assert list(font["loca"].locations) == list(expected["loca"].locations)
+    assert font["glyf"].keys() == expected["glyf"].keys()
+
+
+def test_openFont_save_unchanged(tmp_path, longLocaFontPath):
+    cache = FontCache(str(tmp_path / "cache"))
+    expected = _saveFont(TTFont(longLocaFontPath, recalcTimestamp=False))
+    with open(longLocaFontPath, "rb") as f:
+        assert expected == f.read()
+
+    # cache miss, then hit
+    for i in range(2):
+        font = cache.openFont(longLocaFontPath, recalcTimestamp=False)
+        assert len(_entries(cache)) == 1
+        assert _saveFont(font) == expected
+
+    font = cache.openFont(longLocaFontPath, recalcTimestamp=False)
+    font["glyf"]["hyphen"]
+    expected = TTFont(longLocaFontPath, recalcTimestamp=False)
+    expected["glyf"]["hyphen"]
+    assert _saveFont(font) == _saveFont(expected)
+
+
+def test_openFont_modified(tmp_path, fontPath):
+    cache = FontCache(str(tmp_path / "cache"))
+    cache.openFont(fontPath)
+
+    font = TTFont(fontPath)
+    font.setGlyphOrder([
+        "glyph%d" % i if i else ".notdef"
+        for i in range(len(font.getGlyphOrder()))
+    ])
+    font["post"].formatType = 2.0
+    font["post"].extraNames = []
+    font["post"].mapping = {}
+    font.save(fontPath)
+    stat = os.stat(fontPath)
+    os.utime(fontPath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    font = cache.openFont(fontPath)
+    assert font.getGlyphOrder()[1] == "glyph1"
+    assert len(_entries(cache)) == 2
+
+
+def test_openFont_corrupt_entry(tmp_path, fontPath):
+    cache = FontCache(str(tmp_path / "cache"))
+    cache.openFont(fontPath)
+    entryPath = os.path.join(cache.directory, _entries(cache)[0])
+    with open(entryPath, "wb") as f:
+        f.write(b"garbage")
+
+    font = cache.openFont(fontPath)
+    assert font.getGlyphOrder() == TTFont(fontPath).getGlyphOrder()
+    assert font.isLoaded("post")
+
+
+def test_prune(tmp_path, fontPath):
+    cache = FontCache(str(tmp_path / "cache"))
+    cache.openFont(fontPath)
+    entrySize = os.path.getsize(
+        os.path.join(cache.directory, _entries(cache)[0]))
+
+    cache.maxSize = entrySize * 2
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / ("font%d.ttf" % i))
+        with open(fontPath, "rb") as src, open(path, "wb") as dst:
+            dst.write(src.read())
+        paths.append(path)
+        cache.openFont(path)
+    assert len(_entries(cache)) == 2
+
+    cache.clear()
+    assert _entries(cache) == []
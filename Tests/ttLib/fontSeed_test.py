@@ -0,0 +1,39 @@
+import struct
+from fontTools.ttLib.fontSeed import getLocaOffsets, packSeed, unpackSeed
+import pytest
+
+
+def _headData(indexToLocFormat):
+    return b"\0" * 50 + struct.pack(">hh", indexToLocFormat, 0)
+
+
+@pytest.mark.parametrize("locations", [None, [0, 10, 10, 24]])
+def test_packSeed_roundtrip(locations):
+    glyphOrder = [".notdef", "A", "Bé"]
+    data = packSeed(glyphOrder, locations)
+    glyphOrder2, locations2 = unpackSeed(data)
+    assert glyphOrder2 == glyphOrder
+    if locations is None:
+        assert locations2 is None
+    else:
+        assert list(locations2) == locations
+
+
+def test_unpackSeed_empty():
+    assert unpackSeed(packSeed([])) == ([], None)
+
+
+def test_unpackSeed_truncated():
+    data = packSeed([".notdef", "A"], [0, 10, 20])
+    with pytest.raises(ValueError):
+        unpackSeed(data[:-1])
+    with pytest.raises(ValueError):
+        unpackSeed(data[:14])
+
+
+def test_getLocaOffsets():
+    offsets = [0, 10, 10, 24]
+    shortData = struct.pack(">4H", *[o // 2 for o in offsets])
+    assert list(getLocaOffsets(shortData, _headData(0))) == offsets
+    longData = struct.pack(">4L", *offsets)
+    assert list(getLocaOffsets(longData, _headData(1))) == offsets
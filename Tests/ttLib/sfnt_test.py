@@ -5,3 +5,15 @@ from fontTools.ttLib.sfnt import calcChecksum
 def test_calcChecksum():
     assert calcChecksum(b"abcd") == 1633837924
     assert calcChecksum(b"abcdxyz") == 3655064932
+
+
+def test_calcChecksum_chunks():
+    data = bytes(range(256)) * 41 + b"xyz"
+    assert calcChecksum(memoryview(data)) == calcChecksum(data)
+    assert calcChecksum(bytearray(data)) == calcChecksum(data)
+    value = 0
+    for i in range(0, len(data), 1024):
+        value = calcChecksum(data[i:i+1024], value)
+    assert value == calcChecksum(data)
+    assert calcChecksum(data[:-3] + b"xyz\0") == calcChecksum(data)
+    assert calcChecksum(b"") == 0
@@ -0,0 +1,111 @@
+import array
+import io
+import os
+import sys
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables.DefaultTable import DefaultTable
+import pytest
+
+pytest.importorskip("multiprocessing.shared_memory")
+
+from fontTools.ttLib.sharedFont import SharedFontSnapshot, attachFont
+
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "varLib", "data")
+
+
+@pytest.fixture(scope="module")
+def fontData():
+    font = TTFont()
+    font.importXML(os.path.join(DATA_DIR, "PartialInstancerTest-VF.ttx"))
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue()
+
+
+@pytest.fixture(scope="module")
+def longLocaFontData(fontData):
+    # 'loca' in the long format, though the short one would do
+    font = TTFont(io.BytesIO(fontData), recalcBBoxes=False, recalcTimestamp=False)
+    locations = array.array("I", font["loca"].locations)
+    if sys.byteorder != "big":
+        locations.byteswap()
+    loca = DefaultTable("loca")
+    loca.data = locations.tobytes()
+    font["loca"] = loca
+    font["head"].indexToLocFormat = 1
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue()
+
+
+def _saveFont(font):
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue()
+
+
+def _attachedGlyphCount(name):
+    with attachFont(name) as font:
+        return len(font["glyf"].keys())
+
+
+def test_attachFont(fontData):
+    font = TTFont(io.BytesIO(fontData))
+    with SharedFontSnapshot(font) as snapshot:
+        with attachFont(snapshot.name, recalcTimestamp=False) as attached:
+            assert attached.isLoaded("loca")
+            assert not attached.isLoaded("post")
+            assert attached.getGlyphOrder() == font.getGlyphOrder()
+            assert not attached.isLoaded("post")
+            assert sorted(attached.keys()) == sorted(font.keys())
+            assert attached["gvar"].variations.keys() == font["gvar"].variations.keys()
+
+            buf = io.BytesIO()
+            attached.save(buf)
+        expected = io.BytesIO()
+        TTFont(io.BytesIO(fontData), recalcTimestamp=False).save(expected)
+        assert buf.getvalue() == expected.getvalue()
+
+
+def test_attachFont_long_loca(longLocaFontData):
+    font = TTFont(io.BytesIO(longLocaFontData), recalcTimestamp=False)
+    with SharedFontSnapshot(font) as snapshot:
+        assert not font.isLoaded("loca")
+        with attachFont(snapshot.name, recalcTimestamp=False) as attached:
+            data = _saveFont(attached)
+        with attachFont(snapshot.name, recalcTimestamp=False) as attached:
+            attached["glyf"]["hyphen"]
+            glyfData = _saveFont(attached)
+
+    # the snapshot didn't load 'loca' in the source font either
+    assert not font.isLoaded("loca")
+    assert _saveFont(font) == longLocaFontData
+    assert data == longLocaFontData
+    assert TTFont(io.BytesIO(data))["head"].indexToLocFormat == 1
+
+    # with 'glyf' loaded, 'loca' is compiled as it would be anyway
+    expected = TTFont(io.BytesIO(longLocaFontData), recalcTimestamp=False)
+    expected["glyf"]["hyphen"]
+    assert glyfData == _saveFont(expected)
+    assert TTFont(io.BytesIO(glyfData))["head"].indexToLocFormat == 0
+
+
+def test_snapshot_compiles_loaded_tables(fontData):
+    font = TTFont(io.BytesIO(fontData))
+    font["glyf"]["hyphen"].coordinates[0] = (1, 2)
+    with SharedFontSnapshot(font) as snapshot:
+        font["glyf"]["hyphen"].coordinates[0] = (3, 4)
+        with attachFont(snapshot.name) as attached:
+            assert attached["glyf"]["hyphen"].coordinates[0] == (1, 2)
+
+
+def test_attachFont_in_worker(fontData):
+    from concurrent.futures import ProcessPoolExecutor
+
+    font = TTFont(io.BytesIO(fontData))
+    with SharedFontSnapshot(font) as snapshot:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(_attachedGlyphCount, snapshot.name).result()
+    assert result == len(font.getGlyphOrder())
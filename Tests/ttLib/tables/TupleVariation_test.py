@@ -554,6 +554,10 @@ class TupleVariationTest(unittest.TestCase):
 		self.assertEqual("00 02", compileDeltaValues([1.9]))
 		self.assertEqual("40 66 66", compileDeltaValues([0x6666 + 0.1]))
 		self.assertEqual("40 66 66", compileDeltaValues([0x6665 + 0.9]))
+		# the encoding is chosen before rounding
+		self.assertEqual("00 00", compileDeltaValues([0.4]))
+		self.assertEqual("40 00 7F", compileDeltaValues([127.4]))
+		self.assertEqual("01 00 01", compileDeltaValues([0.4, 1]))
 
 	def test_decompileDeltas(self):
 		decompileDeltas = TupleVariation.decompileDeltas_
@@ -112,6 +112,26 @@ class CmapSubtableTest(unittest.TestCase):
 		cmap.tables = [c4, c12]
 		self.assertEqual(cmap.buildReversed(), {'A':{0x0041, 0x0391}, 'u10314':{0x10314}})
 
+	def test_buildReversedGlyphIDs(self):
+		c4 = self.makeSubtable(4, 3, 1, 0)
+		c4.cmap = {0x0041:'A', 0x0391:'A', 0x0042:'B'}
+		c12 = self.makeSubtable(12, 3, 10, 0)
+		c12.cmap = {0x0040:'B', 0x10314: 'u10314'}
+		c6 = self.makeSubtable(6, 1, 0, 0)
+		c6.cmap = {0x0020:'A'}
+		cmap = table__c_m_a_p()
+		cmap.tableVersion = 0
+		cmap.tables = [c4, c12, c6]
+		font = ttLib.TTFont()
+		font.setGlyphOrder(['.notdef', 'A', 'B', 'u10314'])
+		data = cmap.compile(font)
+		self.assertEqual(table__c_m_a_p.buildReversedGlyphIDs(data), {1:0x0041, 2:0x0040, 3:0x10314})
+
+		c2 = self.makeSubtable(2, 3, 1, 0)
+		c2.cmap = {0x0041:'A'}
+		cmap.tables = [c2]
+		self.assertEqual(table__c_m_a_p.buildReversedGlyphIDs(cmap.compile(font)), None)
+
 	def test_getBestCmap(self):
 		c4 = self.makeSubtable(4, 3, 1, 0)
 		c4.cmap = {0x0041:'A', 0x0391:'A'}
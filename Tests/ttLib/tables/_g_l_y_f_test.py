@@ -363,6 +363,55 @@ class GlyfTableTest(unittest.TestCase):
         self.assertEqual(font["glyf"][".notdef"].numberOfContours, 0)
         self.assertEqual(font["glyf"]["space"].numberOfContours, 0)
 
+    def _decompileFont(self, **kwargs):
+        font = TTFont(sfntVersion="\x00\x01\x00\x00", **kwargs)
+        glyfTable = font['glyf'] = newTable('glyf')
+        font['head'] = newTable('head')
+        font['loca'] = newTable('loca')
+        font['maxp'] = newTable('maxp')
+        font['maxp'].decompile(self.maxpData, font)
+        font['head'].decompile(self.headData, font)
+        font['loca'].decompile(self.locaData, font)
+        glyfTable.decompile(self.glyfData, font)
+        return font
+
+    def test_decompile_lazy(self):
+        font = self._decompileFont(recalcBBoxes=False)
+        glyfTable = font['glyf']
+        self.assertEqual(glyfTable._glyphCache, {})
+        self.assertEqual(len(glyfTable), 4)
+        self.assertIn("glyph00003", glyfTable)
+        self.assertEqual(glyfTable[".notdef"].numberOfContours, 0)
+        self.assertEqual(list(glyfTable._glyphCache), [".notdef"])
+
+        # the glyphs that weren't accessed are copied from the source data
+        self.assertEqual(glyfTable.compile(font), self.glyfData)
+        self.assertEqual(list(glyfTable._glyphCache), [".notdef"])
+
+        # getting 'glyphs' makes the Glyph objects of all the glyphs
+        glyphs = glyfTable.glyphs
+        self.assertEqual(sorted(glyphs), sorted(font.getGlyphOrder()))
+        self.assertFalse(glyfTable._isLazy())
+        self.assertEqual(glyfTable["glyph00003"].numberOfContours, 2)
+
+    def test_decompile_not_lazy(self):
+        font = self._decompileFont(lazy=False)
+        glyfTable = font['glyf']
+        self.assertFalse(glyfTable._isLazy())
+        self.assertEqual(len(glyfTable.glyphs), 4)
+
+    def test_decompile_lazy_eq(self):
+        lazyTable = self._decompileFont()['glyf']
+        glyfTable = self._decompileFont()['glyf']
+        self.assertEqual(len(glyfTable.glyphs), 4)
+        self.assertTrue(lazyTable._isLazy())
+        self.assertFalse(glyfTable._isLazy())
+        self.assertEqual(lazyTable, glyfTable)
+        self.assertTrue(lazyTable._isLazy())
+        glyfTable.glyphs[".notdef"] = glyfTable.glyphs["glyph00003"]
+        self.assertNotEqual(self._decompileFont()['glyf'], glyfTable)
+        self.assertEqual(lazyTable, self._decompileFont()['glyf'])
+
 
 class GlyphTest:
 
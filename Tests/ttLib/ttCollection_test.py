@@ -0,0 +1,104 @@
+import copy
+import io
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont, newTable
+from fontTools.ttLib.ttCollection import TTCollection
+
+
+def _makeFont():
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder([".notdef", "A"])
+    fb.setupCharacterMap({65: "A"})
+    pen = TTGlyphPen(None)
+    pen.moveTo((100, 0))
+    pen.lineTo((100, 700))
+    pen.lineTo((500, 700))
+    pen.closePath()
+    fb.setupGlyf({".notdef": TTGlyphPen(None).glyph(), "A": pen.glyph()})
+    fb.setupHorizontalMetrics({".notdef": (500, 0), "A": (600, 100)})
+    fb.setupHorizontalHeader()
+    fb.setupNameTable({"familyName": "Shared", "styleName": "Regular"})
+    fb.setupOS2()
+    fb.setupPost()
+    # fixed timestamps, so fonts made at different times compile the same
+    fb.updateHead(created=0x12345678, modified=0x12345678)
+    fb.font.recalcTimestamp = False
+    buf = io.BytesIO()
+    fb.save(buf)
+    buf.seek(0)
+    return TTFont(buf, recalcTimestamp=False)
+
+
+def _makeCollection(share):
+    base = _makeFont()
+    base.getGlyphOrder()
+    collection = TTCollection()
+    for i in range(3):
+        font = _makeFont()
+        font.setGlyphOrder(base.getGlyphOrder())
+        for tag in ("glyf", "loca", "hmtx", "hhea", "maxp", "cmap"):
+            table = base[tag]
+            font[tag] = table if share else copy.deepcopy(table)
+        font["name"].setName("Member %d" % i, 1, 3, 1, 0x409)
+        collection.fonts.append(font)
+    return collection
+
+
+def _saveCollection(collection):
+    buf = io.BytesIO()
+    collection.save(buf)
+    return buf.getvalue()
+
+
+def _countGlyfCompiles(monkeypatch):
+    glyfClass = type(newTable("glyf"))
+    glyfCompile = glyfClass.compile
+    compiled = []
+
+    def compile(self, ttFont):
+        compiled.append(self)
+        return glyfCompile(self, ttFont)
+
+    monkeypatch.setattr(glyfClass, "compile", compile)
+    return compiled
+
+
+def test_save_shared_tables_compiled_once(monkeypatch):
+    shared = _makeCollection(share=True)
+    unshared = _makeCollection(share=False)
+    compiled = _countGlyfCompiles(monkeypatch)
+
+    data = _saveCollection(shared)
+    assert len(compiled) == 1
+
+    del compiled[:]
+    assert _saveCollection(unshared) == data
+    assert len(compiled) == 3
+
+    collection = TTCollection(io.BytesIO(data))
+    assert len(collection) == 3
+    offsets = {font.reader.tables["glyf"].offset for font in collection}
+    assert len(offsets) == 1
+    assert collection[2]["name"].getName(1, 3, 1, 0x409).toUnicode() == "Member 2"
+    assert collection[2]["glyf"]["A"].numberOfContours == 1
+
+
+def test_save_shared_OS2_with_different_cmap():
+    # OS/2 compile reads cmap to update usFirst/LastCharIndex, even if
+    # cmap is not one of its dependencies
+    base = _makeFont()
+    collection = TTCollection()
+    for i in range(2):
+        font = _makeFont()
+        font.setGlyphOrder(base.getGlyphOrder())
+        for tag in ("head", "OS/2"):
+            font[tag] = base[tag]
+        collection.fonts.append(font)
+    cmap = collection[1]["cmap"]
+    for subtable in cmap.tables:
+        subtable.cmap[0xFFE0] = "A"
+
+    collection = TTCollection(io.BytesIO(_saveCollection(collection)))
+    assert collection[0]["OS/2"].usLastCharIndex == 65
+    assert collection[1]["OS/2"].usLastCharIndex == 0xFFE0
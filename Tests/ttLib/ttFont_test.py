@@ -0,0 +1,55 @@
+import io
+import os
+from fontTools.ttLib import TTFont
+import pytest
+
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "varLib", "data")
+
+
+@pytest.fixture(scope="module")
+def varFontData():
+    font = TTFont()
+    font.importXML(os.path.join(DATA_DIR, "PartialInstancerTest-VF.ttx"))
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue()
+
+
+def _dumpXML(font):
+    buf = io.StringIO()
+    font.saveXML(buf, newlinestr="\n")
+    # skip the ttLibVersion
+    return buf.getvalue().split("\n", 1)[1]
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_ensureDecompiled(varFontData, workers):
+    font = TTFont(io.BytesIO(varFontData))
+    font.ensureDecompiled(workers=workers)
+
+    assert all(font.isLoaded(tag) for tag in font.reader.keys())
+    assert "gvar" in font.tables
+    assert not any(hasattr(g, "data") for g in font["glyf"].glyphs.values())
+    assert _dumpXML(font) == _dumpXML(TTFont(io.BytesIO(varFontData)))
+
+
+def test_getGlyphOrder_from_cmap(varFontData):
+    font = TTFont(io.BytesIO(varFontData))
+    expected = font.getGlyphOrder()
+    cmap = font.getBestCmap()
+    font["post"].formatType = 3.0
+    buf = io.BytesIO()
+    font.save(buf)
+
+    font = TTFont(io.BytesIO(buf.getvalue()))
+    glyphOrder = font.getGlyphOrder()
+    assert not font.isLoaded("cmap")
+    assert glyphOrder[0] == ".notdef"
+    for glyphID, glyphName in enumerate(expected[1:], 1):
+        if glyphName in cmap.values():
+            assert glyphOrder[glyphID] == font._makeGlyphName(
+                min(c for c, n in cmap.items() if n == glyphName))
+        else:
+            assert glyphOrder[glyphID] == "glyph%.5d" % glyphID
@@ -1,6 +1,7 @@
 from fontTools.misc.py23 import *
 from fontTools import ttLib
 from fontTools.ttLib import woff2
+from fontTools.ttLib.ttCollection import TTCollection
 from fontTools.ttLib.woff2 import (
 	WOFF2Reader, woff2DirectorySize, woff2DirectoryFormat,
 	woff2FlagsSize, woff2UnknownTagSize, woff2Base128MaxSize, WOFF2DirectoryEntry,
@@ -9,6 +10,7 @@ from fontTools.ttLib.woff2 import (
 	WOFF2HmtxTable, WOFF2Writer, unpackBase128, unpack255UShort, pack255UShort)
 import unittest
 from fontTools.misc import sstruct
+from fontTools.misc.testTools import getXML
 from fontTools import fontBuilder
 from fontTools.pens.ttGlyphPen import TTGlyphPen
 import struct
@@ -752,6 +754,21 @@ class WOFF2GlyfTableTest(unittest.TestCase):
 		data = glyfTable.compile(self.font)
 		self.assertEqual(self.tables['glyf'], data)
 
+	def test_reconstruct_glyf_lazy(self):
+		glyfTable = WOFF2GlyfTable()
+		glyfTable.reconstruct(self.transformedGlyfData, self.font)
+		origGlyfTable = self.font['glyf']
+		for glyphName in self.glyphOrder:
+			glyph = glyfTable.glyphs[glyphName]
+			origGlyph = origGlyfTable[glyphName]
+			if origGlyph.numberOfContours == 0:
+				self.assertFalse(hasattr(glyph, 'data'))
+				continue
+			self.assertTrue(hasattr(glyph, 'data'))
+			glyph.expand(glyfTable)
+			self.assertEqual(
+				getXML(origGlyph.toXML, self.font), getXML(glyph.toXML, self.font))
+
 	def test_reconstruct_glyf_incorrect_glyphOrder(self):
 		glyfTable = WOFF2GlyfTable()
 		badGlyphOrder = self.font.getGlyphOrder()[:-1]
@@ -813,6 +830,24 @@ class WOFF2GlyfTableTest(unittest.TestCase):
 		data = glyfTable.transform(self.font)
 		self.assertEqual(self.transformedGlyfData, data)
 
+	def test_transform_glyf_lazy(self):
+		glyfTable = self.font['glyf']
+		self.assertTrue(glyfTable._isLazy())
+		data = glyfTable.transform(self.font)
+		self.assertEqual(self.transformedGlyfData, data)
+		# only the composite and empty glyphs were made into Glyph objects
+		self.assertTrue(glyfTable._isLazy())
+		for glyphName, glyph in glyfTable._glyphCache.items():
+			self.assertLessEqual(glyph.numberOfContours, 0, glyphName)
+		self.assertLess(len(glyfTable._glyphCache), len(self.glyphOrder))
+
+	def test_transform_glyf_expanded(self):
+		glyfTable = self.font['glyf']
+		for glyphName in self.glyphOrder:
+			glyfTable[glyphName]  # expand
+		data = glyfTable.transform(self.font)
+		self.assertEqual(self.transformedGlyfData, data)
+
 	def test_roundtrip_glyf_reconstruct_and_transform(self):
 		glyfTable = WOFF2GlyfTable()
 		glyfTable.reconstruct(self.transformedGlyfData, self.font)
@@ -1218,6 +1253,134 @@ class WOFF2RoundtripTest(object):
 		assert ttFont.flavor == "woff2"
 
 
+class WOFF2CollectionTest(object):
+	@staticmethod
+	def make_ttc(fontfile):
+		# two fonts sharing all their tables but 'name'
+		fonts = []
+		for familyName in ("TestWOFF2", "OtherWOFF2"):
+			font = ttLib.TTFont(BytesIO(fontfile.getvalue()))
+			font["name"].setName(familyName, 1, 3, 1, 0x409)
+			fonts.append(font)
+		collection = TTCollection()
+		collection.fonts = fonts
+		ttc = BytesIO()
+		collection.save(ttc)
+		ttc.seek(0)
+		return ttc
+
+	@pytest.mark.parametrize(
+		"transformTables", [None, {"glyf", "loca", "hmtx"}, set()])
+	def test_compress_decompress_collection(self, fontfile, transformTables):
+		ttc = self.make_ttc(fontfile)
+		woff2File = BytesIO()
+		woff2.compress(ttc, woff2File, transform_tables=transformTables)
+
+		woff2File.seek(0)
+		header = sstruct.unpack(woff2DirectoryFormat, woff2File.read(woff2DirectorySize))
+		assert header["sfntVersion"] == "ttcf"
+		assert header["numTables"] == 11
+		woff2File.seek(0)
+		collection = TTCollection(woff2File)
+		assert len(collection) == 2
+		assert collection[0].reader.numFonts == 2
+		assert collection[0].reader.numTables == 10
+
+		woff2File.seek(0)
+		ttc2 = BytesIO()
+		woff2.decompress(woff2File, ttc2)
+		ttc2.seek(0)
+		for font, font2 in zip(TTCollection(ttc), TTCollection(ttc2)):
+			assert sorted(font.keys()) == sorted(font2.keys())
+			for tag in ("cmap", "hmtx", "maxp", "name"):
+				assert font.getTableData(tag) == font2.getTableData(tag)
+			glyf, glyf2 = font["glyf"], font2["glyf"]
+			for glyphName in font.getGlyphOrder():
+				assert (
+					glyf[glyphName].getCoordinates(glyf) ==
+					glyf2[glyphName].getCoordinates(glyf2))
+
+	def test_compress_brotli_settings(self, fontfile):
+		sizes = []
+		for quality in (0, None):
+			woff2File = BytesIO()
+			woff2.compress(
+				BytesIO(fontfile.getvalue()), woff2File, quality=quality, window=10)
+			sizes.append(len(woff2File.getvalue()))
+			woff2File.seek(0)
+			font = ttLib.TTFont(woff2File)
+			assert font.getTableData("hmtx") == ttLib.TTFont(fontfile).getTableData("hmtx")
+		assert sizes[0] > sizes[1]
+
+	def test_compressBatch_try_transforms(self, fontfile):
+		inputs = [fontfile.getvalue(), self.make_ttc(fontfile).getvalue()]
+		outputs = [BytesIO(), BytesIO()]
+
+		chosen = woff2.compressBatch(
+			[(BytesIO(data), output) for data, output in zip(inputs, outputs)],
+			try_transforms=True, workers=1)
+
+		for data, output, transformTables in zip(inputs, outputs, chosen):
+			sizes = [
+				len(woff2._compressData(data, candidate, None, None))
+				for candidate in woff2._candidateTransforms
+			]
+			assert len(output.getvalue()) == min(sizes)
+			assert transformTables == woff2._candidateTransforms[sizes.index(min(sizes))]
+
+
+class TranscodeFontTest(object):
+	@pytest.mark.parametrize("flavor", [None, "woff", "woff2"])
+	def test_transcodeFont(self, fontfile, flavor):
+		tmp = BytesIO()
+		ttLib.transcodeFont(BytesIO(fontfile.getvalue()), tmp, flavor=flavor)
+		tmp2 = BytesIO()
+		ttLib.transcodeFont(tmp, tmp2)
+
+		assert ttLib.TTFont(tmp).flavor == flavor
+		font = ttLib.TTFont(fontfile)
+		font2 = ttLib.TTFont(tmp2)
+		assert font2.flavor is None
+		assert sorted(font.keys()) == sorted(font2.keys())
+		for tag in font.keys():
+			if tag not in ("GlyphOrder", "head"):
+				assert font.getTableData(tag) == font2.getTableData(tag)
+
+	def test_transcodeFont_same_woff2_transforms(self, fontfile):
+		woff2File = BytesIO()
+		woff2.compress(BytesIO(fontfile.getvalue()), woff2File)
+		woff2File.seek(0)
+		reader = WOFF2Reader(woff2File)
+
+		tmp = BytesIO()
+		flavorData = WOFF2FlavorData(data=reader.flavorData, brotliQuality=1)
+		assert woff2.rewriteWOFF2(reader, tmp, flavorData)
+		tmp2 = BytesIO()
+		ttLib.transcodeFont(woff2File, tmp2, flavor="woff2", flavorData=flavorData)
+
+		assert tmp.getvalue() == tmp2.getvalue() != woff2File.getvalue()
+		tmp2.seek(0)
+		reader2 = WOFF2Reader(tmp2)
+		assert reader2.transformBuffer.getvalue() == reader.transformBuffer.getvalue()
+		assert list(reader2.tables) == list(reader.tables)
+
+	def test_transcodeFont_other_woff2_transforms(self, fontfile):
+		woff2File = BytesIO()
+		woff2.compress(BytesIO(fontfile.getvalue()), woff2File)
+		woff2File.seek(0)
+		flavorData = WOFF2FlavorData(transformedTables={"glyf", "loca", "hmtx"})
+
+		assert not woff2.rewriteWOFF2(WOFF2Reader(woff2File), BytesIO(), flavorData)
+		tmp = BytesIO()
+		ttLib.transcodeFont(woff2File, tmp, flavor="woff2", flavorData=flavorData)
+		expected = BytesIO()
+		woff2.compress(
+			BytesIO(fontfile.getvalue()), expected,
+			transform_tables={"glyf", "loca", "hmtx"})
+
+		assert tmp.getvalue() == expected.getvalue()
+
+
 class MainTest(object):
 
 	@staticmethod
@@ -1419,6 +1582,46 @@ class UShort255Test(unittest.TestCase):
 			pack255UShort, 0xFFFF+1)
 
 
+class TripletTest(unittest.TestCase):
+
+	def test_encode_decode_triplets(self):
+		deltas = [(0, 0)]
+		for absX, absY in [
+				(0, 1), (0, 1279), (1, 0), (1279, 0), (1, 1), (64, 64),
+				(65, 1), (1, 768), (768, 768), (769, 1), (4095, 4095),
+				(4096, 1), (1, 1280), (65535, 65535)]:
+			for xSign, ySign in [(1, 1), (-1, 1), (1, -1), (-1, -1)]:
+				deltas.append((xSign * absX, ySign * absY))
+		flags = bytearray()
+		triplets = []
+		for x, y in deltas:
+			flag, triplet = woff2._encodeTriplet(x, y)
+			flags.append(flag | (0x80 if len(flags) % 2 else 0))
+			triplets.append(triplet)
+		data = b"\x01" + b"".join(triplets)
+
+		xDeltas, yDeltas, end = woff2._decodeTriplets(bytes(flags), data, 1)
+
+		self.assertEqual(deltas, list(zip(xDeltas, yDeltas)))
+		self.assertEqual(len(data), end)
+		self.assertRaisesRegex(
+			ttLib.TTLibError,
+			"not enough 'glyphStream' data",
+			woff2._decodeTriplets, bytes(flags), data[:-1], 1)
+
+	def test_compileDeltas(self):
+		from fontTools.ttLib.tables._g_l_y_f import Glyph
+		rnd = random.Random(0)
+		for n in (1, 2, 3, 256, 257, 258, 600):
+			xDeltas = [rnd.choice([0, 0, 255, -255, 256, -1000]) for i in range(n)]
+			yDeltas = [rnd.choice([0, 0, 0, 1, -1, 300]) for i in range(n)]
+			onCurves = [i % 7 != 0 for i in range(n)]
+			flags = bytes(0 if onCurve else 0x80 for onCurve in onCurves)
+			expected = Glyph().compileDeltasGreedy(
+				[int(onCurve) for onCurve in onCurves], zip(xDeltas, yDeltas))
+			self.assertEqual(expected, woff2._compileDeltas(flags, xDeltas, yDeltas))
+
+
 if __name__ == "__main__":
 	import sys
 	sys.exit(unittest.main())
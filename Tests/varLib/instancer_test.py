@@ -196,6 +196,40 @@ class InstantiateGvarTest(object):
         assert hmtx["minus"] == (422, 26)  # 'minus' left sidebearing changed
         assert vmtx["minus"] == (536, 250)  # 'minus' top sidebearing too
 
+    @pytest.mark.parametrize(
+        "location",
+        [
+            {"wdth": -0.5},
+            {"wght": instancer.NormalizedAxisRange(0, 0.5)},
+            {"wght": -1.0, "wdth": -1.0},
+        ],
+    )
+    @pytest.mark.parametrize("decompiled", [True, False])
+    def test_workers(self, varfont, location, optimize, decompiled):
+        buf = BytesIO()
+        varfont.save(buf)
+        fonts = []
+        for workers in (None, 2):
+            buf.seek(0)
+            font = ttLib.TTFont(buf)
+            if decompiled:
+                font["gvar"]
+            instancer.instantiateGvar(
+                font, location, optimize=optimize, workers=workers
+            )
+            fonts.append(font)
+        serial, parallel = fonts
+
+        for glyphname in serial.getGlyphOrder():
+            assert _get_coordinates(parallel, glyphname) == _get_coordinates(
+                serial, glyphname
+            )
+        assert parallel["hmtx"].metrics == serial["hmtx"].metrics
+        assert parallel["vmtx"].metrics == serial["vmtx"].metrics
+        assert ("gvar" in parallel) == ("gvar" in serial)
+        if "gvar" in serial:
+            assert parallel["gvar"].compile(parallel) == serial["gvar"].compile(serial)
+
 
 class InstantiateCvarTest(object):
     @pytest.mark.parametrize(
@@ -1,24 +1,52 @@
 from fontTools.misc.py23 import *
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
 from fontTools.ttLib import TTFont
+from fontTools.varLib import interpolatable
 from fontTools.varLib.interpolatable import main as interpolatable_main
+import itertools
 import os
+import random
 import shutil
 import sys
 import tempfile
 import unittest
 
-try:
-    import scipy
-except:
-    scipy = None
 
-try:
-    import munkres
-except ImportError:
-    munkres = None
+class _Glyph(object):
+
+    def __init__(self, contours):
+        self.contours = contours
+
+    def draw(self, pen):
+        for contour in self.contours:
+            pen.moveTo(contour[0])
+            for pt in contour[1:]:
+                pen.lineTo(pt)
+            pen.closePath()
+
+
+def _rect(x, y, w, h):
+    return [(x, y), (x, y + h), (x + w, y + h), (x + w, y)]
+
+
+def _make_glyphsets(swap=False, dropContour=False, dropGlyph=False):
+    glyphsets = []
+    for shift in (0, 30):
+        A = [_rect(50 + shift, 0, 100, 700), _rect(400, 0, 300 + shift, 200)]
+        B = [_rect(0, 0, 500, 500 + shift), _rect(100, 100, 50, 50)]
+        if shift:
+            if swap:
+                A.reverse()
+            if dropContour:
+                del B[1]
+        glyphset = {"A": _Glyph(A), "B": _Glyph(B)}
+        if shift and dropGlyph:
+            del glyphset["B"]
+        glyphsets.append(glyphset)
+    return glyphsets
 
 
-@unittest.skipUnless(scipy or munkres, "scipy or munkres not installed")
 class InterpolatableTest(unittest.TestCase):
     def __init__(self, methodName):
         unittest.TestCase.__init__(self, methodName)
@@ -59,6 +87,24 @@ class InterpolatableTest(unittest.TestCase):
         if not self.tempdir:
             self.tempdir = tempfile.mkdtemp()
 
+    def build_font(self, glyphset, suffix):
+        fb = FontBuilder(1000, isTTF=True)
+        glyphOrder = [".notdef"] + sorted(glyphset)
+        fb.setupGlyphOrder(glyphOrder)
+        glyphs = {}
+        for glyphName in glyphOrder:
+            pen = TTGlyphPen(None)
+            if glyphName in glyphset:
+                glyphset[glyphName].draw(pen)
+            glyphs[glyphName] = pen.glyph()
+        fb.setupGlyf(glyphs)
+        fb.setupHorizontalMetrics({name: (1000, 0) for name in glyphOrder})
+        fb.setupHorizontalHeader(ascent=800, descent=-200)
+        fb.setupPost()
+        path = self.temp_path(suffix)
+        fb.save(path)
+        return path
+
     def compile_font(self, path, suffix, temp_dir):
         ttx_filename = os.path.basename(path)
         savepath = os.path.join(temp_dir, ttx_filename.replace('.ttx', suffix))
@@ -96,6 +142,74 @@ class InterpolatableTest(unittest.TestCase):
         otf_paths = self.get_file_list(self.tempdir, suffix)
         self.assertIsNone(interpolatable_main(otf_paths))
 
+    def test_compatible(self):
+        self.assertEqual(interpolatable.test(_make_glyphsets()), {})
+
+    def test_contour_order(self):
+        problems = interpolatable.test(
+            _make_glyphsets(swap=True), names=["Regular", "Bold"])
+
+        self.assertEqual(problems, {
+            "A": [{
+                "type": "contour_order",
+                "master_1": "Regular",
+                "master_2": "Bold",
+                "value_1": [0, 1],
+                "value_2": [1, 0],
+            }],
+        })
+
+    def test_path_count(self):
+        problems = interpolatable.test(
+            _make_glyphsets(dropContour=True), names=["Regular", "Bold"])
+
+        self.assertEqual(problems, {
+            "B": [{
+                "type": "path_count",
+                "master_1": "Regular",
+                "master_2": "Bold",
+                "value_1": 2,
+                "value_2": 1,
+            }],
+        })
+
+    def test_missing_glyph(self):
+        problems = interpolatable.test(
+            _make_glyphsets(dropGlyph=True), names=["Regular", "Bold"])
+
+        self.assertEqual(problems, {
+            "B": [{"type": "missing", "master": "Bold"}],
+        })
+
+    def test_hungarian(self):
+        rnd = random.Random(0)
+        for n in range(1, 7):
+            for _ in range(10):
+                G = [[rnd.randint(0, 20) for _ in range(n)] for _ in range(n)]
+                matching = interpolatable._hungarian(G)
+                self.assertEqual(sorted(matching), list(range(n)))
+                self.assertEqual(
+                    interpolatable._matching_cost(G, matching),
+                    min(interpolatable._matching_cost(G, p)
+                        for p in itertools.permutations(range(n))))
+
+    def test_paths_gen_workers(self):
+        self.temp_dir()
+        paths = [self.build_font(glyphset, ".ttf")
+                 for glyphset in _make_glyphsets(swap=True, dropContour=True)]
+        names = ["Regular", "Bold"]
+
+        expected = list(interpolatable.test_paths_gen(paths, names=names))
+        self.assertEqual(
+            [(glyphName, problem["type"]) for glyphName, problem in expected],
+            [("A", "contour_order"), ("B", "path_count")])
+
+        result = list(interpolatable.test_paths_gen(paths, names=names, workers=2, chunkSize=1))
+        self.assertEqual(
+            sorted(result, key=lambda r: r[0]), expected)
+
+        self.assertEqual(interpolatable_main(paths + ["-j", "2"]), 1)
+
 
 if __name__ == "__main__":
     sys.exit(unittest.main())
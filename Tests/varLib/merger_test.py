@@ -0,0 +1,103 @@
+from fontTools.misc.testTools import getXML
+from fontTools.otlLib.builder import buildPairPosClassesSubtable, buildValue
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables import otBase, otTables as ot
+from fontTools.varLib import merger as varLibMerger
+from fontTools.varLib.merger import VariationMerger
+from fontTools.varLib.models import VariationModel
+from functools import reduce
+import random
+import pytest
+
+
+GLYPHS = [".notdef"] + ["g%02d" % i for i in range(40)]
+
+LOCATIONS = [
+    {},
+    {"wght": 1.0},
+    {"wdth": 1.0},
+    {"wght": 1.0, "wdth": 1.0},
+    {"wght": 0.5},
+]
+
+
+def _makeFont():
+    font = TTFont()
+    font.setGlyphOrder(GLYPHS)
+    return font
+
+
+def _randomClasses(rnd, glyphs, count):
+    glyphs = list(glyphs)
+    rnd.shuffle(glyphs)
+    classes = [[] for _ in range(count)]
+    for i, glyph in enumerate(glyphs):
+        classes[i % count].append(glyph)
+    return [tuple(sorted(c)) for c in classes if c]
+
+
+def _randomPairPos(rnd, font, valueKeys, sparse=False):
+    glyphMap = font.getReverseGlyphMap()
+    lefts = rnd.sample(GLYPHS[1:], 25)
+    rights = _randomClasses(rnd, GLYPHS[1:], rnd.randint(2, 6))
+    pairs = {}
+    for left in _randomClasses(rnd, lefts, rnd.randint(2, 6)):
+        for right in rights:
+            if rnd.random() < 0.7:
+                value = {key: rnd.randint(-3, 3) * 10 for key in valueKeys}
+                pairs[(left, right)] = (buildValue(value), None)
+    self = buildPairPosClassesSubtable(pairs, glyphMap)
+    if sparse:
+        return self
+    # Like decompiled subtables, have a value record in every cell
+    for class1Record in self.Class1Record:
+        for class2Record in class1Record.Class2Record:
+            if class2Record.Value1 is None:
+                class2Record.Value1 = otBase.ValueRecord(self.ValueFormat1)
+    return self
+
+
+def _mergeMasters(subtables, merge):
+    font = _makeFont()
+    model = VariationModel(LOCATIONS)
+    merger = VariationMerger(model, ["wght", "wdth"], font)
+    merger.lookup_subtables = [[st] for st in subtables]
+    self = ot.PairPos()
+    self.Format = 2
+    self.Coverage = ot.Coverage()
+    self.ValueFormat1 = reduce(int.__or__, [st.ValueFormat1 for st in subtables], 0)
+    self.ValueFormat2 = 0
+    glyphs, _ = varLibMerger._merge_GlyphOrders(
+        font, [st.Coverage.glyphs for st in subtables])
+    self.Coverage.glyphs = glyphs
+    merge(self, subtables, merger)
+    return getXML(self.toXML, font), getXML(merger.store_builder.finish().toXML, font)
+
+
+def _mergeGeneric(self, lst, merger):
+    matrices = varLibMerger._PairPosFormat2_align_matrices(self, lst, merger.font)
+    self.Class1Record = list(matrices[0])
+    merger.mergeLists(self.Class1Record, matrices)
+
+
+def _mergeColumnar(self, lst, merger):
+    self.Class1Record = varLibMerger._PairPosFormat2_merge_variations(self, lst, merger)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_PairPosFormat2_merge_variations(seed):
+    rnd = random.Random(seed)
+    font = _makeFont()
+    subtables = []
+    for i in range(len(LOCATIONS)):
+        valueKeys = ["XAdvance"]
+        if i != 0 and rnd.random() < 0.5:
+            valueKeys.append("XPlacement")
+        # Leave empty cells of some masters without value record, so that
+        # they are merged with sub-models
+        sparse = i != 0 and rnd.random() < 0.3
+        subtables.append(_randomPairPos(rnd, font, valueKeys, sparse))
+
+    expected = _mergeMasters(subtables, _mergeGeneric)
+    assert _mergeMasters(subtables, _mergeColumnar) == expected
+    assert "XAdvDevice" in "\n".join(expected[0])
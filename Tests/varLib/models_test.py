@@ -153,3 +153,71 @@ class VariationModelTest(object):
                     {"bar": 1.0, "foo": 1.0},
                 ]
             )
+
+    LOCATIONS = [
+        {},
+        {"wght": 1.0},
+        {"wght": -1.0},
+        {"wdth": 1.0},
+        {"wght": 1.0, "wdth": 1.0},
+        {"wght": 0.5},
+    ]
+
+    def test_getDeltasMatrix(self):
+        model = VariationModel(self.LOCATIONS)
+        matrix = [
+            [100, 120, 80, 90, 130, 115],
+            [0, 0, 0, 0, 0, 0],
+            [-5, 12.5, -300, 7, 1000, 3],
+        ]
+
+        assert model.getDeltasMatrix(matrix) == [
+            model.getDeltas(row) for row in matrix
+        ]
+        assert model.getDeltasMatrix([]) == []
+
+    def test_getDeltasAndSupportsMatrix(self):
+        model = VariationModel(self.LOCATIONS)
+        matrix = [
+            [100, 120, 80, 90, 130, 115],
+            [100, None, 80, 90, None, 115],
+            [0, 10, 20, 30, 40, 50],
+            [50, None, 30, 20, None, 10],
+        ]
+
+        result = model.getDeltasAndSupportsMatrix(matrix)
+
+        assert result == [model.getDeltasAndSupports(row) for row in matrix]
+        # rows with the same missing masters share a sub-model
+        assert result[1][1] is result[3][1]
+
+    def test_getScalars_cached(self):
+        model = VariationModel(self.LOCATIONS)
+        location = {"wght": 0.75, "wdth": 0.25}
+        expected = [supportScalar(location, s) for s in model.supports]
+
+        assert model.getScalars(location) == expected
+        scalars = model.getScalars(dict(reversed(list(location.items()))))
+        assert scalars == expected
+        scalars[0] = 42
+        assert model.getScalars(location) == expected
+
+        for i in range(model._scalarCacheSize + 1):
+            model.getScalars({"wght": i / 1000})
+        assert len(model._scalarCache) == model._scalarCacheSize
+        assert model.getScalars(location) == expected
+
+    def test_interpolateFromDeltasMatrixAndScalars(self):
+        model = VariationModel(self.LOCATIONS)
+        deltasMatrix = model.getDeltasMatrix([
+            [100, 120, 80, 90, 130, 115],
+            [0, 10, 20, 30, 40, 50],
+        ])
+        scalars = model.getScalars({"wght": 0.25, "wdth": 0.5})
+
+        assert model.interpolateFromDeltasMatrixAndScalars(
+            deltasMatrix, scalars
+        ) == [
+            model.interpolateFromDeltasAndScalars(deltas, scalars)
+            for deltas in deltasMatrix
+        ]
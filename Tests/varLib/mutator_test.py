@@ -3,6 +3,7 @@ from fontTools.ttLib import TTFont
 from fontTools.varLib import build
 from fontTools.varLib.mutator import main as mutator
 from fontTools.varLib.mutator import instantiateVariableFont as make_instance
+from fontTools.varLib.mutator import instantiateVariableFonts as make_instances
 import difflib
 import os
 import shutil
@@ -181,6 +182,100 @@ class MutatorTest(unittest.TestCase):
         expected_ttx_path = self.get_test_output(expected_ttx_name + '.ttx')
         self.expect_ttx(new_font, expected_ttx_path, tables)
 
+    def build_ttf_varfont(self):
+        suffix = '.ttf'
+        ds_path = self.get_test_input('Build.designspace')
+        ufo_dir = self.get_test_input('master_ufo')
+        ttx_dir = self.get_test_input('master_ttx_interpolatable_ttf')
+
+        self.temp_dir()
+        ttx_paths = self.get_file_list(ttx_dir, '.ttx', 'TestFamily-')
+        for path in ttx_paths:
+            self.compile_font(path, suffix, self.tempdir)
+
+        finder = lambda s: s.replace(ufo_dir, self.tempdir).replace('.ufo', suffix)
+        varfont, _, _ = build(ds_path, finder)
+        varfont_path = os.path.join(self.tempdir, 'Mutator' + suffix)
+        varfont.save(varfont_path)
+        return varfont_path
+
+    @staticmethod
+    def reload_font(font):
+        stream = BytesIO()
+        font.save(stream)
+        stream.seek(0)
+        return TTFont(stream)
+
+    def assert_same_fonts(self, font1, font2):
+        # compare the compiled fonts, as in-memory instances have stale
+        # values (e.g. hhea.advanceWidthMax) that are only updated on save
+        font1 = self.reload_font(font1)
+        font2 = self.reload_font(font2)
+        tables = [tag for tag in font1.keys() if tag != 'head']
+        self.assertEqual(sorted(tables), sorted(t for t in font2.keys() if t != 'head'))
+        path1 = self.temp_path(suffix=".ttx")
+        font1.saveXML(path1, tables=tables)
+        path2 = self.temp_path(suffix=".ttx")
+        font2.saveXML(path2, tables=tables)
+        self.assertEqual(self.read_ttx(path1), self.read_ttx(path2))
+
+    def test_varlib_mutator_many_instances_ttf(self):
+        varfont_path = self.build_ttf_varfont()
+        locations = [
+            {'wght': 500, 'cntr': 50},
+            {'wght': 100, 'cntr': 100},
+            {},
+            {'wght': 900},
+        ]
+
+        varfont = TTFont(varfont_path)
+        instances = make_instances(varfont, locations)
+
+        self.assertIn('gvar', varfont)
+        self.assertEqual(len(instances), len(locations))
+        for location, instance in zip(locations, instances):
+            expected = make_instance(TTFont(varfont_path), location)
+            self.assert_same_fonts(instance, expected)
+
+    def test_varlib_mutator_many_instances_workers(self):
+        varfont_path = self.build_ttf_varfont()
+        locations = [{'wght': 500, 'cntr': 50}, {'wght': 900}]
+
+        serial = make_instances(TTFont(varfont_path), locations)
+        parallel = make_instances(TTFont(varfont_path), locations, workers=2)
+
+        for instance1, instance2 in zip(serial, parallel):
+            self.assert_same_fonts(instance1, instance2)
+
+    def test_varlib_mutator_many_instances_CFF2(self):
+        suffix = '.otf'
+        ttx_dir = self.get_test_input('master_ttx_varfont_otf')
+
+        self.temp_dir()
+        ttx_paths = self.get_file_list(ttx_dir, '.ttx', 'TestCFF2VF')
+        for path in ttx_paths:
+            self.compile_font(path, suffix, self.tempdir)
+        varfont_path = os.path.join(self.tempdir, 'TestCFF2VF' + suffix)
+
+        locations = [{'wght': float(200)}, {'wght': float(700)}]
+        instances = make_instances(TTFont(varfont_path), locations)
+
+        expected_ttx_path = self.get_test_output('InterpolateTestCFF2VF.ttx')
+        self.expect_ttx(instances[0], expected_ttx_path, ["hmtx", "CFF2"])
+        expected = make_instance(TTFont(varfont_path), locations[1])
+        self.assert_same_fonts(instances[1], expected)
+
+    def test_varlib_mutator_many_instances_cli(self):
+        varfont_path = self.build_ttf_varfont()
+
+        mutator([varfont_path, '-l', 'wght=500,cntr=50', '-l', 'wght=900', '-j', '2'])
+
+        instfont = TTFont(os.path.join(self.tempdir, 'Mutator-cntr50-wght500.ttf'))
+        tables = [table_tag for table_tag in instfont.keys() if table_tag != 'head']
+        self.expect_ttx(instfont, self.get_test_output('Mutator.ttx'), tables)
+        self.assertTrue(
+            os.path.exists(os.path.join(self.tempdir, 'Mutator-wght900.ttf')))
+
 
 if __name__ == "__main__":
     sys.exit(unittest.main())
@@ -15,6 +15,7 @@ import shutil
 import sys
 import tempfile
 import unittest
+from unittest.mock import patch
 import pytest
 
 
@@ -475,6 +476,90 @@ class BuildTest(unittest.TestCase):
         tables = [table_tag for table_tag in varfont.keys() if table_tag != "head"]
         self.expect_ttx(varfont, expected_ttx_path, tables)
 
+    def test_varlib_build_cache(self):
+        ds_path = self.get_test_input("Build.designspace")
+        ttx_dir = self.get_test_input("master_ttx_interpolatable_ttf")
+        expected_ttx_path = self.get_test_output("BuildMain.ttx")
+
+        self.temp_dir()
+        for path in self.get_file_list(ttx_dir, '.ttx', 'TestFamily-'):
+            self.compile_font(path, ".ttf", self.tempdir)
+        cache_dir = os.path.join(self.tempdir, "cache")
+
+        def finder(path):
+            return os.path.join(
+                self.tempdir, os.path.basename(path).replace(".ufo", ".ttf"))
+
+        def build_font(**kwargs):
+            varfont, _, _ = build(ds_path, finder, **kwargs)
+            return reload_font(varfont)
+
+        with self.assertLogs("fontTools.varLib.buildCache", "INFO") as logs:
+            build_font(cache_dir=cache_dir)
+        self.assertEqual(logs.output, [
+            "INFO:fontTools.varLib.buildCache:Reused cached gvar for 0 of 6 glyphs"
+        ])
+
+        with self.assertLogs("fontTools.varLib.buildCache", "INFO") as logs:
+            varfont = build_font(cache_dir=cache_dir)
+        self.assertEqual(logs.output, [
+            "INFO:fontTools.varLib.buildCache:Reusing cached HVAR",
+            "INFO:fontTools.varLib.buildCache:Reusing cached OTL",
+            "INFO:fontTools.varLib.buildCache:Reused cached gvar for 6 of 6 glyphs",
+        ])
+        tables = [table_tag for table_tag in varfont.keys() if table_tag != "head"]
+        self.expect_ttx(varfont, expected_ttx_path, tables)
+
+        # Edit a glyph of one master: only that glyph's variations are
+        # computed again, and the result is the same as without cache.
+        master_path = finder("TestFamily-Master1.ufo")
+        master = TTFont(master_path)
+        glyph = master["glyf"]["uni0041"]
+        glyph.coordinates[0] = (glyph.coordinates[0][0] + 10, glyph.coordinates[0][1])
+        master.save(master_path)
+
+        with self.assertLogs("fontTools.varLib.buildCache", "INFO") as logs:
+            varfont = build_font(cache_dir=cache_dir)
+        self.assertIn(
+            "INFO:fontTools.varLib.buildCache:Reused cached gvar for 5 of 6 glyphs",
+            logs.output)
+        expected = build_font()
+        self.assertEqual(sorted(varfont.keys()), sorted(expected.keys()))
+        for tag in expected.keys():
+            if tag not in ("GlyphOrder", "head"):
+                self.assertEqual(
+                    varfont.getTableData(tag), expected.getTableData(tag))
+
+    def test_varlib_build_stream_masters(self):
+        ds_path = self.get_test_input("Build.designspace")
+        ttx_dir = self.get_test_input("master_ttx_interpolatable_ttf")
+        expected_ttx_path = self.get_test_output("BuildMain.ttx")
+
+        self.temp_dir()
+        for path in self.get_file_list(ttx_dir, '.ttx', 'TestFamily-'):
+            self.compile_font(path, ".ttf", self.tempdir)
+
+        ds = DesignSpaceDocument.fromfile(ds_path)
+        for source in ds.sources:
+            source.path = os.path.join(
+                self.tempdir, os.path.basename(source.filename).replace(".ufo", ".ttf")
+            )
+        ds.updatePaths()
+
+        with patch("fontTools.varLib.STREAM_CHUNK_SIZE", 2):
+            varfont, _, _ = build(ds, stream_masters=True)
+        varfont = reload_font(varfont)
+        tables = [table_tag for table_tag in varfont.keys() if table_tag != "head"]
+        self.expect_ttx(varfont, expected_ttx_path, tables)
+
+        # the masters' glyphs were released once folded into the deltas
+        for source in ds.sources:
+            self.assertTrue(source.font.lazy)
+            glyphs = source.font["glyf"].glyphs
+            for glyph in glyphs.values():
+                self.assertFalse(hasattr(glyph, "coordinates"))
+                self.assertFalse(hasattr(glyph, "components"))
+
     def test_varlib_build_from_ttx_paths(self):
         ds_path = self.get_test_input("Build.designspace")
         ttx_dir = self.get_test_input("master_ttx_interpolatable_ttf")
@@ -0,0 +1,146 @@
+from fontTools.misc.py23 import *
+from fontTools.misc.testTools import getXML
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables.otBase import OTTableWriter
+from fontTools.varLib.models import VariationModel
+from fontTools.varLib.varStore import (
+    OnlineVarStoreBuilder, _Encoding, _EncodingDict, _EncodingMerger)
+import heapq
+import random
+import pytest
+
+
+def _buildVarStore(numRegions, rows):
+    builder = OnlineVarStoreBuilder(["wght"])
+    supports = [{"wght": (0, (i + 1) / numRegions, 1)} for i in range(numRegions)]
+    builder.setSupports(supports)
+    varIdxes = [builder.storeDeltas(row) for row in rows]
+    return builder.finish(optimize=False), varIdxes
+
+
+def _fullRows(store, numRegions):
+    rows = {}
+    for major, data in enumerate(store.VarData):
+        for minor, item in enumerate(data.Item):
+            row = [0] * numRegions
+            for regionIdx, v in zip(data.VarRegionIndex, item):
+                row[regionIdx] += v
+            rows[(major << 16) + minor] = row
+    return rows
+
+
+def _compiledSize(store):
+    writer = OTTableWriter()
+    store.compile(writer, TTFont())
+    return len(writer.getAllData())
+
+
+# previousSize is the size the optimizer used to produce before merging
+# the best candidates first
+@pytest.mark.parametrize("numRegions, numRows, density, previousSize", [
+    (1, 10, 1.0, 57),
+    (4, 50, 0.5, 383),
+    (8, 300, 0.3, 2880),
+    (15, 500, 0.2, 6974),
+    (16, 1000, 0.5, 27912),
+])
+def test_optimize(numRegions, numRows, density, previousSize):
+    rnd = random.Random(numRegions * numRows)
+    rows = []
+    for _ in range(numRows):
+        row = []
+        for _ in range(numRegions):
+            if rnd.random() < density:
+                row.append(rnd.choice([rnd.randint(-127, 127),
+                                       rnd.randint(-1000, 1000)]))
+            else:
+                row.append(0)
+        rows.append(row)
+    store, varIdxes = _buildVarStore(numRegions, rows)
+    sizeBefore = _compiledSize(store)
+
+    mapping = store.optimize()
+
+    size = _compiledSize(store)
+    assert size <= sizeBefore
+    assert size <= previousSize
+    newRows = _fullRows(store, numRegions)
+    for varIdx, row in zip(varIdxes, rows):
+        assert newRows[mapping[varIdx]] == row
+
+
+def test_optimize_candidates_bounded(monkeypatch):
+    numRegions = 16
+    rnd = random.Random(0)
+    encodings = _EncodingDict()
+    for _ in range(2000):
+        encodings.add_row(tuple(
+            rnd.choice([0, 0, rnd.randint(-127, 127), rnd.randint(-1000, 1000)])
+            for _ in range(numRegions)))
+    encodings = sorted(encodings.values(), key=_Encoding.sort_key)
+    rows = sorted(row for encoding in encodings for row in encoding.items)
+
+    merger = _EncodingMerger(encodings, numRegions, numPartners=4)
+    # not all the pairs of encodings, which would make it quadratic
+    assert len(merger.heap) <= 4 * len(encodings)
+
+    pushes = []
+    heappush = heapq.heappush
+
+    def countingHeappush(heap, item):
+        pushes.append(item)
+        heappush(heap, item)
+
+    monkeypatch.setattr(heapq, "heappush", countingHeappush)
+    merged = merger.merge()
+    assert len(pushes) <= 4 * (len(merger.encodings) + len(encodings))
+    assert len(merged) < len(encodings)
+    assert sorted(row for encoding in merged for row in encoding.items) == rows
+
+
+def _makeModel():
+    return VariationModel([{}, {"wght": 1.0}, {"wght": -1.0}, {"wght": 0.5}])
+
+
+def test_storeMastersMatrix():
+    model = _makeModel()
+    rows = [(100, 120, 80, 110), (0, 0, 0, 10), (100, 120, 80, 110),
+            (50, 60, None, 55), (5, None, 0, None), (50, 60, None, 55)]
+
+    builder = OnlineVarStoreBuilder(["wght"])
+    builder.setModel(model)
+    stored = builder.storeMastersMatrix(rows)
+    store = builder.finish(optimize=False)
+
+    expectedBuilder = OnlineVarStoreBuilder(["wght"])
+    expected = []
+    for row in rows:
+        subModel, values = model.getSubModel(row)
+        expectedBuilder.setModel(subModel)
+        expected.append(expectedBuilder.storeMasters(values))
+    expectedStore = expectedBuilder.finish(optimize=False)
+
+    assert stored == expected
+    assert stored[0] == stored[2] and stored[3] == stored[5]
+    assert getXML(store.toXML) == getXML(expectedStore.toXML)
+    assert builder._model is model
+
+
+def test_storeMasters_dedup():
+    builder = OnlineVarStoreBuilder(["wght"])
+    builder.setModel(_makeModel())
+    stored = [builder.storeMasters([100, 120 + i % 3, 80, 110]) for i in range(30)]
+    store = builder.finish(optimize=False)
+
+    assert len(set(stored)) == 3
+    assert sum(len(data.Item) for data in store.VarData) == 3
+
+
+def test_storeDeltas_full_VarData():
+    builder = OnlineVarStoreBuilder(["wght"])
+    builder.setSupports([{}, {"wght": (0, 1, 1)}])
+    varIdxes = [builder.storeDeltas([i]) for i in range(0x10001)]
+    store = builder.finish(optimize=False)
+
+    assert [len(data.Item) for data in store.VarData] == [0xFFFF, 2]
+    assert varIdxes[-1] == (1 << 16) + 1
@@ -61,11 +61,10 @@ extras_require = {
 		"lz4 >= 1.7.4.2"
 	],
 	# for fontTools.interpolatable: to solve the "minimum weight perfect
-	# matching problem in bipartite graphs" (aka Assignment problem)
+	# matching problem in bipartite graphs" (aka Assignment problem) faster
+	# than the built-in pure-python implementation, which is used on pypy
 	"interpolatable": [
-		# use pure-python alternative on pypy
 		"scipy; platform_python_implementation != 'PyPy'",
-		"munkres; platform_python_implementation == 'PyPy'",
 	],
 	# for fontTools.varLib.plot, to visualize DesignSpaceDocument and resulting
 	# VariationModel